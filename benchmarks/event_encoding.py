@@ -0,0 +1,79 @@
+"""Bytes per event and encode/decode cost of the JSON and binary wire formats.
+
+    python -m benchmarks.event_encoding --iterations 20000
+
+Runs in-process with no broker; one row per event type and format.
+"""
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from shared.event_codec import decode_event, encode_event
+from shared.schemas import (
+    EVENT_MODELS,
+    TransferCompletedEvent,
+    TransferFailedEvent,
+    WalletCreatedEvent,
+    WalletFundedEvent,
+)
+from shared.serialization import dumps
+
+
+def _sample_events() -> list:
+    timestamp = datetime(2025, 1, 1, 12, 0, 0, 123456)
+    return [
+        WalletCreatedEvent(wallet_id=str(uuid.uuid4()), user_id="bench-user", transaction_id=str(uuid.uuid4()),
+                           initial_balance=Decimal("0"), timestamp=timestamp),
+        WalletFundedEvent(wallet_id=str(uuid.uuid4()), user_id="bench-user", transaction_id=str(uuid.uuid4()),
+                          amount=Decimal("10.0000"), new_balance=Decimal("110.0000"), timestamp=timestamp),
+        TransferCompletedEvent(from_wallet_id=str(uuid.uuid4()), to_wallet_id=str(uuid.uuid4()),
+                               from_user_id="bench-user", to_user_id="bench-user", amount=Decimal("12.3400"),
+                               from_transaction_id=str(uuid.uuid4()), to_transaction_id=str(uuid.uuid4()),
+                               timestamp=timestamp),
+        TransferFailedEvent(from_wallet_id=str(uuid.uuid4()), from_user_id="bench-user",
+                            to_wallet_id=str(uuid.uuid4()), amount=Decimal("500.0000"),
+                            reason="Insufficient balance", timestamp=timestamp),
+    ]
+
+
+def _per_call_us(func, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return round((time.perf_counter() - started) / iterations * 1e6, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    results = []
+    for event in _sample_events():
+        model = EVENT_MODELS[event.event_type]
+        as_json = dumps(event)
+        as_binary = encode_event(event)
+        assert decode_event(as_binary) == event
+        for name, payload, encode, decode in (
+            ("json", as_json, lambda: dumps(event), lambda: model.model_validate_json(as_json)),
+            ("binary", as_binary, lambda: encode_event(event), lambda: decode_event(as_binary)),
+        ):
+            results.append({
+                "event_type": event.event_type.value,
+                "format": name,
+                "bytes": len(payload),
+                "encode_us": _per_call_us(encode, args.iterations),
+                "decode_us": _per_call_us(decode, args.iterations),
+            })
+            row = results[-1]
+            print(f"{row['event_type']:>20} {name:>7}: {row['bytes']:>4} bytes  "
+                  f"encode {row['encode_us']:>7}us  decode {row['decode_us']:>7}us")
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
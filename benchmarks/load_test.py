@@ -0,0 +1,272 @@
+"""Open-loop load test of the wallet and history APIs.
+
+Operations arrive as a Poisson process at ``--rate`` per second regardless of
+how fast the services answer, so a slow service builds a queue instead of
+quietly lowering the offered load. Latency is measured from each operation's
+scheduled start, which keeps queueing delay in the percentiles.
+
+    python -m benchmarks.load_test --rate 200 --duration 60 \
+        --mix create=1,fund=4,transfer=4,history=1 --hot-fraction 0.3 --out run.json
+
+Funds and transfers pick the hot wallet with probability ``--hot-fraction``.
+Separate lag probes fund fresh wallets and poll history-service until the
+event shows up, measuring end-to-end outbox -> Kafka -> history lag. The
+report is JSON, and ``--seed`` makes the operation sequence repeatable.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+from tests.constants import WALLET_SERVICE_URL, HISTORY_SERVICE_URL
+
+
+OPERATIONS = ("create", "fund", "transfer", "history")
+
+
+def _parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation {name!r}, expected one of {OPERATIONS}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def _latency_summary(seconds: List[float]) -> dict:
+    if not seconds:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    ordered = sorted(seconds)
+    # quantiles() needs two points; with one, every percentile is that point
+    cuts = statistics.quantiles(ordered, n=100, method="inclusive") if len(ordered) > 1 else ordered * 99
+    return {
+        "p50_ms": round(cuts[49] * 1000, 2),
+        "p95_ms": round(cuts[94] * 1000, 2),
+        "p99_ms": round(cuts[98] * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+class LoadTest:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.user_id = f"load-user-{uuid.uuid4()}"
+        self.wallet_ids: List[str] = []
+        self.hot_wallet_id: Optional[str] = None
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.lags: List[float] = []
+        self.lag_probes = 0
+        self.dropped = 0
+        self.in_flight = 0
+
+    async def _setup(self, wallet: httpx.AsyncClient) -> None:
+        for index in range(self.args.wallets):
+            shards = self.args.hot_shards if index == 0 else 0
+            response = await wallet.post("/wallets", json={"user_id": self.user_id, "balance_shards": shards})
+            response.raise_for_status()
+            wallet_id = response.json()["id"]
+            response = await wallet.post(f"/wallets/{wallet_id}/fund", json={"amount": "1000000.00"})
+            response.raise_for_status()
+            self.wallet_ids.append(wallet_id)
+        self.hot_wallet_id = self.wallet_ids[0]
+
+    def _pick_wallet(self) -> str:
+        if self.rng.random() < self.args.hot_fraction:
+            return self.hot_wallet_id
+        return self.rng.choice(self.wallet_ids)
+
+    def _request(self, operation: str):
+        """Method, client name, path and body for one operation, drawn from the seeded RNG."""
+        if operation == "create":
+            return "POST", "wallet", "/wallets", {"user_id": self.user_id}
+        if operation == "fund":
+            return "POST", "wallet", f"/wallets/{self._pick_wallet()}/fund", {"amount": "1.00"}
+        if operation == "transfer":
+            to_id = self._pick_wallet()
+            from_id = self.rng.choice([w for w in self.wallet_ids if w != to_id] or self.wallet_ids)
+            return "POST", "wallet", f"/wallets/{from_id}/transfer", {"to_wallet_id": to_id, "amount": "0.01"}
+        return "GET", "history", f"/history/wallets/{self.rng.choice(self.wallet_ids)}", None
+
+    async def _run_operation(self, operation: str, request: tuple, scheduled: float,
+                             clients: Dict[str, httpx.AsyncClient]) -> None:
+        method, client, path, body = request
+        try:
+            response = await clients[client].request(method, path, json=body)
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        finally:
+            self.in_flight -= 1
+        self.latencies[operation].append(time.perf_counter() - scheduled)
+        self.statuses[operation][status] += 1
+
+    async def _probe_lag(self, wallet: httpx.AsyncClient, history: httpx.AsyncClient) -> None:
+        self.lag_probes += 1
+        try:
+            response = await wallet.post("/wallets", json={"user_id": self.user_id})
+            response.raise_for_status()
+            wallet_id = response.json()["id"]
+            response = await wallet.post(f"/wallets/{wallet_id}/fund", json={"amount": "1.00"})
+            response.raise_for_status()
+        except httpx.HTTPError:
+            return
+        committed = time.perf_counter()
+
+        deadline = committed + self.args.lag_timeout
+        while time.perf_counter() < deadline:
+            try:
+                response = await history.get(f"/history/wallets/{wallet_id}")
+                # WALLET_CREATED and WALLET_FUNDED
+                if response.status_code == 200 and response.json()["total"] >= 2:
+                    self.lags.append(time.perf_counter() - committed)
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(self.args.lag_poll_ms / 1000)
+
+    async def run(self) -> dict:
+        args = self.args
+        operations = list(args.mix)
+        weights = [args.mix[name] for name in operations]
+        limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+
+        async with httpx.AsyncClient(base_url=args.wallet_url, timeout=args.timeout, limits=limits) as wallet, \
+                httpx.AsyncClient(base_url=args.history_url, timeout=args.timeout, limits=limits) as history:
+            clients = {"wallet": wallet, "history": history}
+            await self._setup(wallet)
+
+            tasks = set()
+            started = time.perf_counter()
+            end = started + args.duration
+            next_arrival = started
+            next_probe = started
+            while next_arrival < end:
+                now = time.perf_counter()
+                if next_arrival > now:
+                    await asyncio.sleep(next_arrival - now)
+
+                if args.lag_probe_interval > 0 and next_arrival >= next_probe:
+                    tasks.add(asyncio.create_task(self._probe_lag(wallet, history)))
+                    next_probe += args.lag_probe_interval
+
+                # Every draw happens here, in arrival order, so a seed replays the same run
+                operation = self.rng.choices(operations, weights)[0]
+                request = self._request(operation)
+                if self.in_flight >= args.max_in_flight:
+                    # Open loop: shed the arrival rather than delay the schedule
+                    self.dropped += 1
+                else:
+                    self.in_flight += 1
+                    task = asyncio.create_task(self._run_operation(operation, request, next_arrival, clients))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                next_arrival += self.rng.expovariate(args.rate)
+
+            issued_for = time.perf_counter() - started
+            await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - started
+
+        return self._report(issued_for, elapsed)
+
+    def _report(self, issued_for: float, elapsed: float) -> dict:
+        per_operation = {}
+        all_latencies, total, errors, conflicts = [], 0, 0, 0
+        for operation, latencies in self.latencies.items():
+            statuses = self.statuses[operation]
+            count = sum(statuses.values())
+            failed = sum(n for status, n in statuses.items() if not status.startswith("2"))
+            conflicted = statuses.get("409", 0)
+            per_operation[operation] = {
+                "count": count,
+                "throughput_rps": round(count / elapsed, 1),
+                "error_rate": round(failed / count, 4),
+                "conflict_rate": round(conflicted / count, 4),
+                "statuses": dict(statuses),
+                **_latency_summary(latencies),
+            }
+            all_latencies.extend(latencies)
+            total += count
+            errors += failed
+            conflicts += conflicted
+
+        return {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "config": {
+                "wallet_url": self.args.wallet_url,
+                "history_url": self.args.history_url,
+                "rate": self.args.rate,
+                "duration_s": self.args.duration,
+                "mix": self.args.mix,
+                "wallets": self.args.wallets,
+                "hot_fraction": self.args.hot_fraction,
+                "hot_shards": self.args.hot_shards,
+                "max_in_flight": self.args.max_in_flight,
+                "seed": self.args.seed,
+            },
+            "offered_rps": round((total + self.dropped) / issued_for, 1),
+            "throughput_rps": round(total / elapsed, 1),
+            "elapsed_s": round(elapsed, 3),
+            "requests": total,
+            "dropped": self.dropped,
+            "error_rate": round(errors / total, 4) if total else None,
+            "conflict_rate": round(conflicts / total, 4) if total else None,
+            "latency": _latency_summary(all_latencies),
+            "operations": per_operation,
+            "event_lag": {
+                "probes": self.lag_probes,
+                "observed": len(self.lags),
+                **_latency_summary(self.lags),
+            },
+        }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wallet-url", default=WALLET_SERVICE_URL)
+    parser.add_argument("--history-url", default=HISTORY_SERVICE_URL)
+    parser.add_argument("--rate", type=float, default=100.0, help="Mean operations started per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to issue operations for")
+    parser.add_argument("--mix", type=_parse_mix, default=_parse_mix("create=1,fund=4,transfer=4,history=1"),
+                        help="Comma-separated OPERATION=WEIGHT pairs")
+    parser.add_argument("--wallets", type=int, default=50, help="Wallets funds and transfers draw from")
+    parser.add_argument("--hot-fraction", type=float, default=0.0,
+                        help="Share of funds and transfers aimed at one hot wallet")
+    parser.add_argument("--hot-shards", type=int, default=0, help="balance_shards of the hot wallet")
+    parser.add_argument("--max-in-flight", type=int, default=512,
+                        help="Arrivals beyond this many outstanding requests are dropped and counted")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--lag-probe-interval", type=float, default=1.0,
+                        help="Seconds between event lag probes (0 disables them)")
+    parser.add_argument("--lag-poll-ms", type=float, default=20.0)
+    parser.add_argument("--lag-timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = await LoadTest(args).run()
+    print(
+        f"{report['throughput_rps']} req/s of {report['offered_rps']} offered  "
+        f"p50 {report['latency']['p50_ms']}ms  p99 {report['latency']['p99_ms']}ms  "
+        f"errors {report['error_rate']}  409s {report['conflict_rate']}  "
+        f"event lag p99 {report['event_lag']['p99_ms']}ms"
+    )
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
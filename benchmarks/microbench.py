@@ -0,0 +1,299 @@
+"""CPU cost of the schema validation and event serialization hot paths.
+
+Each case runs one path in isolation, with no database or broker:
+
+    python -m benchmarks.microbench                    # compare with the stored baseline
+    python -m benchmarks.microbench --save-baseline    # record a new baseline
+    python -m benchmarks.microbench --case event_ --threshold 0.05
+
+A case reports the best and the median of ``--repeat`` timed runs per call.
+It is compared on the best run, which background load can only slow down,
+not speed up. It regresses when that is more than ``--threshold`` slower
+than its baseline, or more than the spread between best and median seen in
+the baseline and this run if that noise band is wider. Any regression makes
+the exit status 1.
+
+Baselines depend on the machine. Against one recorded elsewhere (a CI
+runner, say) every case is first scaled by the median speed ratio of all
+measured cases, so a case is flagged for getting slower relative to the
+others. That needs at least ``MIN_SCALING_CASES`` cases in common; with
+fewer the run fails with exit status 2 instead of passing unchecked.
+``--ignore-machine`` compares raw timings. A missing baseline also exits 2.
+
+wallet-service and history-service both ship a top-level ``app`` package, so
+each service's cases run in their own interpreter.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE = Path(__file__).resolve().parent / "baselines" / "microbench.json"
+GROUPS = ("shared", "wallet", "history")
+HISTORY_PAGE_EVENTS = 1000
+MIN_SCALING_CASES = 5
+
+
+def _use_service(name: str) -> None:
+    sys.path.insert(0, str(ROOT / name))
+    os.environ.setdefault("KAFKA_BROKER", "unused:9092")
+    for var in ("POSTGRES_USER", "POSTGRES_PASSWORD", "POSTGRES_DB"):
+        os.environ.setdefault(var, "unused")
+
+
+def _events():
+    from shared.schemas import TransferCompletedEvent, WalletFundedEvent
+    transfer = TransferCompletedEvent(
+        from_wallet_id=str(uuid.uuid4()),
+        to_wallet_id=str(uuid.uuid4()),
+        from_user_id="bench-user",
+        to_user_id="bench-user",
+        amount=Decimal("12.3400"),
+        from_transaction_id=str(uuid.uuid4()),
+        to_transaction_id=str(uuid.uuid4()),
+        timestamp=datetime(2025, 1, 1, 12, 0, 0),
+    )
+    funded = WalletFundedEvent(
+        wallet_id=str(uuid.uuid4()),
+        user_id="bench-user",
+        transaction_id=str(uuid.uuid4()),
+        amount=Decimal("10.0000"),
+        new_balance=Decimal("110.0000"),
+        timestamp=datetime(2025, 1, 1, 12, 0, 0),
+    )
+    return transfer, funded
+
+
+def shared_cases() -> Dict[str, Callable[[], object]]:
+    from shared.event_codec import decode_event, encode_event
+    from shared.schemas import TransferCompletedEvent
+    transfer, _ = _events()
+    payload = transfer.model_dump_json()
+    binary = encode_event(transfer)
+    return {
+        "event_model_dump_json": transfer.model_dump_json,
+        "event_model_dump_python_json": lambda: transfer.model_dump(mode="json"),
+        "event_model_validate_json": lambda: TransferCompletedEvent.model_validate_json(payload),
+        "event_encode_binary": lambda: encode_event(transfer),
+        "event_decode_binary": lambda: decode_event(binary),
+    }
+
+
+def wallet_cases() -> Dict[str, Callable[[], object]]:
+    _use_service("wallet-service")
+    from app.models import Wallet
+    from app.schemas import FundWalletRequest, TransferRequest, WalletResponse
+    from app.services.kafka_producer_service import KafkaProducerService
+
+    transfer, funded = _events()
+    wallet = Wallet(id=str(uuid.uuid4()), user_id="bench-user", balance=Decimal("110.0000"), version=3)
+    producer = KafkaProducerService()
+    fund_body = b'{"amount": "12.34"}'
+    transfer_body = {"to_wallet_id": str(uuid.uuid4()), "amount": "12.34"}
+    return {
+        # AmountValidationMixin runs on both request models
+        "fund_request_validate_json": lambda: FundWalletRequest.model_validate_json(fund_body),
+        "transfer_request_validate": lambda: TransferRequest.model_validate(transfer_body),
+        "wallet_response_from_orm": lambda: WalletResponse.model_validate(wallet),
+        "wallet_response_dump_json": WalletResponse.model_validate(wallet).model_dump_json,
+        # What the producer does per relayed event, keys included
+        "producer_messages_transfer": lambda: producer._messages([transfer]),
+        "producer_messages_funded": lambda: producer._messages([funded]),
+    }
+
+
+def history_cases() -> Dict[str, Callable[[], object]]:
+    _use_service("history-service")
+    from starlette.responses import JSONResponse
+    from app.schemas import WalletHistoryResponse
+    from app.services.consumer_service import decode_message
+    from shared.event_codec import BINARY_CONTENT_TYPE, CONTENT_TYPE_HEADER, encode_event
+    from shared.serialization import ORJSONResponse
+
+    transfer, funded = _events()
+    transfer_bytes = transfer.model_dump_json().encode("utf-8")
+    funded_bytes = funded.model_dump_json().encode("utf-8")
+    transfer_binary = encode_event(transfer)
+    binary_headers = [(CONTENT_TYPE_HEADER, BINARY_CONTENT_TYPE)]
+
+    # A large history page as FastAPI hands it to the response class
+    page = WalletHistoryResponse(
+        wallet_id=str(uuid.uuid4()),
+        events=[
+            {
+                "wallet_id": transfer.from_wallet_id,
+                "user_id": transfer.from_user_id,
+                "amount": transfer.amount,
+                "event_type": transfer.event_type.value,
+                "event_data": transfer.model_dump(mode="json"),
+            }
+            for _ in range(HISTORY_PAGE_EVENTS)
+        ],
+        total=HISTORY_PAGE_EVENTS,
+        limit=HISTORY_PAGE_EVENTS,
+        offset=0,
+    ).model_dump(mode="json")
+
+    return {
+        # Consumer decode, then the event_data both ledger rows share
+        "consume_transfer_event_shared_data": lambda: decode_message(transfer_bytes, None).model_dump(mode="json"),
+        "consume_funded_event": lambda: decode_message(funded_bytes, None).model_dump(mode="json"),
+        "deserialize_transfer_event": lambda: decode_message(transfer_bytes, None),
+        "deserialize_transfer_event_binary": lambda: decode_message(transfer_binary, binary_headers),
+        "history_page_render_stdlib_json": lambda: JSONResponse(page),
+        "history_page_render_orjson": lambda: ORJSONResponse(page),
+    }
+
+
+CASES = {"shared": shared_cases, "wallet": wallet_cases, "history": history_cases}
+
+
+def measure(func: Callable[[], object], repeat: int, target_seconds: float) -> dict:
+    # Calibrate so each repeat runs for about target_seconds
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= target_seconds / 10:
+            break
+        loops *= 2
+    loops = max(1, int(loops * target_seconds / elapsed))
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        timings.append((time.perf_counter() - started) / loops)
+    timings.sort()
+    return {
+        "best_us": round(timings[0] * 1e6, 3),
+        "median_us": round(timings[len(timings) // 2] * 1e6, 3),
+        "loops": loops,
+    }
+
+
+def run_group(group: str, pattern: str, repeat: int, target_seconds: float) -> Dict[str, dict]:
+    cases = CASES[group]()
+    return {
+        f"{group}.{name}": measure(func, repeat, target_seconds)
+        for name, func in cases.items()
+        if pattern in f"{group}.{name}"
+    }
+
+
+def _run_isolated(group: str, args: argparse.Namespace) -> Dict[str, dict]:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.microbench", "--group", group,
+         "--case", args.case, "--repeat", str(args.repeat), "--target-seconds", str(args.target_seconds)],
+        cwd=ROOT, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def _machine() -> dict:
+    return {"python": platform.python_version(), "platform": platform.platform(), "processor": platform.machine()}
+
+
+def _noise(result: dict) -> float:
+    return result["median_us"] / result["best_us"] - 1
+
+
+def compare(results: Dict[str, dict], baseline: dict, threshold: float, scale: float = 1.0) -> list:
+    """Names of the cases slower than ``scale`` times their baseline by more than the allowance."""
+    regressions = []
+    for name, result in results.items():
+        before = baseline["cases"].get(name)
+        if before is None:
+            print(f"{name:<45} {result['best_us']:>10.3f}us  (no baseline)")
+            continue
+        expected = before["best_us"] * scale
+        change = result["best_us"] / expected - 1
+        allowed = max(threshold, _noise(before) + _noise(result))
+        flag = "REGRESSION" if change > allowed else ""
+        print(f"{name:<45} {result['best_us']:>10.3f}us  baseline {expected:>10.3f}us  "
+              f"{change:+7.1%} (allowed {allowed:.0%}) {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def _machine_scale(results: Dict[str, dict], baseline: dict) -> Optional[float]:
+    """Median ratio of this run to the baseline over the shared cases, or None with too few."""
+    ratios = sorted(
+        result["best_us"] / baseline["cases"][name]["best_us"]
+        for name, result in results.items()
+        if name in baseline["cases"]
+    )
+    if len(ratios) < MIN_SCALING_CASES:
+        return None
+    return ratios[len(ratios) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--case", default="", help="Only run cases whose group.name contains this")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--target-seconds", type=float, default=0.2, help="Approximate duration of one repeat")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown before a case regresses")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--ignore-machine", action="store_true",
+                        help="Compare even with a baseline recorded on another machine")
+    parser.add_argument("--group", choices=GROUPS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.group:
+        results = run_group(args.group, args.case, args.repeat, args.target_seconds)
+        print(json.dumps(results))
+        return
+
+    results = {}
+    for group in GROUPS:
+        results.update(_run_isolated(group, args))
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        previous = json.loads(args.baseline.read_text())["cases"] if args.baseline.exists() else {}
+        # A filtered run only replaces the cases it measured
+        baseline = {"machine": _machine(), "cases": {**previous, **results}}
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"Saved {len(results)} cases to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(json.dumps(results, indent=2))
+        print(f"ERROR: no baseline at {args.baseline}; record one with --save-baseline")
+        sys.exit(2)
+
+    baseline = json.loads(args.baseline.read_text())
+    scale = 1.0
+    if baseline.get("machine") != _machine() and not args.ignore_machine:
+        scale = _machine_scale(results, baseline)
+        if scale is None:
+            print(f"ERROR: baseline was recorded on {baseline.get('machine')}, this is {_machine()}, and fewer "
+                  f"than {MIN_SCALING_CASES} cases are shared to scale it; record one here with --save-baseline "
+                  f"or pass --ignore-machine")
+            sys.exit(2)
+        print(f"WARNING: baseline was recorded on {baseline.get('machine')}, this is {_machine()}; "
+              f"comparing against it scaled by this machine's median speed ratio {scale:.2f}x")
+    regressions = compare(results, baseline, args.threshold, scale)
+    if regressions:
+        print(f"{len(regressions)} case(s) slower than baseline by more than {args.threshold:.0%} and their noise band")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Events per second through KafkaProducerService for each producer mode.
+
+Needs a reachable broker (KAFKA_BROKER, default localhost:9093 from docker-compose):
+
+    python -m benchmarks.producer_throughput --events 20000 --concurrency 64
+
+Half the events are transfers, which publish once per wallet key like in production.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "wallet-service"))
+os.environ.setdefault("KAFKA_BROKER", "localhost:9093")
+for name in ("POSTGRES_USER", "POSTGRES_PASSWORD", "POSTGRES_DB"):
+    os.environ.setdefault(name, "unused")
+
+from app.services.kafka_producer_service import KafkaProducerService  # noqa: E402
+from shared.schemas import TransferCompletedEvent, WalletFundedEvent  # noqa: E402
+
+
+def _make_events(count: int) -> list:
+    events = []
+    for i in range(count):
+        if i % 2:
+            events.append(TransferCompletedEvent(
+                from_wallet_id=str(uuid.uuid4()),
+                to_wallet_id=str(uuid.uuid4()),
+                from_user_id="bench-user",
+                to_user_id="bench-user",
+                amount=Decimal("12.3400"),
+                from_transaction_id=str(uuid.uuid4()),
+                to_transaction_id=str(uuid.uuid4()),
+            ))
+        else:
+            events.append(WalletFundedEvent(
+                wallet_id=str(uuid.uuid4()),
+                user_id="bench-user",
+                transaction_id=str(uuid.uuid4()),
+                amount=Decimal("10.0000"),
+                new_balance=Decimal("110.0000"),
+            ))
+    return events
+
+
+async def run_mode(mode: str, events: list, concurrency: int, batch_size: int) -> dict:
+    service = KafkaProducerService()
+    service.mode = mode
+    await service.start()
+    try:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def publish(chunk):
+            async with semaphore:
+                if batch_size == 1:
+                    await service.publish_event(chunk[0])
+                else:
+                    await service.publish_events(chunk)
+
+        chunks = [events[i:i + batch_size] for i in range(0, len(events), batch_size)]
+        started = time.perf_counter()
+        await asyncio.gather(*(publish(chunk) for chunk in chunks))
+        elapsed = time.perf_counter() - started
+    finally:
+        await service.stop()
+
+    return {
+        "mode": mode,
+        "events": len(events),
+        "batch_size": batch_size,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "events_per_s": round(len(events) / elapsed, 1),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="events per publish call; >1 exercises publish_events like the outbox relay")
+    parser.add_argument("--mode", action="append", choices=["sequential", "pipelined"])
+    args = parser.parse_args()
+
+    events = _make_events(args.events)
+    results = []
+    for mode in args.mode or ["sequential", "pipelined"]:
+        result = await run_mode(mode, events, args.concurrency, args.batch_size)
+        print(f"{mode:>10}: {result['events_per_s']:>10} events/s")
+        results.append(result)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
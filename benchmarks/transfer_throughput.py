@@ -0,0 +1,107 @@
+"""Concurrent transfer throughput against one or more running wallet-service builds.
+
+Point each ``--target`` at a single-worker uvicorn instance, e.g. the sync build
+on one port and the async build on another, and compare the results side by side:
+
+    python -m benchmarks.transfer_throughput \
+        --target sync=http://localhost:8010 --target async=http://localhost:8000
+
+A small wallet pool keeps ``SELECT ... FOR UPDATE`` contended, which is where a
+blocking driver stalls the event loop for every other in-flight request.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import uuid
+from decimal import Decimal
+
+import httpx
+
+from tests.constants import WALLET_SERVICE_URL
+
+
+async def _setup_wallets(client: httpx.AsyncClient, count: int, funding: Decimal) -> list[str]:
+    user_id = f"bench-user-{uuid.uuid4()}"
+    wallet_ids = []
+    for _ in range(count):
+        response = await client.post("/wallets", json={"user_id": user_id})
+        response.raise_for_status()
+        wallet_id = response.json()["id"]
+        response = await client.post(f"/wallets/{wallet_id}/fund", json={"amount": str(funding)})
+        response.raise_for_status()
+        wallet_ids.append(wallet_id)
+    return wallet_ids
+
+
+async def run_target(name: str, url: str, wallets: int, transfers: int, concurrency: int) -> dict:
+    async with httpx.AsyncClient(base_url=url, timeout=60.0) as client:
+        wallet_ids = await _setup_wallets(client, wallets, Decimal("1000000"))
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies: list[float] = []
+        errors = 0
+
+        async def transfer():
+            nonlocal errors
+            from_id, to_id = random.sample(wallet_ids, 2)
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(
+                    f"/wallets/{from_id}/transfer",
+                    json={"to_wallet_id": to_id, "amount": "1.00"},
+                )
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(transfer() for _ in range(transfers)))
+        elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "target": name,
+        "url": url,
+        "transfers": transfers,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(transfers / elapsed, 1),
+        "p50_ms": round(quantiles[49] * 1000, 2),
+        "p99_ms": round(quantiles[98] * 1000, 2),
+        "errors": errors,
+    }
+
+
+def _parse_target(value: str) -> tuple[str, str]:
+    name, sep, url = value.partition("=")
+    if not sep:
+        return value, value
+    return name, url
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", action="append", type=_parse_target,
+                        help="NAME=URL of a wallet-service instance (repeatable)")
+    parser.add_argument("--wallets", type=int, default=8)
+    parser.add_argument("--transfers", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    targets = args.target or [("default", WALLET_SERVICE_URL)]
+    results = []
+    for name, url in targets:
+        result = await run_target(name, url, args.wallets, args.transfers, args.concurrency)
+        print(
+            f"{name:>10}: {result['throughput_rps']:>8} transfers/s  "
+            f"p50 {result['p50_ms']}ms  p99 {result['p99_ms']}ms  errors {result['errors']}"
+        )
+        results.append(result)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
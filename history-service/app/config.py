@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
+from typing import Literal, Optional
 
 
 class Settings(BaseSettings):
@@ -9,9 +10,55 @@ class Settings(BaseSettings):
     postgres_host: str = "localhost"
     postgres_port: int = 5432
 
+    # Connection pool; db_pool_size <= 0 opens a connection per checkout (NullPool)
+    db_pool_size: int = 5
+    db_max_overflow: int = 5
+    db_pool_timeout_seconds: float = 30.0
+    db_pool_recycle_seconds: int = 1800
+    db_pool_pre_ping: bool = True
+    # Behind PgBouncer in transaction mode: no reuse of named prepared statements
+    db_pgbouncer_transaction_mode: bool = False
+
     kafka_broker: str
     kafka_topic: str = "wallet_events"
     kafka_consumer_group: str = "history-service-group"
+    # Messages are fetched with getmany() and recorded with one INSERT per batch
+    kafka_consume_batch_size: int = 500
+    kafka_consume_max_wait_ms: int = 100
+    # Each assigned partition has its own worker; fetching pauses once this many batches wait for it
+    kafka_partition_max_pending_batches: int = 2
+    # Consumer DB work runs on its own threads, one per partition with a batch running.
+    # 0 caps them at db_pool_size so reads keep the overflow connections; > 0 sets the cap
+    consumer_db_threads: int = 0
+    # Batches queued or running across all partitions before every partition is paused
+    consumer_max_in_flight_batches: int = 8
+    # Failed batches are retried with exponential backoff and jitter
+    consumer_retry_backoff_ms: int = 500
+    consumer_retry_backoff_max_ms: int = 30000
+    # Background reconciliation of history_counters with transaction_events (0 disables)
+    counter_repair_interval_seconds: int = 3600
+    counter_repair_chunk_size: int = 500
+    # Monthly transaction_events partitions are created this far ahead
+    partition_maintenance_interval_seconds: int = 3600
+    history_partition_months_ahead: int = 3
+    # Partitions that ended this many months ago are detached or dropped whole (0 keeps everything)
+    history_retention_months: int = 0
+    history_retention_action: Literal["detach", "drop"] = "detach"
+    history_retention_purge_batch_size: int = 5000
+    # Streaming exports: rows fetched per server-side cursor batch and bytes per response chunk
+    export_batch_size: int = 1000
+    export_chunk_bytes: int = 65536
+    # Each export holds a pool connection and a transaction for its whole response; keep below db_pool_size
+    export_max_concurrent: int = 3
+    # Recently recorded transaction ids kept in memory to skip duplicate deliveries (0 disables)
+    dedup_cache_size: int = 100000
+
+    # On-demand request profiling: send "X-Profile: <profiling_token>" or set a sample rate
+    profiling_token: Optional[str] = None
+    profiling_sample_rate: float = 0.0
+    profiling_mode: Literal["sampling", "deterministic"] = "sampling"
+    profiling_interval_ms: float = 1.0
+    profiling_dir: str = "profiles"
 
     app_name: str = "History Service"
     debug: bool = True
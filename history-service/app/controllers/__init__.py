@@ -1,3 +1,5 @@
 from app.controllers.history_controller import router as history_router
+from app.controllers.pool_controller import router as pool_router
+from app.controllers.metrics_controller import router as metrics_router
 
-__all__ = ["history_router"]
\ No newline at end of file
+__all__ = ["history_router", "pool_router", "metrics_router"]
\ No newline at end of file
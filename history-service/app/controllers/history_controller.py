@@ -1,7 +1,10 @@
 from app.schemas import WalletHistoryResponse, UserActivityResponse
-from app.services import HistoryService
-from typing import Annotated
+from app.models import WALLET_SCOPE, USER_SCOPE
+from app.services import HistoryService, export_events, export_limiter
+from app.services.export_service import ExportFormat, MEDIA_TYPES
+from typing import Annotated, Optional
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from app.dependencies import get_history_service
 
 
@@ -13,16 +16,18 @@ async def get_wallet_history(
     wallet_id: str,
     service: Annotated[HistoryService, Depends(get_history_service)],
     limit: int = Query(50, ge=1, le=100),
-    offset: int = Query(0, ge=0)
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; replaces offset"),
 ):
-    events, total  = service.get_wallet_history(wallet_id, limit, offset)
+    events, total, next_cursor = service.get_wallet_history(wallet_id, limit, offset, cursor)
     
     return WalletHistoryResponse(
         wallet_id=wallet_id,
         events=events,
         total=total,
         limit=limit,
-        offset=offset
+        offset=offset,
+        next_cursor=next_cursor,
     )
 
 
@@ -32,8 +37,9 @@ async def get_user_activity(
     service: Annotated[HistoryService, Depends(get_history_service)],
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; replaces offset"),
 ):
-    events, total = service.get_user_activity(user_id, limit, offset)
+    events, total, next_cursor = service.get_user_activity(user_id, limit, offset, cursor)
     
     return UserActivityResponse(
         user_id=user_id,
@@ -41,4 +47,44 @@ async def get_user_activity(
         total=total,
         limit=limit,
         offset=offset,
-    )
\ No newline at end of file
+        next_cursor=next_cursor,
+    )
+
+
+class _ExportResponse(StreamingResponse):
+    async def __call__(self, scope, receive, send):
+        # Runs to the end whether the stream completes, fails or the client goes away
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            export_limiter.release()
+
+
+def _export_response(scope: str, key: str, export_format: ExportFormat, compress: bool) -> StreamingResponse:
+    headers = {"Content-Disposition": f'attachment; filename="{scope}-history.{export_format}"'}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    export_limiter.acquire()
+    return _ExportResponse(
+        export_events(scope, key, export_format, compress),
+        media_type=MEDIA_TYPES[export_format],
+        headers=headers,
+    )
+
+
+@router.get("/wallets/{wallet_id}/export")
+async def export_wallet_history(
+    wallet_id: str,
+    format: ExportFormat = Query("ndjson"),
+    gzip: bool = Query(False, description="Compress the stream (Content-Encoding: gzip)"),
+):
+    return _export_response(WALLET_SCOPE, wallet_id, format, gzip)
+
+
+@router.get("/users/{user_id}/export")
+async def export_user_activity(
+    user_id: str,
+    format: ExportFormat = Query("ndjson"),
+    gzip: bool = Query(False, description="Compress the stream (Content-Encoding: gzip)"),
+):
+    return _export_response(USER_SCOPE, user_id, format, gzip)
\ No newline at end of file
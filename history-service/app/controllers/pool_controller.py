@@ -0,0 +1,12 @@
+from app.database import engine
+from shared.db_pool import PoolStats, pool_stats
+from fastapi import APIRouter
+
+
+router = APIRouter(prefix="/pool", tags=["pool"])
+
+
+@router.get("/stats", response_model = PoolStats)
+async def get_pool_stats():
+    # Counters are per worker process
+    return pool_stats(engine.pool)
\ No newline at end of file
@@ -2,13 +2,17 @@ from typing import Generator
 from sqlalchemy import create_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker, Session
 from app.config import get_settings
+from shared.db_pool import engine_options
+from shared.serialization import dumps_str, loads
 
 
 settings = get_settings()
 
 engine = create_engine(
     settings.database_url,
-    pool_pre_ping=True
+    json_serializer=dumps_str,
+    json_deserializer=loads,
+    **engine_options(settings, is_async=False),
 )
 
 SessionLocal = sessionmaker(autoflush=True, bind=engine)
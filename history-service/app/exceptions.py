@@ -0,0 +1,2 @@
+class ExportLimitError(Exception):
+    pass
\ No newline at end of file
@@ -1,11 +1,17 @@
-from app.controllers import history_router
-from app.services import kafka_consumer
+from app.controllers import history_router, pool_router, metrics_router
+from app.services import kafka_consumer, counter_repair, partition_maintenance
+from app.config import get_settings
+from app.database import engine
+from app.exceptions import ExportLimitError
+from shared.profiling import ProfilingMiddleware, instrument_engine
+from shared.pagination import InvalidCursorError
+from shared.serialization import ORJSONResponse
 from contextlib import asynccontextmanager
 import asyncio
 import logging
 
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 
@@ -16,15 +22,22 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     logger.info("Starting History Service...")
 
+    await partition_maintenance.start()
+
     await kafka_consumer.start()
     logger.info("Kafka consumer initialized")
 
     consumer_task = asyncio.create_task(kafka_consumer.consume_events())
     logger.info("Kafka consumer task started in background")
 
+    await counter_repair.start()
+
     yield 
     
     logger.info("Shutting down History Service...")
+
+    await counter_repair.stop()
+    await partition_maintenance.stop()
     
     await kafka_consumer.stop()
 
@@ -41,7 +54,10 @@ async def lifespan(app: FastAPI):
     logger.info("History Service shutdown complete")
 
 
-app = FastAPI(title="History Service",lifespan=lifespan)
+app = FastAPI(title="History Service",lifespan=lifespan, default_response_class=ORJSONResponse)
+
+instrument_engine(engine)
+app.add_middleware(ProfilingMiddleware, settings=get_settings())
 
 app.add_middleware(
     CORSMiddleware,
@@ -51,7 +67,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(InvalidCursorError)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursorError):
+    return ORJSONResponse(
+        status_code=400,
+        content={"detail": str(exc)}
+    )
+
+@app.exception_handler(ExportLimitError)
+async def export_limit_handler(request: Request, exc: ExportLimitError):
+    return ORJSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "5"},
+    )
+
 app.include_router(history_router)
+app.include_router(pool_router)
+app.include_router(metrics_router)
 
 @app.get("/")
 async def root():
@@ -0,0 +1,49 @@
+from shared.metrics import Counter, Histogram
+
+
+OPERATION_LATENCY = Histogram(
+    "history_service_operation_seconds",
+    "HistoryService method latency by outcome (ok or exception class)",
+    ["operation", "outcome"],
+)
+
+EVENTS_CONSUMED = Counter(
+    "history_service_events_consumed_total",
+    "Kafka messages handled by the consumer, by result",
+    ["result"],
+)
+
+CONSUMER_BATCH_SIZE = Histogram(
+    "history_service_consumer_batch_size",
+    "Messages per partition batch handed to a worker",
+    buckets=(1, 10, 50, 100, 250, 500, 1000, 2500),
+)
+
+DEDUP_CACHE_LOOKUPS = Counter(
+    "history_service_dedup_cache_lookups_total",
+    "Transaction ids checked against the recent-id cache before the database, by hit or miss",
+    ["result"],
+)
+
+COUNTERS_REPAIRED = Counter(
+    "history_service_counters_repaired_total",
+    "history_counters rows the repair job found out of step with transaction_events",
+    ["scope"],
+)
+
+PARTITION_CHANGES = Counter(
+    "history_service_partition_changes_total",
+    "transaction_events partitions created, detached or dropped by maintenance",
+    ["action"],
+)
+
+EVENTS_EXPORTED = Counter(
+    "history_service_events_exported_total",
+    "Events streamed by the export endpoints, by format",
+    ["format"],
+)
+
+CONSUMER_COMMIT_LATENCY = Histogram(
+    "history_service_consumer_commit_seconds",
+    "Time to commit consumer offsets to Kafka",
+)
\ No newline at end of file
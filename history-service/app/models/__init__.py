@@ -1,3 +1,5 @@
 from app.models.transaction_event import TransactionEvent
+from app.models.processed_transaction import ProcessedTransaction
+from app.models.history_counter import HistoryCounter, WALLET_SCOPE, USER_SCOPE
 
-__all__ = ["TransactionEvent"]
\ No newline at end of file
+__all__ = ["TransactionEvent", "ProcessedTransaction", "HistoryCounter", "WALLET_SCOPE", "USER_SCOPE"]
\ No newline at end of file
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, String, BigInteger, TIMESTAMP
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+WALLET_SCOPE = "wallet"
+USER_SCOPE = "user"
+
+
+class HistoryCounter(Base):
+    """Number of transaction_events rows per wallet or per user.
+
+    Incremented in the same transaction that inserts the events, so history
+    pages read their total here instead of counting every row.
+    """
+    __tablename__ = "history_counters"
+
+    scope = Column(String(10), primary_key=True)
+    key = Column(String(100), primary_key=True)
+    event_count = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<HistoryCounter(scope={self.scope}, key={self.key}, count={self.event_count})>"
\ No newline at end of file
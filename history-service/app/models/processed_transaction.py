@@ -0,0 +1,24 @@
+from sqlalchemy import Column, String, TIMESTAMP, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class ProcessedTransaction(Base):
+    """Every transaction_id recorded in transaction_events, for deduplication.
+
+    transaction_events is partitioned by month, so it cannot hold a unique
+    constraint on transaction_id; this narrow table does instead. A row is
+    claimed here in the same transaction that inserts the event.
+    """
+    __tablename__ = "processed_transactions"
+
+    transaction_id = Column(String(150), primary_key=True)
+    created_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # Retention purges the oldest ids in batches
+        Index('idx_processed_transactions_created_at', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f"<ProcessedTransaction(transaction_id={self.transaction_id})>"
\ No newline at end of file
@@ -13,15 +13,20 @@ class TransactionEvent(Base):
     user_id = Column(String(100), nullable=False)
     amount = Column(DECIMAL(19,4), nullable=False)
     event_type = Column(String(30), nullable=False)
-    transaction_id = Column(String(150), nullable=False,unique=True)
+    # Uniqueness lives in processed_transactions: a partitioned table cannot enforce it on this alone
+    transaction_id = Column(String(150), nullable=False)
     event_data = Column(JSONB)
 
-    created_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
+    # The partition key has to be part of the primary key
+    created_at = Column(TIMESTAMP, primary_key=True, server_default=func.now(), nullable=False)
 
     __table_args__ = (
-        Index('idx_transaction_event_wallet_id', 'wallet_id'),
-        Index('idx_transaction_event_user_id', 'user_id'),
+        # Keyset pagination of a wallet's or user's history, newest first; also serve plain lookups
+        Index('idx_transaction_event_wallet_created_id', 'wallet_id', created_at.desc(), 'id'),
+        Index('idx_transaction_event_user_created_id', 'user_id', created_at.desc(), 'id'),
         Index('idx_transaction_event_transaction_id', 'transaction_id'),
+        # Monthly partitions, created ahead of time by PartitionMaintenanceService
+        {'postgresql_partition_by': 'RANGE (created_at)'},
     )
 
 
@@ -1,3 +1,5 @@
 from app.repositories.history_repository import HistoryRepository
+from app.repositories.counter_repository import CounterRepository
+from app.repositories.partition_repository import PartitionRepository
 
-__all__ = ["HistoryRepository"]
\ No newline at end of file
+__all__ = ["HistoryRepository", "CounterRepository", "PartitionRepository"]
\ No newline at end of file
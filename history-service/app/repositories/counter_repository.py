@@ -0,0 +1,103 @@
+from collections import Counter
+from sqlalchemy import func, select, union, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from typing import Iterable, List, Optional, Tuple
+
+
+from app.models import HistoryCounter, TransactionEvent, WALLET_SCOPE, USER_SCOPE
+
+
+_SCOPE_COLUMNS = {
+    WALLET_SCOPE: TransactionEvent.wallet_id,
+    USER_SCOPE: TransactionEvent.user_id,
+}
+
+
+class CounterRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def increment_for(self, rows: Iterable[Tuple[str, str]]) -> None:
+        """Count newly inserted (wallet_id, user_id) event rows towards their wallet and user."""
+        counts = Counter()
+        for wallet_id, user_id in rows:
+            counts[(WALLET_SCOPE, wallet_id)] += 1
+            counts[(USER_SCOPE, user_id)] += 1
+        if not counts:
+            return
+        # Sorted so concurrent writers lock counter rows in the same order
+        values = [
+            {"scope": scope, "key": key, "event_count": count}
+            for (scope, key), count in sorted(counts.items())
+        ]
+        statement = insert(HistoryCounter).values(values)
+        self.db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[HistoryCounter.scope, HistoryCounter.key],
+                set_={
+                    "event_count": HistoryCounter.event_count + statement.excluded.event_count,
+                    "updated_at": func.now(),
+                },
+            )
+        )
+
+    def get_count(self, scope: str, key: str) -> int:
+        count = self.db.execute(
+            select(HistoryCounter.event_count).where(HistoryCounter.scope == scope, HistoryCounter.key == key)
+        ).scalar()
+        return count or 0
+
+    def repair_chunk(self, scope: str, after: Optional[str], limit: int) -> Tuple[Optional[str], int]:
+        """Reconcile the counters of up to ``limit`` keys following ``after`` with a real count.
+
+        Returns the last key examined (None once every key has been seen) and
+        how many counters were corrected. The counter rows are locked before
+        counting: a consumer transaction that already incremented has
+        committed by then and is counted, and one that has not will add its
+        increment on top of the corrected value.
+        """
+        column = _SCOPE_COLUMNS[scope]
+        event_keys = select(column.label("key")).group_by(column).order_by(column).limit(limit)
+        # Counters whose events were all retired with their partitions have no
+        # key left in transaction_events; walking the counters resets them too
+        counter_keys = (
+            select(HistoryCounter.key)
+            .where(HistoryCounter.scope == scope)
+            .order_by(HistoryCounter.key)
+            .limit(limit)
+        )
+        if after is not None:
+            event_keys = event_keys.where(column > after)
+            counter_keys = counter_keys.where(HistoryCounter.key > after)
+        both = union(event_keys, counter_keys).subquery()
+        query = select(both.c.key).order_by(both.c.key).limit(limit)
+        keys: List[str] = list(self.db.execute(query).scalars().all())
+        if not keys:
+            return None, 0
+
+        # One upsert creates missing counters and locks every counter, sorted
+        # in Python like increment_for rather than in the database collation.
+        # A separate insert then SELECT FOR UPDATE would hold the new rows while
+        # waiting for older ones, and deadlock with a consumer batch holding one
+        statement = insert(HistoryCounter).values(
+            [{"scope": scope, "key": key, "event_count": 0} for key in sorted(keys)]
+        )
+        counters = dict(self.db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[HistoryCounter.scope, HistoryCounter.key],
+                set_={"event_count": HistoryCounter.event_count},
+            ).returning(HistoryCounter.key, HistoryCounter.event_count)
+        ).all())
+        actual = dict(self.db.execute(
+            select(column, func.count()).where(column.in_(keys)).group_by(column)
+        ).all())
+
+        corrections = [
+            {"scope": scope, "key": key, "event_count": actual.get(key, 0)}
+            for key, count in sorted(counters.items())
+            if count != actual.get(key, 0)
+        ]
+        if corrections:
+            self.db.execute(update(HistoryCounter), corrections)
+        return keys[-1], len(corrections)
\ No newline at end of file
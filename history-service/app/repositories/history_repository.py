@@ -1,57 +1,110 @@
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import Row, or_, select
 from sqlalchemy.orm import Session
-from typing import List
-from decimal import Decimal
+from typing import Iterator, List, Optional
+from datetime import datetime
 
 
-from app.models import TransactionEvent
+from app.models import TransactionEvent, ProcessedTransaction
+
+
+EXPORT_COLUMNS = (
+    TransactionEvent.id,
+    TransactionEvent.created_at,
+    TransactionEvent.wallet_id,
+    TransactionEvent.user_id,
+    TransactionEvent.event_type,
+    TransactionEvent.amount,
+    TransactionEvent.transaction_id,
+    TransactionEvent.event_data,
+)
 
 
 class HistoryRepository:
     def __init__(self, db: Session):
         self.db = db
 
-    def create_event(self, wallet_id: str, user_id: str, amount: Decimal, event_type: str, transaction_id: str, event_data: dict) -> TransactionEvent:
-        event = TransactionEvent(
-            wallet_id=wallet_id,
-            user_id=user_id,
-            amount=amount,
-            event_type=event_type,
-            transaction_id=transaction_id,
-            event_data=event_data
+    def insert_events(self, rows: List[dict]) -> List[tuple[str, str]]:
+        """Insert ``rows``, skipping transaction_ids already recorded.
+
+        The ids are claimed in processed_transactions with ON CONFLICT DO
+        NOTHING first; only the rows whose id was claimed go into
+        transaction_events. Returns (wallet_id, user_id) of those rows.
+        """
+        if not rows:
+            return []
+        claimed = set(self.db.execute(
+            insert(ProcessedTransaction)
+            .values([{"transaction_id": row["transaction_id"]} for row in rows])
+            .on_conflict_do_nothing(index_elements=[ProcessedTransaction.transaction_id])
+            .returning(ProcessedTransaction.transaction_id)
+        ).scalars().all())
+        fresh = [row for row in rows if row["transaction_id"] in claimed]
+        if not fresh:
+            return []
+        statement = (
+            insert(TransactionEvent)
+            .values(fresh)
+            .returning(TransactionEvent.wallet_id, TransactionEvent.user_id)
         )
-        self.db.add(event)
-        self.db.flush()
-        return event
-    
-    def event_exists(self, transaction_id: str) -> bool:
-        return self.db.query(TransactionEvent).filter(
-            TransactionEvent.transaction_id == transaction_id
-        ).first() is not None
-        
-    def events_exist(self, transaction_ids: List[str]) -> bool:
-        return self.db.query(TransactionEvent).filter(
-            TransactionEvent.transaction_id.in_(transaction_ids)
-        ).first() is not None
-    
-    def get_wallet_history(self, wallet_id: str, limit: int = 50, offset: int = 0) -> tuple[List[TransactionEvent], int]:
-        query = self.db.query(TransactionEvent).filter(TransactionEvent.wallet_id == wallet_id)
-        total = query.count()
+        return [tuple(row) for row in self.db.execute(statement).all()]
+
+    def _page(self, column, value: str, limit: int, offset: int,
+              after: Optional[tuple[datetime, str]]) -> List[TransactionEvent]:
+        """Events newest first, ordered by (created_at DESC, id).
+
+        ``after`` is the (created_at, id) of the last row of the previous page
+        and replaces ``offset``. Seeking past it walks the (column, created_at
+        DESC, id) index, so a page costs the same at any depth. Partitions are
+        read newest first and the scan stops once the page is full; a cursor's
+        created_at bound also prunes every partition after it.
+        """
+        query = self.db.query(TransactionEvent).filter(column == value)
+        if after:
+            created_at, event_id = after
+            # created_at <= bounds the index range scan; rows of one database
+            # transaction share created_at, so id breaks the tie within it
+            query = query.filter(
+                TransactionEvent.created_at <= created_at,
+                or_(TransactionEvent.created_at < created_at, TransactionEvent.id > event_id),
+            )
+        else:
+            query = query.offset(offset)
         events = (
-            query.order_by(TransactionEvent.created_at.desc())
+            query.order_by(TransactionEvent.created_at.desc(), TransactionEvent.id)
             .limit(limit)
-            .offset(offset)
             .all()
         )
-        return events, total
-        
+        return events
 
-    def get_user_activity(self, user_id: str, limit: int = 50, offset: int = 0) -> tuple[List[TransactionEvent], int]:
-        query = self.db.query(TransactionEvent).filter(TransactionEvent.user_id == user_id)
-        total = query.count()
-        events = (
-            query.order_by(TransactionEvent.created_at.desc())
-            .limit(limit)
-            .offset(offset)
-            .all()
+    def get_wallet_history(self, wallet_id: str, limit: int = 50, offset: int = 0,
+                           after: Optional[tuple[datetime, str]] = None) -> List[TransactionEvent]:
+        return self._page(TransactionEvent.wallet_id, wallet_id, limit, offset, after)
+
+    def get_user_activity(self, user_id: str, limit: int = 50, offset: int = 0,
+                          after: Optional[tuple[datetime, str]] = None) -> List[TransactionEvent]:
+        return self._page(TransactionEvent.user_id, user_id, limit, offset, after)
+
+    def _stream(self, column, value: str, batch_size: int) -> Iterator[Row]:
+        """Every event for ``value``, oldest first, as plain rows.
+
+        ``yield_per`` makes psycopg2 use a server-side cursor, so only
+        ``batch_size`` rows are held at a time. Columns rather than entities
+        keep the rows out of the session's identity map.
+        """
+        result = self.db.execute(
+            select(*EXPORT_COLUMNS)
+            .where(column == value)
+            .order_by(TransactionEvent.created_at, TransactionEvent.id)
+            .execution_options(yield_per=batch_size)
         )
-        return events, total
\ No newline at end of file
+        try:
+            yield from result
+        finally:
+            result.close()
+
+    def stream_wallet_history(self, wallet_id: str, batch_size: int = 1000) -> Iterator[Row]:
+        return self._stream(TransactionEvent.wallet_id, wallet_id, batch_size)
+
+    def stream_user_activity(self, user_id: str, batch_size: int = 1000) -> Iterator[Row]:
+        return self._stream(TransactionEvent.user_id, user_id, batch_size)
\ No newline at end of file
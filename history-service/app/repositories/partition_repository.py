@@ -0,0 +1,101 @@
+import re
+from datetime import date, datetime
+from sqlalchemy import delete, select, text
+from sqlalchemy.orm import Session
+from typing import List
+
+
+from app.models import ProcessedTransaction, TransactionEvent
+
+
+_PARENT = TransactionEvent.__tablename__
+_PARTITION_NAME = re.compile(rf"{_PARENT}_p(\d{{4}})(\d{{2}})")
+# Catches rows whose month has no partition yet; see create()
+_DEFAULT = f"{_PARENT}_default"
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{_PARENT}_p{month.year:04d}{month.month:02d}"
+
+
+class PartitionRepository:
+    """DDL for the monthly partitions of transaction_events."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def current_month(self) -> date:
+        # The database clock stamps created_at, so it decides which month is current
+        return self.db.execute(text("SELECT CAST(date_trunc('month', now()) AS date)")).scalar()
+
+    def list_months(self) -> List[date]:
+        """First day of the month of every attached partition, oldest first."""
+        names = self.db.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = CAST(:parent AS regclass)"
+            ),
+            {"parent": _PARENT},
+        ).scalars().all()
+        months = []
+        for name in names:
+            match = _PARTITION_NAME.fullmatch(name)
+            if match:
+                months.append(date(int(match.group(1)), int(match.group(2)), 1))
+        return sorted(months)
+
+    def default_months(self) -> List[date]:
+        """Months that have rows waiting in the DEFAULT partition, oldest first."""
+        return list(self.db.execute(text(
+            f"SELECT DISTINCT CAST(date_trunc('month', created_at) AS date) AS month FROM {_DEFAULT} ORDER BY month"
+        )).scalars().all())
+
+    def create(self, month: date) -> int:
+        """Create ``month``'s partition, moving its rows out of the DEFAULT partition.
+
+        A partition cannot be created while DEFAULT holds rows in its range,
+        so it is built detached, filled from DEFAULT and then attached.
+        Returns the rows moved.
+        """
+        # Identifiers are built from dates only, never from input
+        name = partition_name(month)
+        if self.db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar():
+            return 0
+        bounds = {"start": month, "end": add_months(month, 1)}
+        self.db.execute(text(f"CREATE TABLE {name} (LIKE {_PARENT} INCLUDING DEFAULTS)"))
+        moved = self.db.execute(text(
+            f"WITH moved AS (DELETE FROM {_DEFAULT} WHERE created_at >= :start AND created_at < :end RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ), bounds).rowcount
+        self.db.execute(text(
+            f"ALTER TABLE {_PARENT} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{bounds['start'].isoformat()}') TO ('{bounds['end'].isoformat()}')"
+        ))
+        return moved
+
+    def detach(self, month: date) -> None:
+        self.db.execute(text(f"ALTER TABLE {_PARENT} DETACH PARTITION {partition_name(month)}"))
+
+    def drop(self, month: date) -> None:
+        self.db.execute(text(f"DROP TABLE IF EXISTS {partition_name(month)}"))
+
+    def purge_processed(self, before: datetime, limit: int) -> int:
+        """Delete up to ``limit`` dedup ids recorded before ``before``."""
+        oldest = (
+            select(ProcessedTransaction.transaction_id)
+            .where(ProcessedTransaction.created_at < before)
+            .order_by(ProcessedTransaction.created_at)
+            .limit(limit)
+        )
+        return self.db.execute(
+            delete(ProcessedTransaction).where(ProcessedTransaction.transaction_id.in_(oldest))
+        ).rowcount
\ No newline at end of file
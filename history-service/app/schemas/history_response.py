@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from decimal import Decimal
-from typing import List
+from typing import List, Optional
 
 
 class TransactionEventResponse(BaseModel):
@@ -21,6 +21,8 @@ class WalletHistoryResponse(BaseModel):
     total: int
     limit: int
     offset: int
+    # Pass back as ?cursor= for the next page; None on the last page
+    next_cursor: Optional[str] = None
 
 
 class UserActivityResponse(BaseModel):
@@ -28,4 +30,6 @@ class UserActivityResponse(BaseModel):
     events: List[TransactionEventResponse]
     total: int
     limit: int
-    offset: int
\ No newline at end of file
+    offset: int
+    # Pass back as ?cursor= for the next page; None on the last page
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -1,8 +1,21 @@
+from app.services.dedup_cache import recent_transactions, RecentTransactionIds
 from app.services.history_service import HistoryService
 from app.services.consumer_service import kafka_consumer, KafkaConsumerService
+from app.services.counter_repair_service import counter_repair, CounterRepairService
+from app.services.partition_service import partition_maintenance, PartitionMaintenanceService
+from app.services.export_service import export_events, export_limiter, ExportLimiter
 
 __all__ = [
     "HistoryService",
+    "recent_transactions",
+    "RecentTransactionIds",
     "kafka_consumer",
     "KafkaConsumerService",
+    "counter_repair",
+    "CounterRepairService",
+    "partition_maintenance",
+    "PartitionMaintenanceService",
+    "export_events",
+    "export_limiter",
+    "ExportLimiter",
 ]
\ No newline at end of file
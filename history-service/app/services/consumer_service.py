@@ -1,14 +1,19 @@
 import asyncio
-import json
 import logging
+import random
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from typing import Optional
-from aiokafka import AIOKafkaConsumer
+from typing import Dict, Optional
+from aiokafka import AIOKafkaConsumer, ConsumerRebalanceListener, TopicPartition
+from aiokafka.errors import ConsumerStoppedError
 
 
 from app.config import get_settings
 from app.database import SessionLocal
 from app.services.history_service import HistoryService
+from app.metrics import EVENTS_CONSUMED, CONSUMER_COMMIT_LATENCY, CONSUMER_BATCH_SIZE
+from shared.serialization import loads
+from shared.event_codec import BINARY_CONTENT_TYPE, EventDecodeError, content_type, decode_event
 from shared.schemas import (
     EventType,
     WalletCreatedEvent,
@@ -59,12 +64,119 @@ def deserialize_event(event_dict: dict) -> Optional[WalletEvent]:
         return None
 
 
+def decode_message(value: bytes, headers) -> Optional[WalletEvent]:
+    """Decode a message in whichever format its content-type header names (JSON if none)."""
+    try:
+        if content_type(headers) == BINARY_CONTENT_TYPE:
+            return decode_event(value)
+        return deserialize_event(loads(value))
+    except (EventDecodeError, ValueError) as e:
+        logger.error(f"Failed to decode message: {e}, data: {value!r}")
+        return None
+
+
+class _RebalanceListener(ConsumerRebalanceListener):
+    def __init__(self, service: "KafkaConsumerService"):
+        self.service = service
+
+    async def on_partitions_revoked(self, revoked):
+        # Runs before the group rebalances: finish in-flight work and commit it
+        await self.service._stop_workers(revoked)
+
+    async def on_partitions_assigned(self, assigned):
+        logger.info(f"Assigned partitions: {sorted(tp.partition for tp in assigned)}")
+
+
+class _PartitionWorker:
+    """Processes one partition's batches in order, committing that partition's offset after each."""
+
+    def __init__(self, service: "KafkaConsumerService", tp: TopicPartition):
+        self.service = service
+        self.tp = tp
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=service.max_pending_batches)
+        self.stopping = asyncio.Event()
+        self.task = asyncio.create_task(self._run())
+
+    async def submit(self, messages: list) -> None:
+        if self.stopping.is_set():
+            return
+        # Counted before the put can block, so a full queue already weighs on backpressure
+        self.service._in_flight += 1
+        self.service._apply_backpressure()
+        try:
+            await self.queue.put(messages)
+        except BaseException:
+            self.service._in_flight -= 1
+            raise
+        if self.stopping.is_set():
+            # stop() drained the queue while this put waited, so the batch sits
+            # behind the sentinel and never runs; like the drained ones it is
+            # uncommitted and read again by the partition's next owner
+            self.service._in_flight -= 1
+            self.service._apply_backpressure()
+
+    async def _run(self):
+        while True:
+            messages = await self.queue.get()
+            if messages is None:
+                return
+            try:
+                await self._process(messages)
+            finally:
+                self.service._in_flight -= 1
+                self.service._apply_backpressure()
+
+    async def _process(self, messages: list) -> None:
+        # Retry in place: skipping ahead would reorder events for this partition's wallets
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            try:
+                await loop.run_in_executor(self.service._executor, self.service._record, messages)
+                await self.service._commit({self.tp: messages[-1].offset + 1})
+                return
+            except Exception as e:
+                EVENTS_CONSUMED.inc("failed", amount=len(messages))
+                delay = self.service._backoff(attempt)
+                attempt += 1
+                logger.error(
+                    f"Error processing batch from partition {self.tp.partition} "
+                    f"(attempt {attempt}, retrying in {delay:.2f}s): {e}",
+                    exc_info=True,
+                )
+                try:
+                    await asyncio.wait_for(self.stopping.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    continue
+                # Uncommitted, so the partition's next owner reads it again
+                return
+
+    async def stop(self):
+        self.stopping.set()
+        # Queued batches are dropped; their offsets were never committed
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            self.service._in_flight -= 1
+        self.queue.put_nowait(None)
+        await self.task
+
+
 class KafkaConsumerService:
     def __init__(self):
         self.bootstrap_servers = settings.kafka_broker
         self.topic = settings.kafka_topic
         self.group_id = settings.kafka_consumer_group
+        self.batch_size = settings.kafka_consume_batch_size
+        self.max_wait_ms = settings.kafka_consume_max_wait_ms
+        self.max_pending_batches = settings.kafka_partition_max_pending_batches
+        self.max_in_flight = settings.consumer_max_in_flight_batches
+        self.db_threads = settings.consumer_db_threads
+        self.retry_backoff = settings.consumer_retry_backoff_ms / 1000
+        self.retry_backoff_max = settings.consumer_retry_backoff_max_ms / 1000
         self.consumer: Optional[AIOKafkaConsumer] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._workers: Dict[TopicPartition, _PartitionWorker] = {}
+        self._in_flight = 0
         self._shutdown = False
 
     def request_shutdown(self):
@@ -72,16 +184,19 @@ class KafkaConsumerService:
         self._shutdown = True
 
     async def start(self):
+        # Consumer writes never share the event loop or the threadpool serving /history reads.
+        # Each partition worker runs one batch at a time and threads start on demand,
+        # so the threads in use follow the assignment up to this cap
+        self._executor = ThreadPoolExecutor(max_workers=self._db_thread_cap(), thread_name_prefix="history-consumer")
         for attempt in range(5):
             try:
                 self.consumer = AIOKafkaConsumer(
-                    self.topic,
                     bootstrap_servers=self.bootstrap_servers,
                     group_id=self.group_id,
                     auto_offset_reset='earliest',
                     enable_auto_commit=False,
-                    value_deserializer=lambda m: json.loads(m.decode('utf-8'))
                 )
+                self.consumer.subscribe([self.topic], listener=_RebalanceListener(self))
                 await self.consumer.start()
                 logger.info(
                     f"Kafka consumer started: topic={self.topic}, "
@@ -94,40 +209,105 @@ class KafkaConsumerService:
 
         raise RuntimeError("Kafka consumer could not be started after retries")
     
+    def _db_thread_cap(self) -> Optional[int]:
+        if self.db_threads > 0:
+            return self.db_threads
+        # None is the executor's own default when the pool (NullPool) sets no bound
+        return settings.db_pool_size if settings.db_pool_size > 0 else None
+
+    async def _commit(self, offsets: Dict[TopicPartition, int]):
+        with CONSUMER_COMMIT_LATENCY.time():
+            await self.consumer.commit(offsets)
+
+    async def _stop_workers(self, partitions) -> None:
+        workers = [self._workers.pop(tp) for tp in partitions if tp in self._workers]
+        await asyncio.gather(*(worker.stop() for worker in workers))
+        if workers:
+            logger.info(f"Stopped workers for partitions {sorted(w.tp.partition for w in workers)}")
+
     async def stop(self):
+        self._shutdown = True
+        # Let in-flight batches finish and commit while the consumer is still connected
+        await self._stop_workers(list(self._workers))
         if self.consumer:
             await self.consumer.stop()
             logger.info("Kafka consumer stopped")
+        if self._executor:
+            self._executor.shutdown(wait=False)
+
+    def _backoff(self, attempt: int) -> float:
+        # Exponential with jitter, so partitions failing together do not retry in lockstep
+        delay = min(self.retry_backoff_max, self.retry_backoff * 2 ** attempt)
+        return random.uniform(delay / 2, delay)
+
+    def _apply_backpressure(self) -> None:
+        """Pause fetching for partitions whose worker is full, or for all once too much work is in flight.
+
+        getmany() keeps being called while paused, so the consumer stays in
+        the group; it just returns nothing for paused partitions.
+        """
+        saturated = self._in_flight >= self.max_in_flight
+        paused = self.consumer.paused()
+        for tp in self.consumer.assignment():
+            worker = self._workers.get(tp)
+            hold = saturated or (worker is not None and worker.queue.full())
+            if hold and tp not in paused:
+                self.consumer.pause(tp)
+            elif not hold and tp in paused:
+                self.consumer.resume(tp)
+
+    def _record(self, messages: list) -> None:
+        """Decode and store one partition batch; runs on the consumer executor."""
+        events = []
+        for message in messages:
+            event = decode_message(message.value, message.headers)
+            if event is None:
+                logger.error(f"Could not deserialize event, skipping: {message.value!r}")
+                EVENTS_CONSUMED.inc("skipped")
+                continue
+            events.append(event)
+
+        if events:
+            with get_db_context() as db:
+                HistoryService(db).process_events(events)
+            EVENTS_CONSUMED.inc("processed", amount=len(events))
+        CONSUMER_BATCH_SIZE.observe(len(messages))
+
+    def _worker(self, tp: TopicPartition) -> Optional[_PartitionWorker]:
+        """The partition's worker, started on first use; None once the partition is no longer assigned."""
+        if tp not in self.consumer.assignment():
+            return None
+        worker = self._workers.get(tp)
+        if worker is None:
+            worker = self._workers[tp] = _PartitionWorker(self, tp)
+        return worker
 
     async def consume_events(self):
-        global shutdown_requested
-        logger.info("Starting to consume events...")
+        logger.info(
+            f"Starting to consume events in batches of up to {self.batch_size} "
+            f"(max wait {self.max_wait_ms}ms), one worker per partition..."
+        )
 
         try:
-            async for message in self.consumer:
+            while not self._shutdown:
+                try:
+                    batch = await self.consumer.getmany(timeout_ms=self.max_wait_ms, max_records=self.batch_size)
+                except ConsumerStoppedError:
+                    break
                 if self._shutdown:
-                    logger.info("Shutdown requested, stopping consumption...")
                     break
 
-                try:
-                    event_dict = message.value
-                    logger.debug(f"Received message: {event_dict}")
-
-                    event = deserialize_event(event_dict)
-                    if event is None:
-                        logger.error(f"Could not deserialize event, skipping: {event_dict}")
-                        await self.consumer.commit()
+                # Wallet ids are the message keys, so per-partition order is per-wallet order
+                for tp, messages in batch.items():
+                    worker = self._worker(tp)
+                    if worker is None:
+                        # Fetched before a rebalance revoked the partition: this consumer
+                        # can't commit them, and the partition's new owner reads them again
+                        logger.info(f"Dropping {len(messages)} messages from revoked partition {tp.partition}")
                         continue
+                    await worker.submit(messages)
 
-                    with get_db_context() as db:
-                        history_service = HistoryService(db)
-                        history_service.process_event(event)
-
-                    await self.consumer.commit()
-
-                except Exception as e:
-                    logger.error(f"Error processing message: {e}", exc_info=True)
-                    await asyncio.sleep(5)
+            logger.info("Shutdown requested, stopping consumption...")
 
         except Exception as e:
             logger.error(f"Consumer loop error: {e}", exc_info=True)
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from typing import Optional
+
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.metrics import COUNTERS_REPAIRED
+from app.models import WALLET_SCOPE, USER_SCOPE
+from app.repositories import CounterRepository
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class CounterRepairService:
+    """Reconciles history_counters with transaction_events in the background.
+
+    Counters are kept exact by the consumer, but events written outside it
+    (a manual fix, an older deploy still running) or retired with their
+    partition would leave them off for good. Every ``interval`` the job walks
+    all wallets and users with events or a counter in chunks, one short
+    transaction each, and corrects any counter that disagrees with a real
+    count.
+    """
+
+    def __init__(self):
+        self.interval = settings.counter_repair_interval_seconds
+        self.chunk_size = settings.counter_repair_chunk_size
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    async def start(self):
+        if self.interval <= 0:
+            logger.info("Counter repair disabled")
+            return
+        self._stopping.clear()
+        self._task = asyncio.create_task(self.run())
+        logger.info(f"Counter repair started (every {self.interval}s)")
+
+    async def stop(self):
+        if not self._task:
+            return
+        self._stopping.set()
+        await self._task
+        logger.info("Counter repair stopped")
+
+    def _repair_chunk(self, scope: str, after: Optional[str]):
+        db = SessionLocal()
+        try:
+            last_key, corrected = CounterRepository(db).repair_chunk(scope, after, self.chunk_size)
+            db.commit()
+            return last_key, corrected
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def repair_once(self) -> int:
+        corrected = 0
+        for scope in (WALLET_SCOPE, USER_SCOPE):
+            after = None
+            while not self._stopping.is_set():
+                # Off the event loop, so /history reads are not held up
+                after, fixed = await asyncio.to_thread(self._repair_chunk, scope, after)
+                if fixed:
+                    COUNTERS_REPAIRED.inc(scope, amount=fixed)
+                    corrected += fixed
+                if after is None:
+                    break
+        if corrected:
+            logger.warning(f"Counter repair corrected {corrected} history counters")
+        return corrected
+
+    async def run(self):
+        while not self._stopping.is_set():
+            await self._wait(self.interval)
+            if self._stopping.is_set():
+                break
+            try:
+                await self.repair_once()
+            except Exception as e:
+                logger.error(f"Counter repair failed: {e}")
+
+    async def _wait(self, seconds: float):
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+
+counter_repair = CounterRepairService()
\ No newline at end of file
@@ -0,0 +1,69 @@
+import threading
+from collections import OrderedDict
+from typing import Iterable, List
+
+
+from app.config import get_settings
+from app.metrics import DEDUP_CACHE_LOOKUPS
+
+
+settings = get_settings()
+
+
+class RecentTransactionIds:
+    """Bounded LRU of transaction ids known to be committed to transaction_events.
+
+    Every transfer arrives twice, once per wallet key, so the second copy can
+    be dropped without a database round trip. Ids are added only after the
+    commit that stored them, so a hit always means a stored row. A miss is
+    not a verdict: the database still decides, so eviction never lets a
+    duplicate through. Partition workers share it from their threads, hence
+    the lock.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._ids: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def unseen(self, transaction_ids: List[str]) -> List[str]:
+        """The ids not known to be recorded; they still need the database."""
+        if not self.enabled:
+            return transaction_ids
+        unseen = []
+        with self._lock:
+            for transaction_id in transaction_ids:
+                if transaction_id in self._ids:
+                    self._ids.move_to_end(transaction_id)
+                else:
+                    unseen.append(transaction_id)
+        hits = len(transaction_ids) - len(unseen)
+        if hits:
+            DEDUP_CACHE_LOOKUPS.inc("hit", amount=hits)
+        if unseen:
+            DEDUP_CACHE_LOOKUPS.inc("miss", amount=len(unseen))
+        return unseen
+
+    def add(self, transaction_ids: Iterable[str]) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            for transaction_id in transaction_ids:
+                self._ids[transaction_id] = None
+                self._ids.move_to_end(transaction_id)
+            while len(self._ids) > self.max_entries:
+                self._ids.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids.clear()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+recent_transactions = RecentTransactionIds(max_entries=settings.dedup_cache_size)
\ No newline at end of file
@@ -0,0 +1,130 @@
+import csv
+import io
+import logging
+import zlib
+from typing import Iterable, Iterator, Literal
+
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.exceptions import ExportLimitError
+from app.metrics import EVENTS_EXPORTED
+from app.models import WALLET_SCOPE
+from app.repositories import HistoryRepository
+from app.repositories.history_repository import EXPORT_COLUMNS
+from shared.serialization import dumps, dumps_str
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+
+class ExportLimiter:
+    """Caps concurrent exports, so slow clients cannot hold every pool connection.
+
+    Slots are taken and given back on the event loop only, so a plain count
+    needs no lock. A request over the limit is refused rather than queued.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+
+    def acquire(self) -> None:
+        if self.active >= self.limit:
+            raise ExportLimitError(f"{self.active} exports already running; retry later")
+        self.active += 1
+
+    def release(self) -> None:
+        self.active -= 1
+
+
+export_limiter = ExportLimiter(settings.export_max_concurrent)
+
+
+def _ndjson(rows) -> Iterator[bytes]:
+    for row in rows:
+        yield dumps(row._asdict()) + b"\n"
+
+
+def _csv(rows) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(FIELDS)
+    for row in rows:
+        values = row._asdict()
+        values["event_data"] = dumps_str(values["event_data"])
+        values["created_at"] = values["created_at"].isoformat()
+        writer.writerow([values[field] for field in FIELDS])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _chunked(lines: Iterable[bytes], chunk_bytes: int) -> Iterator[bytes]:
+    # One write per chunk instead of one per event
+    pending = []
+    size = 0
+    for line in lines:
+        pending.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            yield b"".join(pending)
+            pending.clear()
+            size = 0
+    if pending:
+        yield b"".join(pending)
+
+
+def _gzipped(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_events(scope: str, key: str, export_format: ExportFormat, compress: bool = False) -> Iterator[bytes]:
+    """Stream every event of a wallet or user, oldest first, as NDJSON or CSV.
+
+    The generator owns its session: the response outlives the request's
+    dependencies. Rows come off a server-side cursor in batches of
+    ``export_batch_size`` and leave in chunks of about ``export_chunk_bytes``,
+    so memory stays flat however long the history is. Starlette iterates a
+    sync generator in its threadpool, keeping the database reads off the
+    event loop.
+    """
+    db = SessionLocal()
+    exported = 0
+    try:
+        repository = HistoryRepository(db)
+        if scope == WALLET_SCOPE:
+            rows = repository.stream_wallet_history(key, settings.export_batch_size)
+        else:
+            rows = repository.stream_user_activity(key, settings.export_batch_size)
+
+        def counted(rows):
+            nonlocal exported
+            for row in rows:
+                exported += 1
+                yield row
+
+        lines = _ndjson(counted(rows)) if export_format == "ndjson" else _csv(counted(rows))
+        chunks = _chunked(lines, settings.export_chunk_bytes)
+        yield from _gzipped(chunks) if compress else chunks
+    finally:
+        db.rollback()
+        db.close()
+        if exported:
+            EVENTS_EXPORTED.inc(export_format, amount=exported)
+        logger.info(f"Exported {exported} events for {scope} {key} as {export_format}{' (gzip)' if compress else ''}")
\ No newline at end of file
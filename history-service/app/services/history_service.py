@@ -1,8 +1,14 @@
 import logging
+import uuid
+from datetime import date, datetime
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.repositories import HistoryRepository
+from app.config import get_settings
+from app.models import WALLET_SCOPE, USER_SCOPE
+from app.repositories import HistoryRepository, CounterRepository
+from app.repositories.partition_repository import add_months, month_start
+from app.services.dedup_cache import recent_transactions
 from shared.schemas import (
     WalletEvent,
     WalletCreatedEvent,
@@ -11,100 +17,125 @@ from shared.schemas import (
     TransferFailedEvent
 )
 from app.schemas import TransactionEventResponse
+from app.metrics import OPERATION_LATENCY
+from shared.metrics import observe_latency
+from shared.pagination import encode_cursor, decode_cursor
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 
 class HistoryService:
     def __init__(self, db: Session):
         self.db = db
         self.repository = HistoryRepository(db)
+        self.counters = CounterRepository(db)
 
-    def _record_event(self, wallet_id, user_id, amount, event_type, transaction_id, event_data):
-        self.repository.create_event(
-            wallet_id=wallet_id,
-            user_id=user_id,
-            amount=amount,
-            event_type=event_type,
-            transaction_id=transaction_id,
-            event_data=event_data,
-        )
-
-    def _exists(self, ids):
-        if not isinstance(ids, list):
-            ids = [ids]
-        return self.repository.events_exist(ids)
-
-    def process_event(self, event: WalletEvent) -> bool:
-        try:
-            if isinstance(event, TransferCompletedEvent):
-                ids = [event.from_transaction_id, event.to_transaction_id]
-                if self._exists(ids):
-                    logger.info(f"Transfer already processed: {ids}")
-                    return False
-                
-                self._record_event(
-                    event.from_wallet_id, event.from_user_id, event.amount,
-                    event.event_type.value, event.from_transaction_id,
-                    event.model_dump(mode="json")
-                )
-                self._record_event(
-                    event.to_wallet_id, event.to_user_id, event.amount,
-                    event.event_type.value, event.to_transaction_id,
-                    event.model_dump(mode="json")
-                )
-                self.db.commit()
-                logger.info(
-                    f"Transfer processed: ${event.amount} "
-                    f"{event.from_wallet_id} → {event.to_wallet_id}"
-                )
-                return True
-            
-            if isinstance(event, (WalletFundedEvent, WalletCreatedEvent)):
-                if self._exists(event.transaction_id):
-                    logger.info(f"Event already processed: {event.transaction_id}")
-                    return False
-
-                amount = getattr(event, "amount", getattr(event, "initial_balance", 0))
-                self._record_event(
-                    event.wallet_id, event.user_id, amount,
-                    event.event_type.value, event.transaction_id,
-                    event.model_dump(mode="json")
-                )
-                self.db.commit()
-                logger.info(f"{event.event_type.value} processed for wallet {event.wallet_id}")
-                return True
-
-            if isinstance(event, TransferFailedEvent):
-                txn_id = event.transaction_id or f"failed-{event.timestamp.isoformat()}-{event.from_wallet_id}"
-                if self._exists(txn_id):
-                    logger.info(f"Failed transfer already logged: {txn_id}")
-                    return False
-
-                self._record_event(
-                    event.from_wallet_id, event.from_user_id, event.amount,
-                    event.event_type.value, txn_id,
-                    event.model_dump(mode="json")
-                )
-                self.db.commit()
-                logger.warning(
-                    f"Transfer failed: {event.from_wallet_id} → {event.to_wallet_id}, "
-                    f"reason: {event.reason}"
-                )
-                return True
-            
-            logger.warning(f"Unknown event type: {type(event)}")
-            return False
-            
-        except Exception as e:
-            self.db.rollback()
-            logger.error(f"Error processing event: {e}", exc_info=True)
-            raise
-
-    def get_wallet_history(self, wallet_id: str, limit: int = 50, offset: int = 0):
-        events, total = self.repository.get_wallet_history(wallet_id, limit, offset)
-        return [TransactionEventResponse.model_validate(e) for e in events], total
-
-    def get_user_activity(self, user_id: str, limit: int = 50, offset: int = 0):
-        events, total = self.repository.get_user_activity(user_id, limit, offset)
-        return [TransactionEventResponse.model_validate(e) for e in events], total
\ No newline at end of file
+    @staticmethod
+    def _event_rows(event: WalletEvent) -> List[dict]:
+        """transaction_events rows for ``event``: one per wallet it touched."""
+        event_data = event.model_dump(mode="json")
+        event_type = event.event_type.value
+
+        # Rows of one batch share a statement and so now(); the time the event
+        # happened keeps history and exports in event order within a batch
+        def row(wallet_id, user_id, amount, transaction_id):
+            return {
+                "id": str(uuid.uuid4()),
+                "wallet_id": wallet_id,
+                "user_id": user_id,
+                "amount": amount,
+                "event_type": event_type,
+                "transaction_id": transaction_id,
+                "event_data": event_data,
+                "created_at": event.timestamp,
+            }
+
+        if isinstance(event, TransferCompletedEvent):
+            return [
+                row(event.from_wallet_id, event.from_user_id, event.amount, event.from_transaction_id),
+                row(event.to_wallet_id, event.to_user_id, event.amount, event.to_transaction_id),
+            ]
+        if isinstance(event, (WalletFundedEvent, WalletCreatedEvent)):
+            amount = getattr(event, "amount", getattr(event, "initial_balance", 0))
+            return [row(event.wallet_id, event.user_id, amount, event.transaction_id)]
+        if isinstance(event, TransferFailedEvent):
+            txn_id = event.transaction_id or f"failed-{event.timestamp.isoformat()}-{event.from_wallet_id}"
+            return [row(event.from_wallet_id, event.from_user_id, event.amount, txn_id)]
+
+        logger.warning(f"Unknown event type: {type(event)}")
+        return []
+
+    @staticmethod
+    def _drop_expired(events: List[WalletEvent]) -> List[WalletEvent]:
+        # Events from months retention already retired (a replay, an old backlog)
+        # would only be retired again; their dedup ids are purged, so drop them here
+        if settings.history_retention_months <= 0:
+            return events
+        cutoff = datetime.combine(add_months(month_start(date.today()), -settings.history_retention_months), datetime.min.time())
+        kept = [event for event in events if event.timestamp.replace(tzinfo=None) >= cutoff]
+        if len(kept) < len(events):
+            logger.warning(
+                f"Skipping {len(events) - len(kept)} events older than the "
+                f"{settings.history_retention_months} month retention cutoff {cutoff.date()}"
+            )
+        return kept
+
+    def _commit(self, ids):
+        self.db.commit()
+        recent_transactions.add(ids)
+
+    @observe_latency(OPERATION_LATENCY, "process_events")
+    def process_events(self, events: List[WalletEvent]) -> int:
+        """Record a batch of events and commit.
+
+        Duplicates are skipped whether they repeat within the batch (every
+        transfer arrives once per wallet key), sit in the recent-id cache or
+        are already stored, which claiming the id in processed_transactions
+        detects. The wallet and user counters of the rows actually inserted
+        are bumped in the same transaction. Events older than the retention
+        cutoff are skipped. Returns the rows inserted.
+        """
+        events = self._drop_expired(events)
+        rows = {}
+        for event in events:
+            for row in self._event_rows(event):
+                rows.setdefault(row["transaction_id"], row)
+        # Partition workers insert concurrently; a common key order keeps their
+        # unique-index locks from deadlocking when both copies of a transfer race
+        ids = sorted(rows)
+        unseen = recent_transactions.unseen(ids)
+        if not unseen:
+            logger.info(f"Batch of {len(events)} events: all {len(ids)} history rows already recorded")
+            return 0
+
+        inserted = self.repository.insert_events([rows[transaction_id] for transaction_id in unseen])
+        self.counters.increment_for(inserted)
+        self._commit(ids)
+        logger.info(f"Batch of {len(events)} events: {len(inserted)} new history rows, {len(ids) - len(inserted)} already recorded")
+        return len(inserted)
+
+    @staticmethod
+    def _page(events, limit: int):
+        # One extra row tells whether another page follows
+        page = events[:limit]
+        next_cursor = None
+        if len(events) > limit:
+            next_cursor = encode_cursor(page[-1].created_at, page[-1].id)
+        return [TransactionEventResponse.model_validate(e) for e in page], next_cursor
+
+    @observe_latency(OPERATION_LATENCY, "get_wallet_history")
+    def get_wallet_history(self, wallet_id: str, limit: int = 50, offset: int = 0, cursor: Optional[str] = None):
+        after = decode_cursor(cursor) if cursor else None
+        events = self.repository.get_wallet_history(wallet_id, limit + 1, offset, after)
+        total = self.counters.get_count(WALLET_SCOPE, wallet_id)
+        page, next_cursor = self._page(events, limit)
+        return page, total, next_cursor
+
+    @observe_latency(OPERATION_LATENCY, "get_user_activity")
+    def get_user_activity(self, user_id: str, limit: int = 50, offset: int = 0, cursor: Optional[str] = None):
+        after = decode_cursor(cursor) if cursor else None
+        events = self.repository.get_user_activity(user_id, limit + 1, offset, after)
+        total = self.counters.get_count(USER_SCOPE, user_id)
+        page, next_cursor = self._page(events, limit)
+        return page, total, next_cursor
\ No newline at end of file
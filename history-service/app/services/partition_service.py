@@ -0,0 +1,135 @@
+import asyncio
+import logging
+from datetime import date, datetime
+from typing import Callable, Optional
+
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.metrics import PARTITION_CHANGES
+from app.repositories import PartitionRepository
+from app.repositories.partition_repository import add_months, partition_name
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class PartitionMaintenanceService:
+    """Keeps the monthly partitions of transaction_events in step with the calendar.
+
+    Partitions are created ``months_ahead`` months in advance. An event
+    stamped with a month that has none (a backlog, a replay) lands in the
+    DEFAULT partition, and its month's partition is created on the next run,
+    taking those rows along. With a retention policy, partitions that
+    ended ``retention_months`` ago are detached (or dropped) whole instead of
+    being emptied by DELETE. Their dedup ids in processed_transactions are
+    purged in small batches. The next counter repair brings history totals
+    back in line with what remains.
+    """
+
+    def __init__(self):
+        self.interval = settings.partition_maintenance_interval_seconds
+        self.months_ahead = settings.history_partition_months_ahead
+        self.retention_months = settings.history_retention_months
+        self.retention_action = settings.history_retention_action
+        self.purge_batch_size = settings.history_retention_purge_batch_size
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    async def start(self):
+        self._stopping.clear()
+        # Run once up front so the current month's partition exists before the consumer writes
+        try:
+            await self.maintain_once()
+        except Exception as e:
+            logger.error(f"Partition maintenance failed: {e}")
+        if self.interval > 0:
+            self._task = asyncio.create_task(self.run())
+            logger.info(f"Partition maintenance started (every {self.interval}s)")
+
+    async def stop(self):
+        if not self._task:
+            return
+        self._stopping.set()
+        await self._task
+        logger.info("Partition maintenance stopped")
+
+    def _in_transaction(self, work: Callable[[PartitionRepository], object]):
+        db = SessionLocal()
+        try:
+            result = work(PartitionRepository(db))
+            db.commit()
+            return result
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _maintain(self) -> None:
+        current = self._in_transaction(lambda partitions: partitions.current_month())
+        existing = set(self._in_transaction(lambda partitions: partitions.list_months()))
+
+        waiting = self._in_transaction(lambda partitions: partitions.default_months())
+
+        missing = set(waiting) | {add_months(current, offset) for offset in range(self.months_ahead + 1)}
+        for month in sorted(missing - existing):
+            moved = self._in_transaction(lambda partitions: partitions.create(month))
+            existing.add(month)
+            PARTITION_CHANGES.inc("created")
+            moved_note = f", moving {moved} rows out of the default partition" if moved else ""
+            logger.info(f"Created partition {partition_name(month)}{moved_note}")
+
+        if self.retention_months <= 0:
+            return
+        cutoff = add_months(current, -self.retention_months)
+        for month in sorted(existing):
+            if month >= cutoff:
+                break
+            self._retire(month)
+        self._purge_processed(datetime.combine(cutoff, datetime.min.time()))
+
+    def _retire(self, month: date) -> None:
+        name = partition_name(month)
+        self._in_transaction(lambda partitions: partitions.detach(month))
+        PARTITION_CHANGES.inc("detached")
+        if self.retention_action == "drop":
+            self._in_transaction(lambda partitions: partitions.drop(month))
+            PARTITION_CHANGES.inc("dropped")
+            logger.info(f"Dropped partition {name} past {self.retention_months} month retention")
+        else:
+            logger.info(f"Detached partition {name} past {self.retention_months} month retention; it is kept as a table")
+
+    def _purge_processed(self, before: datetime) -> None:
+        purged = 0
+        while not self._stopping.is_set():
+            count = self._in_transaction(lambda partitions: partitions.purge_processed(before, self.purge_batch_size))
+            purged += count
+            if count < self.purge_batch_size:
+                break
+        if purged:
+            logger.info(f"Purged {purged} processed transaction ids older than {before.date()}")
+
+    async def maintain_once(self) -> None:
+        # DDL and purges block; keep them off the event loop serving /history reads
+        await asyncio.to_thread(self._maintain)
+
+    async def run(self):
+        while not self._stopping.is_set():
+            await self._wait(self.interval)
+            if self._stopping.is_set():
+                break
+            try:
+                await self.maintain_once()
+            except Exception as e:
+                logger.error(f"Partition maintenance failed: {e}")
+
+    async def _wait(self, seconds: float):
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+
+partition_maintenance = PartitionMaintenanceService()
\ No newline at end of file
@@ -0,0 +1,50 @@
+"""add transaction events keyset indexes
+
+Revision ID: 5b2e9c7d1f30
+Revises: aa7258becc32
+Create Date: 2026-10-17 18:02:41.173092
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2e9c7d1f30'
+down_revision: Union[str, Sequence[str], None] = 'aa7258becc32'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY keeps the consumer writing while the indexes build; it cannot run in a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_transaction_event_wallet_created_id',
+            'transaction_events',
+            ['wallet_id', sa.text('created_at DESC'), 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'idx_transaction_event_user_created_id',
+            'transaction_events',
+            ['user_id', sa.text('created_at DESC'), 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        # The composite indexes lead with wallet_id and user_id, so the single-column ones are redundant
+        op.drop_index('idx_transaction_event_wallet_id', table_name='transaction_events', postgresql_concurrently=True)
+        op.drop_index('idx_transaction_event_user_id', table_name='transaction_events', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('idx_transaction_event_user_id', 'transaction_events', ['user_id'], unique=False, postgresql_concurrently=True)
+        op.create_index('idx_transaction_event_wallet_id', 'transaction_events', ['wallet_id'], unique=False, postgresql_concurrently=True)
+        op.drop_index('idx_transaction_event_user_created_id', table_name='transaction_events', postgresql_concurrently=True)
+        op.drop_index('idx_transaction_event_wallet_created_id', table_name='transaction_events', postgresql_concurrently=True)
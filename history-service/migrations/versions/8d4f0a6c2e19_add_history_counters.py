@@ -0,0 +1,43 @@
+"""add history counters
+
+Revision ID: 8d4f0a6c2e19
+Revises: 5b2e9c7d1f30
+Create Date: 2026-10-17 19:11:05.482716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4f0a6c2e19'
+down_revision: Union[str, Sequence[str], None] = '5b2e9c7d1f30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('history_counters',
+    sa.Column('scope', sa.String(length=10), nullable=False),
+    sa.Column('key', sa.String(length=100), nullable=False),
+    sa.Column('event_count', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('scope', 'key')
+    )
+    # Backfill; events recorded by consumers still on the old code are picked up by the repair job
+    op.execute(
+        "INSERT INTO history_counters (scope, key, event_count) "
+        "SELECT 'wallet', wallet_id, count(*) FROM transaction_events GROUP BY wallet_id"
+    )
+    op.execute(
+        "INSERT INTO history_counters (scope, key, event_count) "
+        "SELECT 'user', user_id, count(*) FROM transaction_events GROUP BY user_id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('history_counters')
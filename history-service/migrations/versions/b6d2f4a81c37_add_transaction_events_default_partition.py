@@ -0,0 +1,38 @@
+"""add transaction events default partition
+
+Revision ID: b6d2f4a81c37
+Revises: e7a1c3f95b02
+Create Date: 2026-10-17 22:05:13.604127
+
+Events are stamped with the time they happened, so a backlog or a replay can
+carry a month that has no partition. The DEFAULT partition takes those rows
+instead of failing the whole batch; partition maintenance moves them into
+their month's partition when it creates it.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d2f4a81c37'
+down_revision: Union[str, Sequence[str], None] = 'e7a1c3f95b02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE TABLE transaction_events_default PARTITION OF transaction_events DEFAULT")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    leftover = op.get_bind().execute(sa.text("SELECT count(*) FROM transaction_events_default")).scalar()
+    if leftover:
+        raise RuntimeError(
+            f"transaction_events_default still holds {leftover} rows; "
+            f"let partition maintenance move them into monthly partitions first"
+        )
+    op.execute("DROP TABLE transaction_events_default")
@@ -0,0 +1,134 @@
+"""partition transaction events by month
+
+Revision ID: e7a1c3f95b02
+Revises: 8d4f0a6c2e19
+Create Date: 2026-10-17 20:34:52.918340
+
+Rebuilds transaction_events as a table range-partitioned by month on
+created_at and copies the existing rows over. The copy holds the table, so
+stop history-service while it runs; Kafka keeps the events it misses.
+A partitioned table cannot enforce uniqueness on transaction_id alone, so
+deduplication moves to the new processed_transactions table.
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a1c3f95b02'
+down_revision: Union[str, Sequence[str], None] = '8d4f0a6c2e19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _columns():
+    return [
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('wallet_id', sa.String(length=36), nullable=False),
+        sa.Column('user_id', sa.String(length=100), nullable=False),
+        sa.Column('amount', sa.DECIMAL(precision=19, scale=4), nullable=False),
+        sa.Column('event_type', sa.String(length=30), nullable=False),
+        sa.Column('transaction_id', sa.String(length=150), nullable=False),
+        sa.Column('event_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    ]
+
+
+def _create_keyset_indexes() -> None:
+    op.create_index('idx_transaction_event_wallet_created_id', 'transaction_events',
+                    ['wallet_id', sa.text('created_at DESC'), 'id'], unique=False)
+    op.create_index('idx_transaction_event_user_created_id', 'transaction_events',
+                    ['user_id', sa.text('created_at DESC'), 'id'], unique=False)
+    op.create_index('idx_transaction_event_transaction_id', 'transaction_events', ['transaction_id'], unique=False)
+
+
+def _drop_keyset_indexes() -> None:
+    op.drop_index('idx_transaction_event_transaction_id', table_name='transaction_events')
+    op.drop_index('idx_transaction_event_user_created_id', table_name='transaction_events')
+    op.drop_index('idx_transaction_event_wallet_created_id', table_name='transaction_events')
+
+
+COPY_COLUMNS = "id, wallet_id, user_id, amount, event_type, transaction_id, event_data, created_at"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _drop_keyset_indexes()
+    op.drop_constraint('transaction_events_transaction_id_key', 'transaction_events', type_='unique')
+    op.drop_constraint('transaction_events_pkey', 'transaction_events', type_='primary')
+    op.rename_table('transaction_events', 'transaction_events_unpartitioned')
+
+    op.create_table('transaction_events',
+    *_columns(),
+    sa.PrimaryKeyConstraint('id', 'created_at'),
+    postgresql_partition_by='RANGE (created_at)'
+    )
+
+    bind = op.get_bind()
+    oldest, current = bind.execute(sa.text(
+        "SELECT CAST(date_trunc('month', min(created_at)) AS date), CAST(date_trunc('month', now()) AS date) "
+        "FROM transaction_events_unpartitioned"
+    )).one()
+    month = min(oldest or current, current)
+    while month <= _add_months(current, MONTHS_AHEAD):
+        following = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE transaction_events_p{month.year:04d}{month.month:02d} PARTITION OF transaction_events "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+        )
+        month = following
+
+    op.execute(
+        f"INSERT INTO transaction_events ({COPY_COLUMNS}) "
+        f"SELECT {COPY_COLUMNS} FROM transaction_events_unpartitioned"
+    )
+    # Built once after the copy rather than maintained row by row during it
+    _create_keyset_indexes()
+
+    op.create_table('processed_transactions',
+    sa.Column('transaction_id', sa.String(length=150), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('transaction_id')
+    )
+    op.execute(
+        "INSERT INTO processed_transactions (transaction_id, created_at) "
+        "SELECT transaction_id, created_at FROM transaction_events_unpartitioned"
+    )
+    op.create_index('idx_processed_transactions_created_at', 'processed_transactions', ['created_at'], unique=False)
+
+    op.drop_table('transaction_events_unpartitioned')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_table('transaction_events_unpartitioned',
+    *_columns(),
+    sa.PrimaryKeyConstraint('id', name='transaction_events_unpartitioned_pkey'),
+    sa.UniqueConstraint('transaction_id', name='transaction_events_unpartitioned_transaction_id_key')
+    )
+    op.execute(
+        f"INSERT INTO transaction_events_unpartitioned ({COPY_COLUMNS}) "
+        f"SELECT {COPY_COLUMNS} FROM transaction_events"
+    )
+    # Dropping the parent drops every attached partition with it
+    op.drop_table('transaction_events')
+    op.rename_table('transaction_events_unpartitioned', 'transaction_events')
+    op.execute("ALTER TABLE transaction_events RENAME CONSTRAINT transaction_events_unpartitioned_pkey TO transaction_events_pkey")
+    op.execute(
+        "ALTER TABLE transaction_events RENAME CONSTRAINT "
+        "transaction_events_unpartitioned_transaction_id_key TO transaction_events_transaction_id_key"
+    )
+    _create_keyset_indexes()
+
+    op.drop_index('idx_processed_transactions_created_at', table_name='processed_transactions')
+    op.drop_table('processed_transactions')
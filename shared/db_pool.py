@@ -0,0 +1,150 @@
+import threading
+import time
+import uuid
+from typing import Any, Dict
+
+from pydantic import BaseModel
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool, QueuePool
+
+
+# Upper bounds (seconds) of the checkout wait histogram
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class PoolStats(BaseModel):
+    pool_class: str
+    size: int
+    max_overflow: int
+    in_use: int
+    idle: int
+    overflow: int
+    checkouts: int
+    connects: int
+    timeouts: int
+    wait_seconds_total: float
+    wait_seconds_max: float
+    # Cumulative checkout count per WAIT_BUCKETS upper bound, plus "+Inf"
+    wait_histogram: Dict[str, int]
+
+
+class PoolWaitRecorder:
+    """Checkout wait and lifecycle counters for one engine's pool.
+
+    Checkouts may come from several threads (history-service runs sync
+    handlers in a threadpool), so updates take a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.connects = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.buckets = [0] * (len(WAIT_BUCKETS) + 1)
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        index = next((i for i, bound in enumerate(WAIT_BUCKETS) if seconds <= bound), len(WAIT_BUCKETS))
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self.buckets[index] += 1
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self.connects += 1
+
+
+class _InstrumentedPoolMixin:
+    """Times ``_do_get``: queueing for a free slot plus opening overflow connections."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.recorder = PoolWaitRecorder()
+
+    def recreate(self):
+        # dispose() swaps in a fresh pool; keep counting into the same recorder
+        pool = super().recreate()
+        pool.recorder = self.recorder
+        return pool
+
+    def _create_connection(self):
+        self.recorder.record_connect()
+        return super()._create_connection()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.recorder.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        self.recorder.record_wait(time.perf_counter() - started)
+        return connection
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(settings, is_async: bool) -> Dict[str, Any]:
+    """create_engine keyword arguments from a service's ``db_*`` settings.
+
+    PgBouncer in transaction mode hands each transaction to whichever server
+    connection is free, so named prepared statements cannot be reused across
+    transactions. asyncpg prepares every statement, so its caches are turned
+    off and names are made unique; psycopg2 does not prepare statements.
+    """
+    options: Dict[str, Any] = {"pool_pre_ping": settings.db_pool_pre_ping}
+    if settings.db_pool_size <= 0:
+        options["poolclass"] = NullPool
+    else:
+        options.update(
+            poolclass=InstrumentedAsyncAdaptedQueuePool if is_async else InstrumentedQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout_seconds,
+            pool_recycle=settings.db_pool_recycle_seconds,
+        )
+
+    if settings.db_pgbouncer_transaction_mode and is_async:
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    return options
+
+
+def pool_stats(pool: Pool) -> PoolStats:
+    recorder: PoolWaitRecorder = getattr(pool, "recorder", None) or PoolWaitRecorder()
+    queued = isinstance(pool, QueuePool)
+
+    cumulative, histogram = 0, {}
+    for bound, count in zip([*map(str, WAIT_BUCKETS), "+Inf"], recorder.buckets):
+        cumulative += count
+        histogram[bound] = cumulative
+
+    return PoolStats(
+        pool_class=type(pool).__name__,
+        size=pool.size() if queued else 0,
+        max_overflow=pool._max_overflow if queued else 0,
+        in_use=pool.checkedout() if queued else 0,
+        idle=pool.checkedin() if queued else 0,
+        # QueuePool.overflow() starts at -size; only connections beyond pool_size count
+        overflow=max(pool.overflow(), 0) if queued else 0,
+        checkouts=recorder.checkouts,
+        connects=recorder.connects,
+        timeouts=recorder.timeouts,
+        wait_seconds_total=round(recorder.wait_total, 6),
+        wait_seconds_max=round(recorder.wait_max, 6),
+        wait_histogram=histogram,
+    )
\ No newline at end of file
@@ -0,0 +1,175 @@
+"""Compact binary wire format for wallet events.
+
+Layout, little-endian:
+
+    version:u8  event_type:u8  timestamp  fields...
+
+``timestamp`` is microseconds since the epoch as i64, then a flag byte. The
+flag is 0 for a naive datetime; otherwise 1 is followed by the UTC offset in
+minutes as i16. Each event type writes a fixed sequence of fields, so no field
+names are sent.
+
+- Strings in canonical UUID form take 16 bytes behind a tag byte. Other
+  strings are UTF-8 behind a tag byte and a u16 length.
+- A missing optional string is a single tag byte.
+- A Decimal is its scaled integer coefficient as i64 plus its exponent as i8.
+  It decodes to the identical Decimal, trailing zeros included.
+
+The format is announced through the Kafka ``content-type`` header. A message
+without that header is JSON, so old and new messages can share a topic while
+a rollout is in progress.
+"""
+import re
+import struct
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Iterable, Optional, Tuple
+
+from shared.schemas.event_schema import (
+    EventType,
+    WalletCreatedEvent,
+    WalletFundedEvent,
+    TransferCompletedEvent,
+    TransferFailedEvent,
+    WalletEvent,
+)
+
+
+CONTENT_TYPE_HEADER = "content-type"
+JSON_CONTENT_TYPE = b"application/json"
+BINARY_CONTENT_TYPE = b"application/vnd.wallet-event+binary"
+
+BINARY_VERSION = 1
+
+_EPOCH = datetime(1970, 1, 1)
+_HEAD = struct.Struct("<BBqB")
+_OFFSET = struct.Struct("<h")
+_DECIMAL = struct.Struct("<qb")
+_LENGTH = struct.Struct("<H")
+
+_UUID, _TEXT, _NONE = 0, 1, 2
+_CANONICAL_UUID = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+
+# (type code, model, [(field, kind)]) with kind "s" string, "o" optional string, "d" Decimal
+_LAYOUTS = {
+    EventType.WALLET_CREATED: (0, WalletCreatedEvent, [
+        ("wallet_id", "s"), ("user_id", "s"), ("transaction_id", "s"), ("initial_balance", "d"),
+    ]),
+    EventType.WALLET_FUNDED: (1, WalletFundedEvent, [
+        ("wallet_id", "s"), ("user_id", "s"), ("transaction_id", "s"), ("amount", "d"), ("new_balance", "d"),
+    ]),
+    EventType.TRANSFER_COMPLETED: (2, TransferCompletedEvent, [
+        ("from_wallet_id", "s"), ("to_wallet_id", "s"), ("from_user_id", "s"), ("to_user_id", "s"),
+        ("amount", "d"), ("from_transaction_id", "s"), ("to_transaction_id", "s"),
+    ]),
+    EventType.TRANSFER_FAILED: (3, TransferFailedEvent, [
+        ("from_wallet_id", "s"), ("from_user_id", "s"), ("to_wallet_id", "s"), ("amount", "d"),
+        ("reason", "s"), ("transaction_id", "o"),
+    ]),
+}
+_BY_CODE = {code: (model, fields) for code, model, fields in _LAYOUTS.values()}
+
+
+class EventDecodeError(ValueError):
+    pass
+
+
+def content_type(headers: Optional[Iterable[Tuple[str, bytes]]]) -> bytes:
+    for key, value in headers or ():
+        if key.lower() == CONTENT_TYPE_HEADER:
+            return value
+    return JSON_CONTENT_TYPE
+
+
+def _encode_string(value: Optional[str], out: bytearray) -> None:
+    if value is None:
+        out.append(_NONE)
+        return
+    # Only the canonical lowercase form round-trips through 16 bytes
+    if len(value) == 36 and _CANONICAL_UUID.fullmatch(value):
+        out.append(_UUID)
+        out += bytes.fromhex(value.replace("-", ""))
+        return
+    raw = value.encode("utf-8")
+    out.append(_TEXT)
+    out += _LENGTH.pack(len(raw))
+    out += raw
+
+
+def _encode_decimal(value: Decimal, out: bytearray) -> None:
+    exponent = value.as_tuple().exponent
+    if not isinstance(exponent, int):
+        raise ValueError(f"Cannot encode non-finite amount {value}")
+    out += _DECIMAL.pack(int(value.scaleb(-exponent)), exponent)
+
+
+def _uuid_string(raw: bytes) -> str:
+    h = raw.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def encode_event(event: WalletEvent) -> bytes:
+    """Binary encoding of ``event``; raises ValueError for values the format cannot hold."""
+    code, _, fields = _LAYOUTS[event.event_type]
+    timestamp = event.timestamp
+    offset = timestamp.utcoffset()
+    since_epoch = timestamp.replace(tzinfo=None) - (offset or timedelta(0)) - _EPOCH
+    micros = (since_epoch.days * 86400 + since_epoch.seconds) * 1_000_000 + since_epoch.microseconds
+
+    out = bytearray(_HEAD.pack(BINARY_VERSION, code, micros, 0 if offset is None else 1))
+    if offset is not None:
+        out += _OFFSET.pack(offset // timedelta(minutes=1))
+    try:
+        for name, kind in fields:
+            value = getattr(event, name)
+            if kind == "d":
+                _encode_decimal(value, out)
+            else:
+                _encode_string(value, out)
+    except struct.error as e:
+        raise ValueError(f"Cannot encode {event.event_type.value} event: {e}") from e
+    return bytes(out)
+
+
+def decode_event(data: bytes) -> WalletEvent:
+    try:
+        version, code, micros, has_offset = _HEAD.unpack_from(data, 0)
+        if version != BINARY_VERSION:
+            raise EventDecodeError(f"Unsupported wallet event version {version}")
+        if code not in _BY_CODE:
+            raise EventDecodeError(f"Unknown wallet event type code {code}")
+        model, fields = _BY_CODE[code]
+
+        position = _HEAD.size
+        timestamp = _EPOCH + timedelta(microseconds=micros)
+        if has_offset:
+            (minutes,) = _OFFSET.unpack_from(data, position)
+            position += _OFFSET.size
+            tz = timezone(timedelta(minutes=minutes))
+            timestamp = (timestamp + timedelta(minutes=minutes)).replace(tzinfo=tz)
+
+        values = {"timestamp": timestamp}
+        for name, kind in fields:
+            if kind == "d":
+                coefficient, exponent = _DECIMAL.unpack_from(data, position)
+                position += _DECIMAL.size
+                values[name] = Decimal(f"{coefficient}E{exponent}")
+                continue
+            tag = data[position]
+            position += 1
+            if tag == _UUID:
+                values[name] = _uuid_string(data[position:position + 16])
+                position += 16
+            elif tag == _TEXT:
+                (length,) = _LENGTH.unpack_from(data, position)
+                position += _LENGTH.size
+                values[name] = bytes(data[position:position + length]).decode("utf-8")
+                position += length
+            elif tag == _NONE and kind == "o":
+                values[name] = None
+            else:
+                raise EventDecodeError(f"Bad string tag {tag} for {name}")
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise EventDecodeError(f"Truncated or corrupt wallet event: {e}") from e
+
+    return model.model_validate(values)
@@ -0,0 +1,254 @@
+"""On-demand profiling of single requests.
+
+A request is profiled when it carries ``X-Profile: <profiling_token>`` or is
+picked by ``profiling_sample_rate``. Its stacks are written in the collapsed
+("folded") format read by flamegraph.pl, speedscope and inferno, next to a
+JSON summary that splits wall time into SQL and Python and breaks SQL time
+down by repository method.
+
+Both profilers watch the thread running the event loop, so the stacks also
+show whatever other tasks the loop ran while the request was in flight; the
+SQL numbers are attributed to the request itself. One request per worker is
+profiled at a time.
+"""
+import asyncio
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+PROFILE_MODE_HEADER = "x-profile-mode"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+_current: ContextVar[Optional["RequestProfile"]] = ContextVar("request_profile", default=None)
+_active_lock = threading.Lock()
+
+
+def _label(code) -> str:
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _repository_frame(frame) -> Optional[str]:
+    qualname = getattr(frame.f_code, "co_qualname", "")
+    owner, _, method = qualname.partition(".")
+    return qualname if method and owner.endswith("Repository") else None
+
+
+def _repository_caller() -> str:
+    """Innermost ``*Repository`` method on the stack that issued the statement.
+
+    Under asyncio the statement runs in a greenlet whose frames do not link back
+    to the awaiting coroutines, so the current task's await chain is walked too.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        name = _repository_frame(frame)
+        if name:
+            return name
+        frame = frame.f_back
+
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    found = None
+    awaitable = task.get_coro() if task else None
+    while awaitable is not None:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+        if frame is not None:
+            found = _repository_frame(frame) or found
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+    return found or "(outside repositories)"
+
+
+class RequestProfile:
+    def __init__(self, name: str, mode: str):
+        self.name = name
+        self.mode = mode
+        self.started = time.perf_counter()
+        self.wall_seconds = 0.0
+        self.sql_seconds = 0.0
+        self.sql_statements = 0
+        self.repositories: Dict[str, List[float]] = {}
+        self.stacks: Counter = Counter()
+
+    def record_sql(self, caller: str, seconds: float) -> None:
+        self.sql_seconds += seconds
+        self.sql_statements += 1
+        totals = self.repositories.setdefault(caller, [0.0, 0])
+        totals[0] += seconds
+        totals[1] += 1
+
+    def summary(self) -> dict:
+        return {
+            "name": self.name,
+            "mode": self.mode,
+            # Folded stack weights: sample counts, or microseconds when deterministic
+            "stack_unit": "microseconds" if self.mode == "deterministic" else "samples",
+            "wall_seconds": round(self.wall_seconds, 6),
+            "sql_seconds": round(self.sql_seconds, 6),
+            "python_seconds": round(max(self.wall_seconds - self.sql_seconds, 0.0), 6),
+            "sql_statements": self.sql_statements,
+            "repositories": {
+                caller: {"sql_seconds": round(seconds, 6), "statements": count}
+                for caller, (seconds, count) in sorted(self.repositories.items(), key=lambda item: -item[1][0])
+            },
+        }
+
+    def folded(self) -> str:
+        return "".join(f"{';'.join(stack)} {int(weight)}\n" for stack, weight in self.stacks.items() if weight >= 1)
+
+
+class _Sampler:
+    """Samples one thread's stack from a helper thread every ``interval`` seconds."""
+
+    def __init__(self, profile: RequestProfile, interval: float):
+        self.profile = profile
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_label(frame.f_code))
+                frame = frame.f_back
+            self.profile.stacks[tuple(reversed(stack))] += 1
+
+
+class _Tracer:
+    """Deterministic profiler: every call and return on this thread, timed exactly."""
+
+    def __init__(self, profile: RequestProfile):
+        self.profile = profile
+        self.stack: List[str] = []
+        self.last = 0
+
+    def start(self) -> None:
+        self.last = time.perf_counter_ns()
+        sys.setprofile(self)
+
+    def stop(self) -> None:
+        sys.setprofile(None)
+
+    def __call__(self, frame, event_name, arg):
+        now = time.perf_counter_ns()
+        if self.stack:
+            self.profile.stacks[tuple(self.stack)] += (now - self.last) / 1000
+        if event_name == "call":
+            self.stack.append(_label(frame.f_code))
+        elif event_name == "c_call":
+            self.stack.append(getattr(arg, "__qualname__", repr(arg)))
+        # Frames that were already running when tracing began return past the bottom
+        elif self.stack:
+            self.stack.pop()
+        self.last = time.perf_counter_ns()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time each statement of a profiled request. Pass ``engine.sync_engine`` for async engines."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        profile = _current.get()
+        if profile is not None:
+            context._profile_caller = _repository_caller()
+            context._profile_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        profile = _current.get()
+        started = getattr(context, "_profile_started", None)
+        if profile is not None and started is not None:
+            profile.record_sql(context._profile_caller, time.perf_counter() - started)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requests picked by the admin header or the sample rate."""
+
+    def __init__(self, app, settings):
+        self.app = app
+        self.token = settings.profiling_token
+        self.sample_rate = settings.profiling_sample_rate
+        self.mode = settings.profiling_mode
+        self.interval = settings.profiling_interval_ms / 1000
+        self.directory = settings.profiling_dir
+
+    def _requested_mode(self, scope) -> Optional[str]:
+        headers = dict(scope.get("headers") or [])
+        token = headers.get(PROFILE_HEADER.encode())
+        if self.token and token is not None and hmac.compare_digest(token, self.token.encode()):
+            mode = headers.get(PROFILE_MODE_HEADER.encode(), b"").decode() or self.mode
+            return mode if mode in ("sampling", "deterministic") else self.mode
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return self.mode
+        return None
+
+    async def __call__(self, scope, receive, send):
+        mode = self._requested_mode(scope) if scope["type"] == "http" else None
+        if mode is None or not _active_lock.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        path = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{scope['method']}-{path}-{uuid.uuid4().hex[:8]}"
+        profile = RequestProfile(name, mode)
+        profiler = _Tracer(profile) if mode == "deterministic" else _Sampler(profile, self.interval)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (PROFILE_ID_HEADER, name.encode())]
+            await send(message)
+
+        token = _current.set(profile)
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profiler.stop()
+            _current.reset(token)
+            _active_lock.release()
+            profile.wall_seconds = time.perf_counter() - profile.started
+            await asyncio.to_thread(self._write, profile)
+
+    def _write(self, profile: RequestProfile) -> None:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            base = os.path.join(self.directory, profile.name)
+            with open(f"{base}.folded", "w") as f:
+                f.write(profile.folded())
+            summary = profile.summary()
+            with open(f"{base}.json", "w") as f:
+                json.dump(summary, f, indent=2)
+            logger.info(
+                f"Profiled {profile.name}: {summary['wall_seconds']}s wall, "
+                f"{summary['sql_seconds']}s SQL in {summary['sql_statements']} statements"
+            )
+        except OSError as e:
+            logger.error(f"Could not write profile {profile.name}: {e}")
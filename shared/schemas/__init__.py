@@ -5,6 +5,7 @@ from .event_schema import (
     TransferCompletedEvent,
     TransferFailedEvent,
     WalletEvent,
+    EVENT_MODELS,
 )
 
 
@@ -15,4 +16,5 @@ __all__ = [
     "TransferCompletedEvent",
     "TransferFailedEvent",
     "WalletEvent",
+    "EVENT_MODELS",
 ]
\ No newline at end of file
@@ -51,4 +51,12 @@ class TransferFailedEvent(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.now)
 
 
-WalletEvent = WalletCreatedEvent | WalletFundedEvent | TransferCompletedEvent | TransferFailedEvent
\ No newline at end of file
+WalletEvent = WalletCreatedEvent | WalletFundedEvent | TransferCompletedEvent | TransferFailedEvent
+
+
+EVENT_MODELS: dict[EventType, type[BaseModel]] = {
+    EventType.WALLET_CREATED: WalletCreatedEvent,
+    EventType.WALLET_FUNDED: WalletFundedEvent,
+    EventType.TRANSFER_COMPLETED: TransferCompletedEvent,
+    EventType.TRANSFER_FAILED: TransferFailedEvent,
+}
\ No newline at end of file
@@ -0,0 +1,41 @@
+"""One JSON layer for Kafka payloads, JSONB columns and HTTP responses, on orjson.
+
+Decimals are written as strings in the same form ``str()`` and pydantic use,
+so no amount is ever rounded through a float. Datetimes use ISO 8601 like
+``datetime.isoformat()``. Pydantic models go straight through their compiled
+serializer.
+"""
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    if isinstance(value, BaseModel):
+        return value.__pydantic_serializer__.to_json(value)
+    return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def dumps_str(value: Any) -> str:
+    """``dumps`` for APIs that want text, such as SQLAlchemy's ``json_serializer``."""
+    return dumps(value).decode("utf-8")
+
+
+def loads(data: bytes | str) -> Any:
+    return orjson.loads(data)
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
\ No newline at end of file
@@ -119,6 +119,25 @@ class TestConcurrentFunding:
 
         assert amounts_in_history == expected_amounts
 
+    def test_coalesced_funds_keep_per_request_results(self, test_wallet):
+        wallet_id = test_wallet["id"]
+        amounts = [Decimal(n) for n in range(1, 21)]
+
+        with ThreadPoolExecutor(max_workers=len(amounts)) as executor:
+            responses = list(executor.map(lambda amt: fund_wallet(wallet_id, amt), amounts))
+
+        # Each caller sees the wallet right after its own fund, as if they ran one by one
+        versions = sorted(r["version"] for r in responses)
+        assert versions == list(range(1, len(amounts) + 1))
+        by_version = sorted(responses, key=lambda r: r["version"])
+        for previous, current in zip(by_version, by_version[1:]):
+            assert Decimal(current["balance"]) > Decimal(previous["balance"])
+        assert Decimal(by_version[-1]["balance"]) == sum(amounts)
+
+        history = wait_for_history_events(wallet_id, expected_count=1 + len(amounts), timeout=20)
+        funding_events = [e for e in history["events"] if e["event_type"] == "WALLET_FUNDED"]
+        assert len({e["event_data"]["transaction_id"] for e in funding_events}) == len(amounts)
+
 
 @pytest.mark.concurrent
 class TestConcurrentTransfers:
@@ -170,6 +189,40 @@ class TestConcurrentTransfers:
             receiver_balance = Decimal(receiver["balance"])
             assert receiver_balance == transfer_amount
 
+    def test_concurrent_transfers_between_sharded_wallets(self, unique_user_id):
+        # Funds land in slots, so every transfer folds the sender's slots while
+        # crediting a slot of the other wallet
+        wallet_a = create_test_wallet(unique_user_id, balance_shards=4)["id"]
+        wallet_b = create_test_wallet(unique_user_id, balance_shards=4)["id"]
+        fund_wallet(wallet_a, Decimal("100"))
+        fund_wallet(wallet_b, Decimal("100"))
+
+        transfer_amount = Decimal("1.00")
+        num_transfers = 20
+
+        def attempt_transfer(from_id: str, to_id: str) -> str:
+            try:
+                transfer_funds(from_id, to_id, transfer_amount)
+                return "Success"
+            except AssertionError as e:
+                return str(e)
+
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            futures = [
+                executor.submit(attempt_transfer, *pair)
+                for _ in range(num_transfers)
+                for pair in ((wallet_a, wallet_b), (wallet_b, wallet_a))
+            ]
+            results = [f.result() for f in as_completed(futures)]
+
+        failures = [result for result in results if result != "Success"]
+        assert not failures, f"A<->B transfers failed: {failures[:3]}"
+
+        balance_a = Decimal(get_wallet(wallet_a)["balance"])
+        balance_b = Decimal(get_wallet(wallet_b)["balance"])
+        assert balance_a == Decimal("100")
+        assert balance_b == Decimal("100")
+
 
 @pytest.mark.concurrent
 class TestHighLoad:
@@ -1,13 +1,22 @@
+import csv
+import io
+import json
 import pytest
 import requests
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
 
 
-from tests.constants import WALLET_SERVICE_URL
+from tests.constants import WALLET_SERVICE_URL, HISTORY_SERVICE_URL
 from tests.utils import (
     create_test_wallet, 
+    batch_transfer,
     fund_wallet,
     get_wallet,
+    get_wallet_history,
+    get_wallet_transactions,
+    run_in_history_service,
     transfer_funds,
     wait_for_history_events,
     wait_for_user_activity
@@ -59,6 +68,73 @@ class TestBasicWalletFlow:
         assert Decimal(funding_event["amount"]) == fund_amount
         assert creation_event["event_type"] == "WALLET_CREATED"
 
+    def test_fund_retry_with_idempotency_key_is_applied_once(self, test_wallet):
+        wallet_id = test_wallet["id"]
+        key = f"fund-{uuid.uuid4()}"
+
+        first = fund_wallet(wallet_id, Decimal("25"), idempotency_key=key)
+        retry = fund_wallet(wallet_id, Decimal("25"), idempotency_key=key)
+        assert retry == first
+        assert Decimal(get_wallet(wallet_id)["balance"]) == Decimal("25")
+
+        response = requests.post(
+            f"{WALLET_SERVICE_URL}/wallets/{wallet_id}/fund",
+            json={"amount": "30"},
+            headers={"Idempotency-Key": key}
+        )
+        assert response.status_code == 422
+
+    def test_cached_wallet_reads_see_own_writes(self, test_wallet):
+        wallet_id = test_wallet["id"]
+
+        assert Decimal(get_wallet(wallet_id)["balance"]) == Decimal("0")
+        assert Decimal(get_wallet(wallet_id)["balance"]) == Decimal("0")
+
+        fund_wallet(wallet_id, Decimal("40"))
+        wallet = get_wallet(wallet_id)
+        assert Decimal(wallet["balance"]) == Decimal("40")
+        assert wallet["version"] == 1
+
+        response = requests.get(f"{WALLET_SERVICE_URL}/cache/stats")
+        assert response.status_code == 200
+        assert response.json()["invalidations"] >= 1
+
+    def test_metrics_record_operation_latency(self, test_wallet):
+        fund_wallet(test_wallet["id"], Decimal("10"))
+
+        response = requests.get(f"{WALLET_SERVICE_URL}/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'wallet_service_operation_seconds_count{operation="fund_wallet",outcome="ok"}' in response.text
+
+        response = requests.get(f"{HISTORY_SERVICE_URL}/metrics")
+        assert response.status_code == 200
+        assert "# TYPE history_service_operation_seconds histogram" in response.text
+
+    def test_wallet_transactions_are_cursor_paginated(self, test_wallet):
+        wallet_id = test_wallet["id"]
+        for amount in ["1", "2", "3", "4", "5"]:
+            fund_wallet(wallet_id, Decimal(amount))
+
+        # Creation ledger row + 5 funds, walked two at a time
+        seen = []
+        cursor = None
+        for _ in range(3):
+            page = get_wallet_transactions(wallet_id, limit=2, cursor=cursor)
+            assert len(page["transactions"]) == 2
+            seen.extend(t["id"] for t in page["transactions"])
+            cursor = page["next_cursor"]
+
+        assert cursor is None
+        assert len(set(seen)) == 6
+        assert Decimal(page["transactions"][-1]["amount"]) == Decimal("0")
+
+        response = requests.get(
+            f"{WALLET_SERVICE_URL}/wallets/{wallet_id}/transactions",
+            params={"cursor": "not-a-cursor"}
+        )
+        assert response.status_code == 400
+
     def test_multiple_funding_operations(self, test_wallet):
         wallet_id = test_wallet["id"]
 
@@ -156,6 +232,74 @@ class TestTransferFlow:
         transfer_event_a = history_a["events"][0]
         assert transfer_event_a["event_type"] == "TRANSFER_FAILED"
 
+
+    def test_batch_transfer_reports_per_item_results(self, two_test_wallets):
+        wallet_a, wallet_b = two_test_wallets
+        wallet_a_id = wallet_a["id"]
+        wallet_b_id = wallet_b["id"]
+
+        result = batch_transfer([
+            {"from_wallet_id": wallet_a_id, "to_wallet_id": wallet_b_id, "amount": Decimal("60")},
+            {"from_wallet_id": wallet_a_id, "to_wallet_id": wallet_b_id, "amount": Decimal("60")},
+            {"from_wallet_id": wallet_b_id, "to_wallet_id": wallet_a_id, "amount": Decimal("10")},
+        ])
+
+        assert result["succeeded"] == 2
+        assert result["failed"] == 1
+        statuses = [r["status"] for r in result["results"]]
+        assert statuses == ["COMPLETED", "FAILED", "COMPLETED"]
+        assert "insufficient" in result["results"][1]["detail"].lower()
+
+        assert Decimal(get_wallet(wallet_a_id)["balance"]) == Decimal("50")
+        assert Decimal(get_wallet(wallet_b_id)["balance"]) == Decimal("50")
+
+        # wallet_a: creation + funding + 2 transfers + 1 failed transfer
+        history_a = wait_for_history_events(wallet_a_id, expected_count=5, timeout=10)
+        event_types = [e["event_type"] for e in history_a["events"]]
+        assert event_types.count("TRANSFER_COMPLETED") == 2
+        assert event_types.count("TRANSFER_FAILED") == 1
+
+    def test_concurrent_transfer_retries_move_money_once(self, two_test_wallets):
+        wallet_a, wallet_b = two_test_wallets
+        wallet_a_id = wallet_a["id"]
+        wallet_b_id = wallet_b["id"]
+        key = f"transfer-{uuid.uuid4()}"
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            responses = list(executor.map(
+                lambda _: transfer_funds(wallet_a_id, wallet_b_id, Decimal("30"), idempotency_key=key),
+                range(5)
+            ))
+
+        assert all(r == responses[0] for r in responses)
+        assert Decimal(get_wallet(wallet_a_id)["balance"]) == Decimal("70")
+        assert Decimal(get_wallet(wallet_b_id)["balance"]) == Decimal("30")
+
+    def test_sharded_wallet_balance_spans_slots(self, test_wallet):
+        sender_id = test_wallet["id"]
+        merchant_id = create_test_wallet(balance_shards=4)["id"]
+
+        fund_wallet(sender_id, Decimal("100"))
+        for _ in range(5):
+            transfer_funds(sender_id, merchant_id, Decimal("10"))
+        fund_wallet(merchant_id, Decimal("5"))
+
+        merchant = get_wallet(merchant_id)
+        assert Decimal(merchant["balance"]) == Decimal("55")
+        assert merchant["version"] == 6
+
+        # Spending more than any single slot holds consolidates the slots
+        transfer_funds(merchant_id, sender_id, Decimal("55"))
+        assert Decimal(get_wallet(merchant_id)["balance"]) == Decimal("0")
+        assert Decimal(get_wallet(sender_id)["balance"]) == Decimal("105")
+
+        response = requests.put(
+            f"{WALLET_SERVICE_URL}/wallets/{merchant_id}/shards",
+            json={"balance_shards": 0}
+        )
+        assert response.status_code == 200
+        assert Decimal(response.json()["balance"]) == Decimal("0")
+
     
 @pytest.mark.integration
 class TestUserActivityTracking:
@@ -193,6 +337,84 @@ class TestUserActivityTracking:
         assert wallet_1["id"] in wallet_ids_in_activity
         assert wallet_2["id"] in wallet_ids_in_activity
 
+    def test_wallet_history_is_cursor_paginated(self, test_wallet):
+        wallet_id = test_wallet["id"]
+        for amount in ["1", "2", "3", "4", "5"]:
+            fund_wallet(wallet_id, Decimal(amount))
+        wait_for_history_events(wallet_id, expected_count=6, timeout=15)
+
+        # Creation event + 5 funds, walked two at a time
+        seen = []
+        cursor = None
+        for _ in range(3):
+            page = get_wallet_history(wallet_id, limit=2, cursor=cursor)
+            assert len(page["events"]) == 2
+            assert page["total"] == 6
+            seen.extend(e["event_data"]["transaction_id"] for e in page["events"])
+            cursor = page["next_cursor"]
+
+        assert cursor is None
+        assert len(set(seen)) == 6
+
+        # Offset paging still works and walks the same order
+        offset_page = get_wallet_history(wallet_id, limit=2, offset=2)
+        assert [e["event_data"]["transaction_id"] for e in offset_page["events"]] == seen[2:4]
+
+        response = requests.get(
+            f"{HISTORY_SERVICE_URL}/history/wallets/{wallet_id}",
+            params={"cursor": "not-a-cursor"}
+        )
+        assert response.status_code == 400
+
+    def test_wallet_history_export_streams_every_event(self, test_wallet):
+        wallet_id = test_wallet["id"]
+        fund_wallet(wallet_id, Decimal("10"))
+        fund_wallet(wallet_id, Decimal("20"))
+        wait_for_history_events(wallet_id, expected_count=3, timeout=15)
+
+        response = requests.get(f"{HISTORY_SERVICE_URL}/history/wallets/{wallet_id}/export")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        events = [json.loads(line) for line in response.text.splitlines()]
+        # Oldest first, starting with the creation event
+        assert [e["event_type"] for e in events] == ["WALLET_CREATED", "WALLET_FUNDED", "WALLET_FUNDED"]
+        assert all(e["wallet_id"] == wallet_id for e in events)
+
+        # requests undoes Content-Encoding: gzip transparently
+        response = requests.get(
+            f"{HISTORY_SERVICE_URL}/history/wallets/{wallet_id}/export",
+            params={"format": "csv", "gzip": "true"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert len(rows) == 3
+        assert [Decimal(r["amount"]) for r in rows] == [Decimal("0"), Decimal("10"), Decimal("20")]
+
+    def test_counter_repair_resets_totals_of_retired_events(self, test_wallet):
+        wallet_id = test_wallet["id"]
+        fund_wallet(wallet_id, Decimal("10"))
+        assert wait_for_history_events(wallet_id, expected_count=2)["total"] == 2
+
+        # Retiring a partition removes its events but leaves their counters;
+        # remove this wallet's events the same way, then run one repair pass
+        run_in_history_service(f"""
+            import asyncio
+            from sqlalchemy import delete
+            from app.database import SessionLocal
+            from app.models import TransactionEvent
+            from app.services.counter_repair_service import counter_repair
+
+            with SessionLocal() as db:
+                db.execute(delete(TransactionEvent).where(TransactionEvent.wallet_id == {wallet_id!r}))
+                db.commit()
+            asyncio.run(counter_repair.repair_once())
+        """)
+
+        history = get_wallet_history(wallet_id)
+        assert history["events"] == []
+        assert history["total"] == 0
+
 
 @pytest.mark.integration
 class TestDataConsistency:
@@ -1,7 +1,12 @@
+import os
 import requests
+import subprocess
+import sys
+import textwrap
 import time
 import uuid
-from typing import Dict, Optional
+from pathlib import Path
+from typing import Dict, List, Optional
 from decimal import Decimal
 
 
@@ -58,11 +63,14 @@ def wait_for_user_activity(user_id: str, expected_count: int, timeout: int = DEF
         f"Timeout waiting for {expected_count} events for user {user_id}"
     )
 
-def create_test_wallet(user_id: Optional[str] = None) -> Dict:
+def create_test_wallet(user_id: Optional[str] = None, balance_shards: int = 0) -> Dict:
     if user_id is None:
         user_id = f"test-user-{uuid.uuid4()}"
 
-    response = requests.post(f"{WALLET_SERVICE_URL}/wallets", json={"user_id": user_id})
+    response = requests.post(
+        f"{WALLET_SERVICE_URL}/wallets",
+        json={"user_id": user_id, "balance_shards": balance_shards}
+    )
 
     assert response.status_code == 200, f"Failed to create wallet: {response.text}"
     
@@ -70,23 +78,68 @@ def create_test_wallet(user_id: Optional[str] = None) -> Dict:
     print(f"Created test wallet: {wallet['id']} for user {user_id}")
     return wallet
 
-def fund_wallet(wallet_id: str, amount: Decimal) -> Dict:
-    response = requests.post(f"{WALLET_SERVICE_URL}/wallets/{wallet_id}/fund", json={"amount": str(amount)})
+def fund_wallet(wallet_id: str, amount: Decimal, idempotency_key: Optional[str] = None) -> Dict:
+    headers = {"Idempotency-Key": idempotency_key} if idempotency_key else {}
+    response = requests.post(
+        f"{WALLET_SERVICE_URL}/wallets/{wallet_id}/fund",
+        json={"amount": str(amount)},
+        headers=headers
+    )
     assert response.status_code == 200, f"Failed to fund wallet: {response.text}"
     return response.json()
 
-def transfer_funds(from_wallet_id: str, to_wallet_id: str, amount: Decimal) -> Dict:
+def transfer_funds(from_wallet_id: str, to_wallet_id: str, amount: Decimal, idempotency_key: Optional[str] = None) -> Dict:
+    headers = {"Idempotency-Key": idempotency_key} if idempotency_key else {}
     response = requests.post(
         f"{WALLET_SERVICE_URL}/wallets/{from_wallet_id}/transfer",
         json={
             "to_wallet_id": to_wallet_id,
             "amount": str(amount)
-        }
+        },
+        headers=headers
     )
     assert response.status_code == 200, f"Failed to transfer: {response.text}"
     return response.json()
 
+def batch_transfer(transfers: List[Dict]) -> Dict:
+    response = requests.post(
+        f"{WALLET_SERVICE_URL}/wallets/transfers/batch",
+        json={
+            "transfers": [
+                {**t, "amount": str(t["amount"])} for t in transfers
+            ]
+        }
+    )
+    assert response.status_code == 200, f"Failed to batch transfer: {response.text}"
+    return response.json()
+
 def get_wallet(wallet_id: str) -> Dict:
     response = requests.get(f"{WALLET_SERVICE_URL}/wallets/{wallet_id}")
     assert response.status_code == 200, f"Failed to get wallet: {response.text}"
     return response.json()
+
+def get_wallet_transactions(wallet_id: str, limit: int = 50, cursor: Optional[str] = None) -> Dict:
+    params = {"limit": limit}
+    if cursor:
+        params["cursor"] = cursor
+    response = requests.get(f"{WALLET_SERVICE_URL}/wallets/{wallet_id}/transactions", params=params)
+    assert response.status_code == 200, f"Failed to get transactions: {response.text}"
+    return response.json()
+
+def get_wallet_history(wallet_id: str, limit: int = 50, offset: int = 0, cursor: Optional[str] = None) -> Dict:
+    params = {"limit": limit, "offset": offset}
+    if cursor:
+        params["cursor"] = cursor
+    response = requests.get(f"{HISTORY_SERVICE_URL}/history/wallets/{wallet_id}", params=params)
+    assert response.status_code == 200, f"Failed to get history: {response.text}"
+    return response.json()
+
+def run_in_history_service(code: str) -> None:
+    """Run ``code`` in a history-service interpreter, configured from ../.env like the service itself."""
+    root = Path(__file__).resolve().parent.parent
+    subprocess.run(
+        [sys.executable, "-c", textwrap.dedent(code)],
+        cwd=root / "history-service",
+        env={**os.environ, "PYTHONPATH": str(root)},
+        check=True,
+    )
\ No newline at end of file
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
+from typing import Literal, Optional
 
 
 class Settings(BaseSettings):
@@ -9,8 +10,50 @@ class Settings(BaseSettings):
     postgres_host: str = "localhost"
     postgres_port: int = 5432
 
+    # Connection pool; db_pool_size <= 0 opens a connection per checkout (NullPool)
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: float = 30.0
+    db_pool_recycle_seconds: int = 1800
+    db_pool_pre_ping: bool = True
+    # Behind PgBouncer in transaction mode: no reuse of named prepared statements
+    db_pgbouncer_transaction_mode: bool = False
+
     kafka_broker: str
     kafka_topic: str = "wallet_events"
+    # "pipelined" sends every key of an event/batch before awaiting acks;
+    # "sequential" awaits each send_and_wait in turn
+    kafka_producer_mode: Literal["pipelined", "sequential"] = "pipelined"
+    kafka_linger_ms: int = 5
+    kafka_max_batch_size: int = 65536
+    kafka_compression_type: Optional[Literal["gzip", "snappy", "lz4", "zstd"]] = None
+    kafka_flush_timeout_seconds: float = 10.0
+    # "binary" sends the compact shared.event_codec format; roll consumers out first
+    kafka_event_encoding: Literal["json", "binary"] = "json"
+
+    outbox_batch_size: int = 500
+    outbox_poll_interval_ms: int = 50
+    outbox_retention_hours: int = 24
+
+    idempotency_cache_size: int = 10000
+    idempotency_retention_hours: int = 24
+
+    # Concurrent funds to one wallet are gathered for up to the window and applied together.
+    # Off by default: every fund, contended or not, waits out the window
+    fund_coalescing: bool = False
+    fund_coalesce_window_ms: float = 2.0
+    fund_coalesce_max_batch: int = 100
+
+    # Per-worker read cache; the TTL bounds staleness of writes made by other workers (0 disables)
+    wallet_cache_ttl_ms: int = 500
+    wallet_cache_max_entries: int = 10000
+
+    # On-demand request profiling: send "X-Profile: <profiling_token>" or set a sample rate
+    profiling_token: Optional[str] = None
+    profiling_sample_rate: float = 0.0
+    profiling_mode: Literal["sampling", "deterministic"] = "sampling"
+    profiling_interval_ms: float = 1.0
+    profiling_dir: str = "profiles"
 
     app_name: str = "Wallet Service"
     debug: bool = True
@@ -24,6 +67,13 @@ class Settings(BaseSettings):
             f"postgresql://{self.postgres_user}:{self.postgres_password}"
             f"@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
         )
+
+    @property
+    def async_database_url(self) -> str:
+        return (
+            f"postgresql+asyncpg://{self.postgres_user}:{self.postgres_password}"
+            f"@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
+        )
     
 
 @lru_cache
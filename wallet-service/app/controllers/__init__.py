@@ -1,4 +1,7 @@
 from app.controllers.wallet_controller import router as wallet_router
 from app.controllers.user_controller import router as user_router
+from app.controllers.cache_controller import router as cache_router
+from app.controllers.pool_controller import router as pool_router
+from app.controllers.metrics_controller import router as metrics_router
 
-__all__ = ["wallet_router", "user_router"]
\ No newline at end of file
+__all__ = ["wallet_router", "user_router", "cache_router", "pool_router", "metrics_router"]
\ No newline at end of file
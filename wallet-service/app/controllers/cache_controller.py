@@ -0,0 +1,12 @@
+from app.schemas import CacheStatsResponse
+from app.services import wallet_cache
+from fastapi import APIRouter
+
+
+router = APIRouter(prefix="/cache", tags=["cache"])
+
+
+@router.get("/stats", response_model = CacheStatsResponse)
+async def get_cache_stats():
+    # Counters are per worker process
+    return wallet_cache.stats()
\ No newline at end of file
@@ -0,0 +1,12 @@
+from shared.metrics import REGISTRY, CONTENT_TYPE
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics")
+async def get_metrics():
+    # Prometheus text exposition format; values are per worker process
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
\ No newline at end of file
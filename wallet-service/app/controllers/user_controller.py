@@ -9,6 +9,6 @@ router = APIRouter(prefix="/users", tags=["users"])
 
 
 @router.get("/{user_id}/wallets", response_model = WalletListResponse)
-def get_user_wallets(user_id: str, service: Annotated[WalletService, Depends(get_wallet_service)]):
-    wallets = service.get_user_wallets(user_id)
+async def get_user_wallets(user_id: str, service: Annotated[WalletService, Depends(get_wallet_service)]):
+    wallets = await service.get_user_wallets(user_id)
     return WalletListResponse(wallets=wallets, total=len(wallets))
\ No newline at end of file
@@ -2,16 +2,25 @@ from app.schemas import (
     CreateWalletRequest, 
     FundWalletRequest, 
     TransferRequest,
+    BatchTransferRequest,
+    ShardWalletRequest,
     WalletResponse,
     TransferResponse,
+    TransactionPageResponse,
+    BatchTransferResponse,
 )
 from app.services import WalletService
-from typing import Annotated
-from fastapi import APIRouter, Depends
+from typing import Annotated, Optional
+from fastapi import APIRouter, Depends, Header, Query
 from app.dependencies import get_wallet_service
 
 router = APIRouter(prefix="/wallets", tags=["wallets"])
 
+IdempotencyKeyHeader = Annotated[
+    Optional[str],
+    Header(min_length=1, max_length=200, description="Retries with the same key replay the first response"),
+]
+
 
 @router.post("", response_model= WalletResponse)
 async def create_wallet(
@@ -21,23 +30,50 @@ async def create_wallet(
     return await service.create_wallet(request)
 
 
+@router.post("/transfers/batch", response_model = BatchTransferResponse)
+async def transfer_funds_batch(
+    request: BatchTransferRequest,
+    service: Annotated[WalletService, Depends(get_wallet_service)]
+):
+    return await service.transfer_funds_batch(request)
+
+
 @router.post("/{wallet_id}/fund", response_model = WalletResponse)
 async def fund_wallet(
     wallet_id: str,
     request: FundWalletRequest,
-    service: Annotated[WalletService, Depends(get_wallet_service)]
+    service: Annotated[WalletService, Depends(get_wallet_service)],
+    idempotency_key: IdempotencyKeyHeader = None,
 ):
-    return await service.fund_wallet(wallet_id, request)
+    return await service.fund_wallet(wallet_id, request, idempotency_key)
 
 
 @router.post("/{wallet_id}/transfer", response_model = TransferResponse)
 async def transfer_funds(
     wallet_id: str,
     request: TransferRequest,
+    service: Annotated[WalletService, Depends(get_wallet_service)],
+    idempotency_key: IdempotencyKeyHeader = None,
+):
+    return await service.transfer_funds(wallet_id, request, idempotency_key)
+
+@router.put("/{wallet_id}/shards", response_model = WalletResponse)
+async def set_balance_shards(
+    wallet_id: str,
+    request: ShardWalletRequest,
     service: Annotated[WalletService, Depends(get_wallet_service)]
 ):
-    return await service.transfer_funds(wallet_id, request)
+    return await service.set_balance_shards(wallet_id, request)
+
+@router.get("/{wallet_id}/transactions", response_model = TransactionPageResponse)
+async def get_wallet_transactions(
+    wallet_id: str,
+    service: Annotated[WalletService, Depends(get_wallet_service)],
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+):
+    return await service.get_wallet_transactions(wallet_id, limit, cursor)
 
 @router.get("/{wallet_id}", response_model = WalletResponse)
 async def get_wallet(wallet_id: str, service: Annotated[WalletService, Depends(get_wallet_service)]):
-    return service.get_wallet(wallet_id)
\ No newline at end of file
+    return await service.get_wallet(wallet_id)
\ No newline at end of file
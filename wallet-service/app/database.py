@@ -1,17 +1,22 @@
-from typing import Generator
-from sqlalchemy import create_engine
-from sqlalchemy.orm import DeclarativeBase, sessionmaker, Session
+from typing import AsyncGenerator
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase
 from app.config import get_settings
+from shared.db_pool import engine_options
+from shared.serialization import dumps_str, loads
 
 settings = get_settings()
 
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
+engine = create_async_engine(
+    settings.async_database_url,
+    json_serializer=dumps_str,
+    json_deserializer=loads,
+    **engine_options(settings, is_async=True),
 )
 
-SessionLocal = sessionmaker(
+SessionLocal = async_sessionmaker(
     autoflush=False,
+    expire_on_commit=False,
     bind=engine
 )
 
@@ -19,9 +24,6 @@ class Base(DeclarativeBase):
     pass
 
 
-def get_db() -> Generator[Session, None, None]:
-    db = SessionLocal()
-    try:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
@@ -1,9 +1,9 @@
 from app.database import get_db
 from app.services import WalletService
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Annotated
 from fastapi import Depends
 
 
-def get_wallet_service(db: Annotated[Session, Depends(get_db)]) -> WalletService:
+def get_wallet_service(db: Annotated[AsyncSession, Depends(get_db)]) -> WalletService:
     return WalletService(db)
\ No newline at end of file
@@ -4,5 +4,6 @@ class InsufficientBalanceError(Exception):
 class WalletNotFoundError(Exception):
     pass
 
-class OptimisticLockError(Exception):
-    pass
+
+class IdempotencyKeyReusedError(Exception):
+    pass
\ No newline at end of file
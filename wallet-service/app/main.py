@@ -1,6 +1,12 @@
-from app.exceptions import WalletNotFoundError, InsufficientBalanceError, OptimisticLockError
-from app.services import kafka_producer
-from app.controllers import wallet_router, user_router
+from app.exceptions import WalletNotFoundError, InsufficientBalanceError, IdempotencyKeyReusedError
+from app.services import kafka_producer, outbox_relay
+from app.controllers import wallet_router, user_router, cache_router, pool_router, metrics_router
+from app.metrics import ERRORS
+from app.config import get_settings
+from app.database import engine
+from shared.profiling import ProfilingMiddleware, instrument_engine
+from shared.serialization import ORJSONResponse
+from shared.pagination import InvalidCursorError
 
 
 from contextlib import asynccontextmanager
@@ -8,12 +14,15 @@ import logging
 
 
 from fastapi import FastAPI, Request
+from sqlalchemy.exc import DBAPIError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
 
 
 logger = logging.getLogger(__name__)
 
+# deadlock_detected, serialization_failure
+RETRYABLE_SQLSTATES = {"40P01", "40001"}
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -22,13 +31,19 @@ async def lifespan(app: FastAPI):
     await kafka_producer.start()
     logger.info("Kafka producer started")
 
+    await outbox_relay.start()
+
     yield
 
+    await outbox_relay.stop()
     await kafka_producer.stop()
     logger.info("App stopped, Kafka disconnected")
 
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+
+instrument_engine(engine.sync_engine)
+app.add_middleware(ProfilingMiddleware, settings=get_settings())
 
 app.add_middleware(
     CORSMiddleware,
@@ -40,27 +55,51 @@ app.add_middleware(
 
 @app.exception_handler(WalletNotFoundError)
 async def wallet_not_found_handler(request: Request, exc: WalletNotFoundError):
-    return JSONResponse(
+    ERRORS.inc("WalletNotFoundError")
+    return ORJSONResponse(
         status_code=404,
         content={"detail": str(exc)}
     )
 
 @app.exception_handler(InsufficientBalanceError)
 async def insufficient_balance_handler(request: Request, exc: InsufficientBalanceError):
-    return JSONResponse(
+    ERRORS.inc("InsufficientBalanceError")
+    return ORJSONResponse(
         status_code=400,
         content={"detail": str(exc)}
     )
 
-@app.exception_handler(OptimisticLockError)
-async def optimistic_lock_handler(request: Request, exc: OptimisticLockError):
-    return JSONResponse(
-        status_code=409,
+@app.exception_handler(IdempotencyKeyReusedError)
+async def idempotency_key_reused_handler(request: Request, exc: IdempotencyKeyReusedError):
+    return ORJSONResponse(
+        status_code=422,
         content={"detail": str(exc)}
     )
 
+@app.exception_handler(InvalidCursorError)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursorError):
+    return ORJSONResponse(
+        status_code=400,
+        content={"detail": str(exc)}
+    )
+
+@app.exception_handler(DBAPIError)
+async def db_error_handler(request: Request, exc: DBAPIError):
+    # A deadlock or serialization failure rolled the whole transaction back,
+    # so the client can safely retry it
+    if getattr(exc.orig, "sqlstate", None) not in RETRYABLE_SQLSTATES:
+        raise exc
+    ERRORS.inc("ConcurrentUpdateConflict")
+    return ORJSONResponse(
+        status_code=409,
+        content={"detail": "Concurrent update conflict, please retry"}
+    )
+
 app.include_router(wallet_router)
 app.include_router(user_router)
+app.include_router(cache_router)
+app.include_router(pool_router)
+app.include_router(metrics_router)
 
 @app.get("/")
 async def root():
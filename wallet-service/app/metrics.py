@@ -0,0 +1,36 @@
+from shared.metrics import Counter, Histogram
+
+
+OPERATION_LATENCY = Histogram(
+    "wallet_service_operation_seconds",
+    "WalletService method latency by outcome (ok or exception class)",
+    ["operation", "outcome"],
+)
+
+ERRORS = Counter(
+    "wallet_service_errors_total",
+    "Domain errors returned to clients",
+    ["error"],
+)
+
+IDEMPOTENT_REPLAYS = Counter(
+    "wallet_service_idempotent_replays_total",
+    "Requests answered from a stored Idempotency-Key response",
+)
+
+FUND_BATCH_SIZE = Histogram(
+    "wallet_service_fund_batch_size",
+    "Funds applied per coalesced fund transaction",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+
+KAFKA_PUBLISH_LATENCY = Histogram(
+    "wallet_service_kafka_publish_seconds",
+    "Time to publish a batch of events and receive every broker ack",
+)
+
+KAFKA_PUBLISH_FAILURES = Counter(
+    "wallet_service_kafka_publish_failures_total",
+    "Event batches that failed to publish",
+    ["error"],
+)
\ No newline at end of file
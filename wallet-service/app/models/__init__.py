@@ -1,9 +1,15 @@
 from app.models.wallet import Wallet
 from app.models.wallet_transaction import WalletTransaction, TransactionType, TransactionStatus
+from app.models.wallet_balance_slot import WalletBalanceSlot
+from app.models.outbox_event import OutboxEvent
+from app.models.idempotency_key import IdempotencyKey
 
 __all__ = [
     "Wallet",
     "WalletTransaction",
     "TransactionType",
     "TransactionStatus",
+    "WalletBalanceSlot",
+    "OutboxEvent",
+    "IdempotencyKey",
 ]
\ No newline at end of file
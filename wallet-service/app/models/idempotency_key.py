@@ -0,0 +1,29 @@
+from sqlalchemy import Column, String, Integer, TIMESTAMP, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class IdempotencyKey(Base):
+    """Stored outcome of a fund/transfer request sent with an Idempotency-Key.
+
+    The row is inserted when the request claims its key and completed with the
+    response in the same transaction as the money movement, so a committed key
+    always carries the response to replay.
+    """
+    __tablename__ = "idempotency_keys"
+
+    # SHA-256 hex digest of "<operation>:<wallet_id>:<client key>"
+    key = Column(String(255), primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=True)
+    response = Column(JSONB, nullable=True)
+
+    created_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('idx_idempotency_keys_created_at', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f"<IdempotencyKey(key={self.key}, status_code={self.status_code})>"
\ No newline at end of file
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, BigInteger, TIMESTAMP, Index, Identity, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class OutboxEvent(Base):
+    __tablename__ = "outbox"
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    event_type = Column(String(30), nullable=False)
+    payload = Column(JSONB, nullable=False)
+
+    created_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
+    sent_at = Column(TIMESTAMP, nullable=True)
+
+    __table_args__ = (
+        # The relay only ever scans unsent rows in id order
+        Index('idx_outbox_unsent', 'id', postgresql_where=text('sent_at IS NULL')),
+    )
+
+    def __repr__(self):
+        return f"<OutboxEvent(id={self.id}, type={self.event_type}, sent_at={self.sent_at})>"
\ No newline at end of file
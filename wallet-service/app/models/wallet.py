@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DECIMAL, BigInteger, TIMESTAMP, Index
+from sqlalchemy import Column, String, DECIMAL, BigInteger, Integer, TIMESTAMP, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -12,6 +12,8 @@ class Wallet(Base):
     user_id = Column(String(100), nullable=False, index=True)
     balance = Column(DECIMAL(19, 4), nullable=False, default=0)
     version = Column(BigInteger, nullable=False, default=0)
+    # 0 = plain wallet; N > 0 = credits spread over N wallet_balance_slots rows
+    balance_shards = Column(Integer, nullable=False, default=0, server_default="0")
     
     created_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now(), nullable=False)
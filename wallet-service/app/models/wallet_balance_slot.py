@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, DECIMAL, BigInteger, Integer, ForeignKey
+from app.database import Base
+
+
+class WalletBalanceSlot(Base):
+    """One of N sub-balances backing a sharded wallet.
+
+    A sharded wallet's balance is ``wallets.balance`` plus the sum of its slots,
+    and its version is ``wallets.version`` plus the sum of slot versions, so
+    credits can land on any slot without touching the hot ``wallets`` row.
+    """
+    __tablename__ = "wallet_balance_slots"
+
+    wallet_id = Column(String(36), ForeignKey("wallets.id", ondelete="CASCADE"), primary_key=True)
+    slot = Column(Integer, primary_key=True)
+    balance = Column(DECIMAL(19, 4), nullable=False, default=0)
+    version = Column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<WalletBalanceSlot(wallet_id={self.wallet_id}, slot={self.slot}, balance={self.balance})>"
\ No newline at end of file
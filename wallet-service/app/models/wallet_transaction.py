@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DECIMAL, TIMESTAMP, ForeignKey, Enum
+from sqlalchemy import Column, String, DECIMAL, TIMESTAMP, ForeignKey, Enum, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -21,7 +21,7 @@ class WalletTransaction(Base):
     __tablename__ = "wallet_transactions"
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    wallet_id = Column(String(36), ForeignKey("wallets.id", ondelete="CASCADE"), nullable=False, index=True)
+    wallet_id = Column(String(36), ForeignKey("wallets.id", ondelete="CASCADE"), nullable=False)
     amount = Column(DECIMAL(19, 4), nullable=False)
     type = Column(Enum(TransactionType), nullable=False)
     status = Column(Enum(TransactionStatus), nullable=False, default=TransactionStatus.COMPLETED)
@@ -33,5 +33,10 @@ class WalletTransaction(Base):
 
     wallet = relationship("Wallet", back_populates="transactions")
 
+    __table_args__ = (
+        # Keyset pagination of a wallet's ledger, newest first; also serves wallet_id lookups
+        Index('idx_wallet_transactions_wallet_created_id', 'wallet_id', created_at.desc(), 'id'),
+    )
+
     def __repr__(self):
         return f"<WalletTransaction(id={self.id}, type={self.type}, amount={self.amount})>"
\ No newline at end of file
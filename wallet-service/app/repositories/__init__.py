@@ -1,3 +1,5 @@
 from app.repositories.wallet_repository import WalletRepository
+from app.repositories.outbox_repository import OutboxRepository
+from app.repositories.idempotency_repository import IdempotencyRepository
 
-__all__ = ["WalletRepository"]
\ No newline at end of file
+__all__ = ["WalletRepository", "OutboxRepository", "IdempotencyRepository"]
\ No newline at end of file
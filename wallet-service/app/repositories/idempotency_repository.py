@@ -0,0 +1,68 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.sql import func
+from datetime import timedelta
+from typing import Optional, Sequence, Set
+
+
+from app.models import IdempotencyKey
+
+
+class IdempotencyRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def claim(self, key: str, request_hash: str) -> Optional[IdempotencyKey]:
+        """Insert the key in the current transaction.
+
+        Returns None if this transaction now owns the key, or the completed row
+        of an earlier request. A duplicate still in flight in another
+        transaction makes the insert wait until that transaction ends.
+        """
+        while True:
+            result = await self.db.execute(
+                insert(IdempotencyKey)
+                .values(key=key, request_hash=request_hash)
+                .on_conflict_do_nothing(index_elements=[IdempotencyKey.key])
+                .returning(IdempotencyKey.key)
+            )
+            if result.first():
+                return None
+
+            result = await self.db.execute(
+                select(IdempotencyKey)
+                .where(IdempotencyKey.key == key)
+                .execution_options(populate_existing=True)
+            )
+            existing = result.scalars().first()
+            # Purged between the insert and the select: try to claim it again
+            if existing:
+                return existing
+
+    async def claim_many(self, keys: Sequence[tuple[str, str]]) -> Set[str]:
+        """Insert many (key, request_hash) pairs; returns the keys this transaction now owns."""
+        result = await self.db.execute(
+            insert(IdempotencyKey)
+            # Sorted so concurrent batches wait on shared keys in the same order
+            .values([{"key": key, "request_hash": request_hash} for key, request_hash in sorted(keys)])
+            .on_conflict_do_nothing(index_elements=[IdempotencyKey.key])
+            .returning(IdempotencyKey.key)
+        )
+        return set(result.scalars().all())
+
+    async def complete(self, key: str, status_code: int, response: dict) -> None:
+        await self.db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key == key)
+            .values(status_code=status_code, response=response)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def purge_expired(self, older_than: timedelta) -> int:
+        result = await self.db.execute(
+            delete(IdempotencyKey)
+            .where(IdempotencyKey.created_at < func.now() - older_than)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
\ No newline at end of file
@@ -0,0 +1,51 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, select, update
+from sqlalchemy.sql import func
+from datetime import timedelta
+from typing import List
+
+
+from app.models import OutboxEvent
+from shared.schemas import WalletEvent
+
+
+class OutboxRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def add_events(self, events: List[WalletEvent]) -> None:
+        # No flush: rows go out with the caller's commit, in the same transaction
+        self.db.add_all([
+            OutboxEvent(
+                event_type=event.event_type.value,
+                payload=event.model_dump(mode="json"),
+            )
+            for event in events
+        ])
+
+    async def claim_unsent(self, limit: int) -> List[OutboxEvent]:
+        # SKIP LOCKED lets several relays drain the table without blocking each other
+        result = await self.db.execute(
+            select(OutboxEvent)
+            .where(OutboxEvent.sent_at.is_(None))
+            .order_by(OutboxEvent.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return list(result.scalars().all())
+
+    async def mark_sent(self, event_ids: List[int]) -> None:
+        await self.db.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_(event_ids))
+            .values(sent_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+
+    async def purge_sent(self, older_than: timedelta) -> int:
+        result = await self.db.execute(
+            delete(OutboxEvent)
+            .where(OutboxEvent.sent_at < func.now() - older_than)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
\ No newline at end of file
@@ -1,68 +1,328 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import BigInteger, Row, and_, cast, column, delete, exists, func, insert, literal, or_, select, true, union_all, update, values
+from typing import Collection, Dict, List, Optional, Sequence
+from datetime import datetime
 from decimal import Decimal
+import random
+import uuid
 
 
-from app.models import Wallet, WalletTransaction, TransactionType, TransactionStatus
+from app.models import Wallet, WalletBalanceSlot, WalletTransaction, TransactionType, TransactionStatus
+
+
+def _wallet_summary_query():
+    # Logical balance/version of a wallet = its own row plus all of its balance slots
+    slots = (
+        select(
+            func.coalesce(func.sum(WalletBalanceSlot.balance), 0).label("balance"),
+            cast(func.coalesce(func.sum(WalletBalanceSlot.version), 0), BigInteger).label("version"),
+        )
+        .where(WalletBalanceSlot.wallet_id == Wallet.id)
+        .lateral("slots")
+    )
+    return (
+        select(
+            Wallet.id,
+            Wallet.user_id,
+            (Wallet.balance + slots.c.balance).label("balance"),
+            (Wallet.version + slots.c.version).label("version"),
+        )
+        .select_from(Wallet)
+        .join(slots, true())
+    )
 
 
 class WalletRepository:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def create_wallet(self, user_id: str, initial_balance: Decimal = Decimal('0')) -> Wallet:
+    async def create_wallet(self, user_id: str, initial_balance: Decimal = Decimal('0'), balance_shards: int = 0) -> Wallet:
         wallet = Wallet(
             user_id=user_id,
             balance=initial_balance,
-            version=0
+            version=0,
+            balance_shards=balance_shards,
         )
         self.db.add(wallet)
-        self.db.flush()
+        await self.db.flush()
+        if balance_shards:
+            await self._create_slots(wallet.id, balance_shards)
         return wallet
 
-    def get_wallet_by_id(self, wallet_id: str) -> Optional[Wallet]:
-        return self.db.query(Wallet).filter(Wallet.id == wallet_id).first()
-    
-    def get_wallets_by_user(self, user_id: str) -> List[Wallet]:
-        return self.db.query(Wallet).filter(Wallet.user_id == user_id).all()
-
-    def update_wallet_balance(self, wallet_id: str, new_balance: Decimal, expected_version: int):
-        result = self.db.query(Wallet).filter(
-            and_(
-                Wallet.id == wallet_id,
-                Wallet.version == expected_version
+    async def get_wallet_by_id(self, wallet_id: str) -> Optional[Wallet]:
+        # populate_existing: the session outlives commits (expire_on_commit=False),
+        # so re-reads must overwrite whatever the identity map already holds
+        result = await self.db.execute(
+            select(Wallet)
+            .where(Wallet.id == wallet_id)
+            .execution_options(populate_existing=True)
+        )
+        return result.scalars().first()
+
+    async def get_wallets_by_ids(self, wallet_ids: Collection[str]) -> List[Wallet]:
+        result = await self.db.execute(
+            select(Wallet)
+            .where(Wallet.id.in_(wallet_ids))
+            .execution_options(populate_existing=True)
+        )
+        return list(result.scalars().all())
+
+    async def get_wallets_by_user(self, user_id: str) -> List[Wallet]:
+        result = await self.db.execute(select(Wallet).where(Wallet.user_id == user_id))
+        return list(result.scalars().all())
+
+    async def get_wallet_summary(self, wallet_id: str) -> Optional[Row]:
+        """(id, user_id, balance, version) with balance slots folded in."""
+        result = await self.db.execute(_wallet_summary_query().where(Wallet.id == wallet_id))
+        return result.first()
+
+    async def get_wallet_summaries_by_user(self, user_id: str) -> List[Row]:
+        result = await self.db.execute(_wallet_summary_query().where(Wallet.user_id == user_id))
+        return list(result.all())
+
+    async def fund_wallet_atomic(self, wallet_id: str, amounts: Sequence[Decimal]) -> Optional[tuple[Row, List[str]]]:
+        """Apply one or more funds and write their FUND ledger rows in one statement.
+
+        Returns the wallet's (id, user_id, balance, version) after all of them,
+        with one ledger transaction id per amount in order, or None if the
+        wallet does not exist. The version advances once per amount, exactly as
+        if the funds had run one after another. Concurrent funds queue on the
+        row lock instead of racing a version check, so there is nothing to retry.
+        Sharded wallets are credited on a random slot instead of the wallet row;
+        their returned balance sums the slots as of statement start.
+        """
+        transaction_ids = [str(uuid.uuid4()) for _ in amounts]
+        total = sum(amounts, Decimal("0"))
+        count = len(amounts)
+
+        target = (
+            select(Wallet.id, Wallet.user_id, Wallet.balance, Wallet.version, Wallet.balance_shards)
+            .where(Wallet.id == wallet_id)
+            .cte("target")
+        )
+        slot_credit = (
+            update(WalletBalanceSlot)
+            .where(
+                WalletBalanceSlot.wallet_id == target.c.id,
+                target.c.balance_shards > 0,
+                WalletBalanceSlot.slot == literal(random.randrange(1 << 30)) % target.c.balance_shards,
+            )
+            .values(balance=WalletBalanceSlot.balance + total, version=WalletBalanceSlot.version + count)
+            .returning(WalletBalanceSlot.wallet_id)
+            .cte("slot_credit")
+        )
+        wallet_credit = (
+            update(Wallet)
+            .where(Wallet.id == wallet_id, ~exists(select(slot_credit.c.wallet_id)))
+            .values(balance=Wallet.balance + total, version=Wallet.version + count)
+            .returning(Wallet.id, Wallet.user_id, Wallet.balance, Wallet.version)
+            .cte("wallet_credit")
+        )
+        slot_totals = (
+            select(
+                func.coalesce(func.sum(WalletBalanceSlot.balance), 0).label("balance"),
+                cast(func.coalesce(func.sum(WalletBalanceSlot.version), 0), BigInteger).label("version"),
             )
-        ).update(
-            {
-                "balance": new_balance,
-                "version": Wallet.version + 1
-            },
-            synchronize_session=False
+            .where(WalletBalanceSlot.wallet_id == wallet_id)
+            .subquery("slot_totals")
         )
+        credited = union_all(
+            select(wallet_credit.c.id, wallet_credit.c.user_id, wallet_credit.c.balance, wallet_credit.c.version),
+            # Slot totals come from the statement snapshot, which excludes this credit
+            select(
+                target.c.id,
+                target.c.user_id,
+                target.c.balance + slot_totals.c.balance + total,
+                target.c.version + slot_totals.c.version + count,
+            )
+            .select_from(target)
+            .join(slot_totals, true())
+            .where(exists(select(slot_credit.c.wallet_id))),
+        ).cte("credited")
+        items = values(
+            column("id", WalletTransaction.id.type),
+            column("amount", WalletTransaction.amount.type),
+            name="items",
+        ).data(list(zip(transaction_ids, amounts)))
+        # Data-modifying CTEs always run; joining credited skips the ledger for a missing wallet
+        ledger = (
+            insert(WalletTransaction)
+            .from_select(
+                ["id", "wallet_id", "amount", "type", "status"],
+                select(
+                    items.c.id,
+                    credited.c.id,
+                    items.c.amount,
+                    literal(TransactionType.FUND, WalletTransaction.type.type),
+                    literal(TransactionStatus.COMPLETED, WalletTransaction.status.type),
+                )
+                .select_from(items)
+                .join(credited, true()),
+            )
+            .cte("ledger")
+        )
+        result = await self.db.execute(
+            select(credited.c.id, credited.c.user_id, credited.c.balance, credited.c.version)
+            .add_cte(ledger)
+        )
+        wallet = result.first()
+        if wallet is None:
+            return None
+        return wallet, transaction_ids
 
-        return result > 0  # Return number of rows updated
-    
-    def lock_wallets_for_update(self, wallet_ids: List[str]) -> List[Wallet]:
+    async def lock_wallets_for_update(self, wallet_ids: List[str], credit_only_ids: Collection[str] = ()) -> List[Wallet]:
+        """Row-lock wallets in id order.
+
+        The lock is FOR NO KEY UPDATE: it still serializes debits and reshards,
+        but not the FOR KEY SHARE that inserting a ledger row takes on its
+        wallet through the foreign key. Wallets in ``credit_only_ids`` are only
+        locked when unsharded; sharded ones are credited through their slots
+        and their ledger rows, so a credit that already holds a slot never waits
+        on a debit or reshard holding the row while that one waits on the slot.
+        """
         # Sort ids to ensure consistent lock order
-        sorted_ids = sorted(wallet_ids)
+        sorted_ids = sorted(set(wallet_ids) - set(credit_only_ids))
+
+        condition = Wallet.id.in_(sorted_ids)
+        if credit_only_ids:
+            condition = or_(condition, and_(Wallet.id.in_(credit_only_ids), Wallet.balance_shards == 0))
 
-        wallets = (
-            self.db.query(Wallet)
-            .filter(Wallet.id.in_(sorted_ids))
+        result = await self.db.execute(
+            select(Wallet)
+            .where(condition)
             .order_by(Wallet.id)
+            .with_for_update(key_share=True)
+            .execution_options(populate_existing=True)
+        )
+
+        return list(result.scalars().all())
+
+    # ==================== Balance Slot Operations ====================
+
+    async def _create_slots(self, wallet_id: str, count: int):
+        self.db.add_all([
+            WalletBalanceSlot(wallet_id=wallet_id, slot=slot, balance=Decimal("0"), version=0)
+            for slot in range(count)
+        ])
+        await self.db.flush()
+
+    async def consolidate_slots(self, wallet: Wallet, skip_locked: bool = False) -> None:
+        """Fold the slots of a locked sharded wallet into its wallet row.
+
+        The caller must already hold the wallet row lock; slot locks are always
+        taken after wallet row locks, in slot order. With ``skip_locked`` slots
+        held by in-flight credits are left for a later pass.
+        """
+        result = await self.db.execute(
+            select(WalletBalanceSlot)
+            .where(WalletBalanceSlot.wallet_id == wallet.id)
+            .order_by(WalletBalanceSlot.slot)
+            .with_for_update(skip_locked=skip_locked)
+            .execution_options(populate_existing=True)
+        )
+        for slot in result.scalars().all():
+            wallet.balance += slot.balance
+            wallet.version += slot.version
+            slot.balance = Decimal("0")
+            slot.version = 0
+
+    async def lock_slots(self, consolidate: List[Wallet], credit_slots: Dict[str, int]) -> None:
+        """Lock slots for a debit that also credits unlocked sharded receivers.
+
+        Every slot of the ``consolidate`` wallets is folded into its (locked)
+        wallet row, and the ``credit_slots`` picked by ``pick_credit_slot`` are
+        locked for the later ``credit_wallet_slot`` calls. All of them are taken
+        in one pass in (wallet_id, slot) order, so two transfers crediting each
+        other's slots cannot wait on one another in a cycle.
+        """
+        wallets = {wallet.id: wallet for wallet in consolidate}
+        conditions = [
+            and_(WalletBalanceSlot.wallet_id == wallet_id, WalletBalanceSlot.slot == slot)
+            for wallet_id, slot in credit_slots.items()
+        ]
+        if wallets:
+            conditions.append(WalletBalanceSlot.wallet_id.in_(list(wallets)))
+        if not conditions:
+            return
+        result = await self.db.execute(
+            select(WalletBalanceSlot)
+            .where(or_(*conditions))
+            .order_by(WalletBalanceSlot.wallet_id, WalletBalanceSlot.slot)
             .with_for_update()
-            .all()
+            .execution_options(populate_existing=True)
         )
+        for slot in result.scalars().all():
+            wallet = wallets.get(slot.wallet_id)
+            if wallet is None:
+                continue
+            wallet.balance += slot.balance
+            wallet.version += slot.version
+            slot.balance = Decimal("0")
+            slot.version = 0
+
+    @staticmethod
+    def pick_credit_slot(wallet: Wallet) -> int:
+        """Pick the slot an unlocked sharded wallet is credited through."""
+        # Resharded to zero since it was locked: slot 0 is missing and the credit falls back to the row
+        return random.randrange(wallet.balance_shards) if wallet.balance_shards else 0
+
+    async def credit_wallet_slot(self, wallet: Wallet, amount: Decimal, slot: Optional[int] = None) -> None:
+        """Credit a slot of an unlocked sharded wallet, a random one unless ``slot`` is given."""
+        if slot is None:
+            slot = self.pick_credit_slot(wallet)
+        result = await self.db.execute(
+            update(WalletBalanceSlot)
+            .where(WalletBalanceSlot.wallet_id == wallet.id, WalletBalanceSlot.slot == slot)
+            .values(balance=WalletBalanceSlot.balance + amount, version=WalletBalanceSlot.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            return
+        # Slots were resharded concurrently; credit whichever slot exists now
+        result = await self.db.execute(
+            update(WalletBalanceSlot)
+            .where(
+                WalletBalanceSlot.wallet_id == wallet.id,
+                WalletBalanceSlot.slot == (
+                    select(func.min(WalletBalanceSlot.slot))
+                    .where(WalletBalanceSlot.wallet_id == wallet.id)
+                    .scalar_subquery()
+                ),
+            )
+            .values(balance=WalletBalanceSlot.balance + amount, version=WalletBalanceSlot.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            # Resharded down to the wallet row. Unlike the ledger insert's KEY SHARE,
+            # this update conflicts with a debit's row lock, so it is the one credit
+            # that can wait on a row lock after slot locks; a deadlock maps to a 409
+            await self.db.execute(
+                update(Wallet)
+                .where(Wallet.id == wallet.id)
+                .values(balance=Wallet.balance + amount, version=Wallet.version + 1)
+                .execution_options(synchronize_session=False)
+            )
+
+    async def reshard_wallet(self, wallet: Wallet, balance_shards: int) -> None:
+        """Replace a locked wallet's slots with ``balance_shards`` empty ones."""
+        await self.consolidate_slots(wallet)
+        await self.db.flush()
+        await self.db.execute(
+            delete(WalletBalanceSlot)
+            .where(WalletBalanceSlot.wallet_id == wallet.id)
+            .execution_options(synchronize_session="fetch")
+        )
+        wallet.balance_shards = balance_shards
+        wallet.version += 1
+        if balance_shards:
+            await self._create_slots(wallet.id, balance_shards)
 
-        return wallets
-    
     # ==================== Transaction Operations ====================
 
-    def create_transaction(self, 
+    async def create_transaction(self,
                            wallet_id: str,
                            amount: Decimal,
-                           transaction_type: TransactionType, 
+                           transaction_type: TransactionType,
                            status: TransactionStatus = TransactionStatus.COMPLETED,
                            related_wallet_id: Optional[str] = None) -> WalletTransaction:
         transaction = WalletTransaction(
@@ -73,15 +333,47 @@ class WalletRepository:
             related_wallet_id=related_wallet_id,
         )
         self.db.add(transaction)
-        self.db.flush()
+        await self.db.flush()
         return transaction
-    
-    def get_wallet_transactions(self, wallet_id: str, limit: int = 10, offset: int = 0):
-        return (
-            self.db.query(WalletTransaction)
-            .filter(WalletTransaction.wallet_id == wallet_id)
-            .order_by(WalletTransaction.created_at.desc())
+
+    async def create_transactions(self, transactions: List[dict]) -> List[WalletTransaction]:
+        """Insert many ledger rows with a single flush; each dict takes create_transaction's kwargs."""
+        rows = [
+            WalletTransaction(
+                wallet_id=t["wallet_id"],
+                amount=t["amount"],
+                type=t["transaction_type"],
+                status=t.get("status", TransactionStatus.COMPLETED),
+                related_wallet_id=t.get("related_wallet_id"),
+            )
+            for t in transactions
+        ]
+        self.db.add_all(rows)
+        await self.db.flush()
+        return rows
+
+    async def get_wallet_transactions(self,
+                                      wallet_id: str,
+                                      limit: int = 10,
+                                      after: Optional[tuple[datetime, str]] = None) -> List[WalletTransaction]:
+        """Ledger rows newest first, ordered by (created_at DESC, id).
+
+        ``after`` is the (created_at, id) of the last row of the previous page.
+        Seeking past it walks idx_wallet_transactions_wallet_created_id, so
+        every page costs the same regardless of depth.
+        """
+        query = select(WalletTransaction).where(WalletTransaction.wallet_id == wallet_id)
+        if after:
+            created_at, transaction_id = after
+            # created_at <= bounds the index range scan; rows of one database
+            # transaction share created_at, so id breaks the tie within it
+            query = query.where(
+                WalletTransaction.created_at <= created_at,
+                or_(WalletTransaction.created_at < created_at, WalletTransaction.id > transaction_id),
+            )
+        result = await self.db.execute(
+            query
+            .order_by(WalletTransaction.created_at.desc(), WalletTransaction.id)
             .limit(limit)
-            .offset(offset)
-            .all()
-        )
\ No newline at end of file
+        )
+        return list(result.scalars().all())
@@ -2,13 +2,20 @@ from app.schemas.wallet_schema import (
     CreateWalletRequest,
     FundWalletRequest,
     TransferRequest,
+    BatchTransferItem,
+    BatchTransferRequest,
+    ShardWalletRequest,
     WalletResponse,
     TransactionResponse,
     TransferResponse,
+    TransactionPageResponse,
     WalletListResponse,
+    BatchTransferItemResult,
+    BatchTransferResponse,
     TransactionTypeEnum,
     TransactionStatusEnum,
 )
+from app.schemas.cache_schema import CacheStatsResponse
 
 
 
@@ -16,10 +23,17 @@ __all__ = [
     "CreateWalletRequest",
     "FundWalletRequest",
     "TransferRequest",
+    "BatchTransferItem",
+    "BatchTransferRequest",
+    "ShardWalletRequest",
     "WalletResponse",
     "TransactionResponse",
     "TransferResponse",
+    "TransactionPageResponse",
     "WalletListResponse",
+    "BatchTransferItemResult",
+    "BatchTransferResponse",
     "TransactionTypeEnum",
     "TransactionStatusEnum",
+    "CacheStatsResponse",
 ]
\ No newline at end of file
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+
+
+class CacheStatsResponse(BaseModel):
+    enabled: bool
+    entries: int
+    max_entries: int
+    ttl_ms: int
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    invalidations: int
+    rejected_fills: int
\ No newline at end of file
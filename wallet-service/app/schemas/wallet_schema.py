@@ -1,6 +1,15 @@
 from pydantic import BaseModel, Field, field_validator
+from datetime import datetime
 from decimal import Decimal
 from enum import Enum
+from typing import Optional
+
+
+# Upper bound on items accepted by a single batch transfer request
+MAX_BATCH_TRANSFERS = 1000
+
+# Upper bound on balance slots backing one sharded wallet
+MAX_BALANCE_SHARDS = 64
  
 
 # Transaction states exposed in API
@@ -18,6 +27,7 @@ class TransactionStatusEnum(str, Enum):
 # Request Schemas
 class CreateWalletRequest(BaseModel):
     user_id: str = Field(..., min_length=1, max_length=100, description="User ID who owns the wallet")
+    balance_shards: int = Field(0, ge=0, le=MAX_BALANCE_SHARDS, description="Balance slots for hot receiving wallets (0 = unsharded)")
     
     @field_validator('user_id')
     @classmethod
@@ -46,6 +56,17 @@ class TransferRequest(AmountValidationMixin):
     to_wallet_id: str = Field(..., min_length=1, description="Recipient wallet ID")
     amount: Decimal = Field(..., gt=0, description="Amount to transfer (must be positive)")
 
+class BatchTransferItem(AmountValidationMixin):
+    from_wallet_id: str = Field(..., min_length=1, description="Sender wallet ID")
+    to_wallet_id: str = Field(..., min_length=1, description="Recipient wallet ID")
+    amount: Decimal = Field(..., gt=0, description="Amount to transfer (must be positive)")
+
+class BatchTransferRequest(BaseModel):
+    transfers: list[BatchTransferItem] = Field(..., min_length=1, max_length=MAX_BATCH_TRANSFERS)
+
+class ShardWalletRequest(BaseModel):
+    balance_shards: int = Field(..., ge=0, le=MAX_BALANCE_SHARDS, description="New number of balance slots (0 = unsharded)")
+
 
 # Response schema
 class WalletResponse(BaseModel):
@@ -64,6 +85,8 @@ class TransactionResponse(BaseModel):
     amount: Decimal
     type: TransactionTypeEnum
     status: TransactionStatusEnum
+    related_wallet_id: Optional[str] = None
+    created_at: Optional[datetime] = None
 
     model_config = {
         "from_attributes": True
@@ -74,6 +97,26 @@ class TransferResponse(BaseModel):
     to_wallet_id: str
     amount: Decimal
 
+class TransactionPageResponse(BaseModel):
+    wallet_id: str
+    transactions: list[TransactionResponse]
+    limit: int
+    # Pass back as ?cursor= for the next page; None on the last page
+    next_cursor: Optional[str] = None
+
 class WalletListResponse(BaseModel):
     wallets: list[WalletResponse]
-    total: int
\ No newline at end of file
+    total: int
+
+class BatchTransferItemResult(BaseModel):
+    index: int
+    from_wallet_id: str
+    to_wallet_id: str
+    amount: Decimal
+    status: TransactionStatusEnum
+    detail: Optional[str] = None
+
+class BatchTransferResponse(BaseModel):
+    results: list[BatchTransferItemResult]
+    succeeded: int
+    failed: int
\ No newline at end of file
@@ -1,8 +1,16 @@
 from app.services.wallet_service import WalletService
+from app.services.idempotency_service import IdempotencyService
 from app.services.kafka_producer_service import kafka_producer, KafkaProducerService
+from app.services.outbox_relay_service import outbox_relay, OutboxRelayService
+from app.services.wallet_cache import wallet_cache, WalletReadCache
 
 __all__ = [
     "WalletService",
+    "IdempotencyService",
     "kafka_producer",
     "KafkaProducerService",
+    "outbox_relay",
+    "OutboxRelayService",
+    "wallet_cache",
+    "WalletReadCache",
 ]
\ No newline at end of file
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Sequence, Set
+
+
+logger = logging.getLogger(__name__)
+
+
+class RequestCoalescer:
+    """Groups concurrent submissions per key into one handler call.
+
+    A group is closed ``window`` seconds after its first item, or as soon as it
+    holds ``max_batch`` items. While a key's group is being handled, the next
+    group keeps filling and goes out right after it, so under load every
+    handler call carries whatever queued up during the previous one.
+
+    ``handler(key, items)`` returns one result per item, in order; an
+    ``Exception`` in that list is raised to that item's caller only.
+    """
+
+    def __init__(self,
+                 handler: Callable[[Hashable, List[Any]], Awaitable[Sequence[Any]]],
+                 window_seconds: float,
+                 max_batch: int):
+        self.handler = handler
+        self.window = window_seconds
+        self.max_batch = max_batch
+        self._open: Dict[Hashable, list] = {}
+        self._flushing: Counter = Counter()
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, key: Hashable, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        batch = self._open.get(key)
+        if batch is None:
+            batch = self._open[key] = []
+            loop.call_later(self.window, self._close, key, batch)
+
+        future = loop.create_future()
+        batch.append((item, future))
+        if len(batch) >= self.max_batch:
+            self._close(key, batch)
+        return await future
+
+    def _close(self, key: Hashable, batch: list) -> None:
+        if self._open.get(key) is not batch:
+            return
+        # Queue behind the group in flight unless this one is already full
+        if self._flushing[key] and len(batch) < self.max_batch:
+            return
+        del self._open[key]
+        self._flushing[key] += 1
+        task = asyncio.create_task(self._flush(key, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, key: Hashable, batch: list) -> None:
+        results = ()
+        try:
+            results = await self.handler(key, [item for item, _ in batch])
+        except Exception as e:
+            logger.error(f"Coalesced batch of {len(batch)} for {key} failed: {e}")
+            results = [e] * len(batch)
+        finally:
+            self._flushing[key] -= 1
+            if not self._flushing[key]:
+                del self._flushing[key]
+
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+            # Cancelled before the handler returned: release the callers too
+            for _, future in batch:
+                if not future.done():
+                    future.cancel()
+
+            waiting = self._open.get(key)
+            if waiting is not None:
+                self._close(key, waiting)
\ No newline at end of file
@@ -0,0 +1,137 @@
+import asyncio
+import hashlib
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, NamedTuple, Optional
+
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.repositories import IdempotencyRepository
+from app.exceptions import IdempotencyKeyReusedError
+from app.services.cache import LRUCache
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class StoredResponse(NamedTuple):
+    request_hash: str
+    status_code: int
+    body: dict
+
+
+class IdempotencyService:
+    """Replays the stored outcome of a request retried with the same Idempotency-Key.
+
+    Lookups go to a process-wide LRU first and the ``idempotency_keys`` table
+    second. A duplicate of a request still in flight waits for it: on an
+    asyncio future within this process, on the key's unique index across
+    processes. The first request owns the key until its transaction ends.
+    """
+
+    _cache = LRUCache(settings.idempotency_cache_size)
+    _in_flight: Dict[str, asyncio.Future] = {}
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.repository = IdempotencyRepository(db)
+        # (client key, scoped key, request hash) of the request inside guard()
+        self._guarded: Optional[tuple[str, str, str]] = None
+        # Whether the caller's transaction holds the guarded key's row
+        self._owned = False
+
+    @staticmethod
+    def _hash(request: BaseModel) -> str:
+        return hashlib.sha256(request.model_dump_json().encode()).hexdigest()
+
+    @staticmethod
+    def _scoped_key(scope: str, idempotency_key: str) -> str:
+        # The scope carries the caller-supplied wallet id, so the stored key is
+        # a fixed-length digest rather than the unbounded "<scope>:<key>" string
+        return hashlib.sha256(f"{scope}:{idempotency_key}".encode()).hexdigest()
+
+    @staticmethod
+    def _check(idempotency_key: str, stored: StoredResponse, request_hash: str) -> StoredResponse:
+        if stored.request_hash != request_hash:
+            raise IdempotencyKeyReusedError(f"Idempotency-Key {idempotency_key} was used for a different request")
+        return stored
+
+    @property
+    def guarded_key(self) -> Optional[tuple[str, str]]:
+        """(scoped key, request hash) for callers that claim the key in their own transaction."""
+        if not self._guarded:
+            return None
+        _, key, request_hash = self._guarded
+        return key, request_hash
+
+    @asynccontextmanager
+    async def guard(self,
+                    idempotency_key: Optional[str],
+                    scope: str,
+                    request: BaseModel,
+                    claim: bool = True) -> AsyncIterator[Optional[StoredResponse]]:
+        """Yield the stored response to replay, or None once this request may proceed.
+
+        With ``claim`` the key is claimed in the caller's transaction first and
+        the owner must finish with ``commit_response``, so the outcome is stored
+        in the same transaction as the operation. Without it the caller claims
+        the key elsewhere (see ``guarded_key``), or later through ``claim()``.
+        """
+        if idempotency_key is None:
+            yield None
+            return
+
+        key = self._scoped_key(scope, idempotency_key)
+        request_hash = self._hash(request)
+
+        while (pending := self._in_flight.get(key)) is not None:
+            await asyncio.shield(pending)
+
+        stored = self._cache.get(key)
+        if stored:
+            yield self._check(idempotency_key, stored, request_hash)
+            return
+
+        pending = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = pending
+        self._guarded = (idempotency_key, key, request_hash)
+        try:
+            stored = await self.claim() if claim else None
+            yield stored
+        finally:
+            self._guarded = None
+            self._owned = False
+            del self._in_flight[key]
+            pending.set_result(None)
+
+    async def claim(self) -> Optional[StoredResponse]:
+        """Claim the guarded key in the caller's transaction, or return its stored response."""
+        idempotency_key, key, request_hash = self._guarded
+        row = await self.repository.claim(key, request_hash)
+        if not row:
+            self._owned = True
+            return None
+
+        stored = StoredResponse(row.request_hash, row.status_code, row.response)
+        self._cache.put(key, stored)
+        return self._check(idempotency_key, stored, request_hash)
+
+    def remember(self, status_code: int, body: dict) -> None:
+        """Cache a response whose key was stored by another transaction."""
+        if self._guarded:
+            _, key, request_hash = self._guarded
+            self._cache.put(key, StoredResponse(request_hash, status_code, body))
+
+    async def commit_response(self, status_code: int, body: dict) -> None:
+        """Commit the caller's transaction, storing the response for a claimed key."""
+        if not self._owned:
+            await self.db.commit()
+            return
+
+        _, key, _ = self._guarded
+        await self.repository.complete(key, status_code, body)
+        await self.db.commit()
+        self.remember(status_code, body)
\ No newline at end of file
@@ -1,13 +1,20 @@
 import asyncio
-import json
 import logging
-from typing import Optional
+from typing import List, Optional, Tuple
 from aiokafka import AIOKafkaProducer
 from aiokafka.errors import KafkaError
 
 
 from app.config import get_settings
+from app.metrics import KAFKA_PUBLISH_LATENCY, KAFKA_PUBLISH_FAILURES
 from shared.schemas import WalletEvent, TransferCompletedEvent, TransferFailedEvent
+from shared.serialization import dumps
+from shared.event_codec import (
+    CONTENT_TYPE_HEADER,
+    JSON_CONTENT_TYPE,
+    BINARY_CONTENT_TYPE,
+    encode_event,
+)
 
 
 logger = logging.getLogger(__name__)
@@ -18,6 +25,9 @@ class KafkaProducerService:
     def __init__(self):
         self.bootstrap_servers = settings.kafka_broker
         self.topic = settings.kafka_topic
+        self.mode = settings.kafka_producer_mode
+        self.flush_timeout = settings.kafka_flush_timeout_seconds
+        self.encoding = settings.kafka_event_encoding
         self.producer: Optional[AIOKafkaProducer] = None
 
     async def start(self):
@@ -25,11 +35,13 @@ class KafkaProducerService:
             try:
                 self.producer = AIOKafkaProducer(
                     bootstrap_servers=self.bootstrap_servers,
-                    value_serializer=lambda v: json.dumps(v, default=str).encode("utf-8"),
                     acks="all",
+                    linger_ms=settings.kafka_linger_ms,
+                    max_batch_size=settings.kafka_max_batch_size,
+                    compression_type=settings.kafka_compression_type,
                 )
                 await self.producer.start()
-                logger.info(f"Kafka producer started: {self.bootstrap_servers}")
+                logger.info(f"Kafka producer started: {self.bootstrap_servers} (mode={self.mode})")
                 return
             except Exception as e:
                 logger.error(f"Failed to start Kafka producer (attempt {attempt+1}): {e}")
@@ -38,25 +50,63 @@ class KafkaProducerService:
     
     async def stop(self):
         if self.producer:
+            # Deliver everything still sitting in linger buffers before disconnecting
+            try:
+                await asyncio.wait_for(self.producer.flush(), timeout=self.flush_timeout)
+            except asyncio.TimeoutError:
+                logger.error(f"Kafka producer flush timed out after {self.flush_timeout}s")
             await self.producer.stop()
             logger.info("Kafka producer stopped")
 
+    def _event_keys(self, event: WalletEvent) -> List[bytes]:
+        if isinstance(event, (TransferCompletedEvent, TransferFailedEvent)):
+            return [event.from_wallet_id.encode("utf-8"), event.to_wallet_id.encode("utf-8")]
+        return [event.wallet_id.encode("utf-8")]
+
+    def _encode(self, event: WalletEvent) -> Tuple[bytes, list]:
+        if self.encoding == "binary":
+            try:
+                return encode_event(event), [(CONTENT_TYPE_HEADER, BINARY_CONTENT_TYPE)]
+            except ValueError as e:
+                logger.warning(f"Sending {event.event_type.value} as JSON, binary encoding failed: {e}")
+        return dumps(event), [(CONTENT_TYPE_HEADER, JSON_CONTENT_TYPE)]
+
+    def _messages(self, events: List[WalletEvent]) -> List[Tuple[bytes, bytes, list]]:
+        # Serialize once per event, straight to bytes, and reuse it for every key
+        messages = []
+        for event in events:
+            value, headers = self._encode(event)
+            messages.extend((value, key, headers) for key in self._event_keys(event))
+        return messages
+
+    async def _send(self, messages: List[Tuple[bytes, bytes, list]]):
+        try:
+            with KAFKA_PUBLISH_LATENCY.time():
+                await self._deliver(messages)
+        except Exception as e:
+            KAFKA_PUBLISH_FAILURES.inc(type(e).__name__)
+            raise
+
+    async def _deliver(self, messages: List[Tuple[bytes, bytes, list]]):
+        if self.mode == "sequential":
+            for value, key, headers in messages:
+                await self.producer.send_and_wait(self.topic, value=value, key=key, headers=headers)
+            return
+
+        deliveries = [
+            await self.producer.send(self.topic, value=value, key=key, headers=headers)
+            for value, key, headers in messages
+        ]
+        await asyncio.gather(*deliveries)
+
     async def publish_event(self, event: WalletEvent) -> bool:
         if not self.producer:
             logger.error("Kafka producer not initialized")
-            raise
+            return False
 
         try:
-            event_dict = event.model_dump(mode='json')
-            if isinstance(event, (TransferCompletedEvent, TransferFailedEvent)):
-                keys = [event.from_wallet_id.encode("utf-8"), event.to_wallet_id.encode("utf-8")]
-            else:
-                keys = [event.wallet_id.encode("utf-8")]
-
-            for key in keys:
-                await self.producer.send_and_wait(self.topic, value=event_dict, key=key)
-
-            logger.info(f"Published event: {event.event_type} for wallet {keys}")
+            await self._send(self._messages([event]))
+            logger.info(f"Published event: {event.event_type} for wallet {self._event_keys(event)}")
             return True
         except KafkaError as e:
             logger.error(f"Kafka error publishing event: {e}")
@@ -65,5 +115,21 @@ class KafkaProducerService:
             logger.error(f"Error publishing event: {e}")
             return False
 
+    async def publish_events(self, events: List[WalletEvent]) -> bool:
+        if not self.producer:
+            logger.error("Kafka producer not initialized")
+            return False
+
+        try:
+            await self._send(self._messages(events))
+            logger.info(f"Published batch of {len(events)} events")
+            return True
+        except KafkaError as e:
+            logger.error(f"Kafka error publishing batch: {e}")
+            return False
+        except Exception as e:
+            logger.error(f"Error publishing batch: {e}")
+            return False
+
 
 kafka_producer = KafkaProducerService()
\ No newline at end of file
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Optional
+
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.repositories import OutboxRepository, IdempotencyRepository
+from app.services.kafka_producer_service import kafka_producer
+from shared.schemas import EVENT_MODELS, EventType
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+PURGE_INTERVAL_SECONDS = 60
+
+
+class OutboxRelayService:
+    """Drains the outbox table to Kafka in the background.
+
+    Rows are claimed in id order, published as one pipelined producer batch and
+    marked sent in the same transaction that holds their row locks. A crash
+    between publish and commit re-sends the batch; history-service dedups by
+    transaction id.
+    """
+
+    def __init__(self):
+        self.batch_size = settings.outbox_batch_size
+        self.poll_interval = settings.outbox_poll_interval_ms / 1000
+        self.retention = timedelta(hours=settings.outbox_retention_hours)
+        self.idempotency_retention = timedelta(hours=settings.idempotency_retention_hours)
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+        self._last_purge = 0.0
+
+    async def start(self):
+        self._stopping.clear()
+        self._task = asyncio.create_task(self.run())
+        logger.info("Outbox relay started")
+
+    async def stop(self):
+        if not self._task:
+            return
+        self._stopping.set()
+        await self._task
+        logger.info("Outbox relay stopped")
+
+    async def relay_once(self) -> int:
+        async with SessionLocal() as db:
+            repository = OutboxRepository(db)
+            rows = await repository.claim_unsent(self.batch_size)
+            if not rows:
+                return 0
+
+            events = [EVENT_MODELS[EventType(row.event_type)].model_validate(row.payload) for row in rows]
+            if not await kafka_producer.publish_events(events):
+                await db.rollback()
+                raise RuntimeError(f"Failed to publish {len(rows)} outbox events")
+
+            await repository.mark_sent([row.id for row in rows])
+            await db.commit()
+            logger.debug(f"Relayed {len(rows)} outbox events")
+            return len(rows)
+
+    async def purge_sent(self) -> int:
+        async with SessionLocal() as db:
+            purged = await OutboxRepository(db).purge_sent(self.retention)
+            # Expired idempotency keys ride along on the same idle-time housekeeping
+            purged += await IdempotencyRepository(db).purge_expired(self.idempotency_retention)
+            await db.commit()
+            return purged
+
+    async def run(self):
+        failures = 0
+        while not self._stopping.is_set():
+            try:
+                relayed = await self.relay_once()
+                failures = 0
+            except Exception as e:
+                failures += 1
+                logger.error(f"Outbox relay error (attempt {failures}): {e}")
+                await self._wait(min(2 ** failures, 30) * self.poll_interval)
+                continue
+
+            if relayed < self.batch_size:
+                if relayed == 0 and time.monotonic() - self._last_purge > PURGE_INTERVAL_SECONDS:
+                    self._last_purge = time.monotonic()
+                    try:
+                        await self.purge_sent()
+                    except Exception as e:
+                        logger.error(f"Outbox purge failed: {e}")
+                await self._wait(self.poll_interval)
+
+        # Drain whatever was committed before shutdown so the producer flushes it
+        try:
+            while await self.relay_once():
+                pass
+        except Exception as e:
+            logger.error(f"Outbox drain on shutdown failed: {e}")
+
+    async def _wait(self, seconds: float):
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+
+outbox_relay = OutboxRelayService()
\ No newline at end of file
@@ -2,8 +2,6 @@ import logging
 from sqlalchemy.exc import IntegrityError
 
 
-from app.exceptions import OptimisticLockError
-
 logger = logging.getLogger(__name__)
 
 
@@ -12,20 +10,12 @@ def db_transaction(func):
         try:
             return await func(self, *args, **kwargs)
         except IntegrityError as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Integrity error: {e}")
             raise
     return wrapper
 
-def retry_optimistic_update(entity_id: str, update_fn, db, retries: int = 5):
-    for attempt in range(1, retries + 1):
-        if update_fn():
-            return
-        logger.warning(f"Optimistic lock failed for {entity_id}, retry {attempt}/{retries}")
-        db.rollback()
-    raise OptimisticLockError(f"Failed to update {entity_id} after {retries} retries")
-
-def commit_and_refresh(db, entity):
-    db.commit()
-    db.refresh(entity)
+async def commit_and_refresh(db, entity):
+    await db.commit()
+    await db.refresh(entity)
     return entity
\ No newline at end of file
@@ -0,0 +1,151 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, NamedTuple, Optional
+
+
+from app.config import get_settings
+from app.services.cache import LRUCache
+
+
+settings = get_settings()
+
+
+class ReadToken(NamedTuple):
+    stamp: int
+    started_at: float
+
+
+class _Entry(NamedTuple):
+    expires_at: float
+    version: Optional[int]
+    value: Any
+
+
+class _Invalidation(NamedTuple):
+    stamp: int
+    at: float
+    min_version: Optional[int]
+
+
+def _older(version: Optional[int], than: Optional[int]) -> bool:
+    return version is not None and than is not None and version < than
+
+
+def wallet_key(wallet_id: str) -> tuple:
+    return ("wallet", wallet_id)
+
+
+def user_key(user_id: str) -> tuple:
+    return ("user", user_id)
+
+
+class WalletReadCache:
+    """Per-worker read-through cache for wallet and user-wallet reads.
+
+    Entries expire after ``ttl``, which bounds how stale a read can be when
+    another uvicorn worker wrote the wallet. Writes made by this worker
+    invalidate their keys right away. A reader takes a token before querying
+    Postgres. Its fill is dropped if the key was invalidated after that token,
+    if the value's version is below the one the write produced, or if an entry
+    with a newer version is already cached.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.ttl = ttl_seconds
+        self._entries = LRUCache(max_entries)
+        # Only kept for ``ttl``: fills from reads older than that are dropped anyway
+        self._invalidations: OrderedDict = OrderedDict()
+        self._clock = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.rejected_fills = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._entries.pop(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry.value
+
+    def begin(self) -> ReadToken:
+        return ReadToken(self._clock, time.monotonic())
+
+    def fill(self, key: Hashable, token: ReadToken, value: Any, version: Optional[int] = None) -> bool:
+        if not self.enabled:
+            return False
+        now = time.monotonic()
+        self._prune(now)
+
+        invalidation = self._invalidations.get(key)
+        current = self._entries.get(key)
+        if (
+            now - token.started_at >= self.ttl
+            or (invalidation and invalidation.stamp > token.stamp)
+            or (invalidation and _older(version, invalidation.min_version))
+            or (current and _older(version, current.version))
+        ):
+            self.rejected_fills += 1
+            return False
+
+        self._entries.put(key, _Entry(now + self.ttl, version, value))
+        return True
+
+    def invalidate(self, key: Hashable, min_version: Optional[int] = None) -> None:
+        """Drop ``key`` and reject fills from reads that began before now.
+
+        ``min_version`` is the version the write produced; later fills carrying
+        an older version are rejected too.
+        """
+        self._clock += 1
+        now = time.monotonic()
+        self._entries.pop(key)
+        self._invalidations[key] = _Invalidation(self._clock, now, min_version)
+        self._invalidations.move_to_end(key)
+        self.invalidations += 1
+        self._prune(now)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._invalidations.clear()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self._entries.maxsize,
+            "ttl_ms": int(self.ttl * 1000),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self._entries.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "rejected_fills": self.rejected_fills,
+        }
+
+    def _prune(self, now: float) -> None:
+        while self._invalidations:
+            invalidation = next(iter(self._invalidations.values()))
+            if now - invalidation.at < self.ttl:
+                break
+            self._invalidations.popitem(last=False)
+
+
+wallet_cache = WalletReadCache(
+    max_entries=settings.wallet_cache_max_entries,
+    ttl_seconds=settings.wallet_cache_ttl_ms / 1000,
+)
\ No newline at end of file
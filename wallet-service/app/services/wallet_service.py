@@ -1,9 +1,14 @@
 import logging
 from decimal import Decimal
-from typing import List
-from sqlalchemy.orm import Session
+from typing import Dict, List, NamedTuple, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.repositories import WalletRepository
+from app.config import get_settings
+from app.database import SessionLocal
+from app.repositories import WalletRepository, OutboxRepository
+from app.services.coalescer import RequestCoalescer
+from app.services.idempotency_service import IdempotencyService, StoredResponse
+from app.services.wallet_cache import wallet_cache, wallet_key, user_key
 from shared.schemas.event_schema import (
     WalletCreatedEvent,
     WalletFundedEvent,
@@ -14,28 +19,73 @@ from app.schemas import (
     CreateWalletRequest,
     FundWalletRequest,
     TransferRequest,
+    BatchTransferRequest,
+    ShardWalletRequest,
     WalletResponse,
     TransferResponse,
+    TransactionResponse,
+    TransactionPageResponse,
+    BatchTransferItemResult,
+    BatchTransferResponse,
+    TransactionStatusEnum,
 )
 from app.models import TransactionType, TransactionStatus
-from app.services.kafka_producer_service import kafka_producer
-from app.services.utils import db_transaction, retry_optimistic_update, commit_and_refresh
+from app.services.utils import db_transaction, commit_and_refresh
 from app.exceptions import InsufficientBalanceError, WalletNotFoundError
+from app.metrics import OPERATION_LATENCY, IDEMPOTENT_REPLAYS, FUND_BATCH_SIZE
+from shared.metrics import observe_latency
+from shared.pagination import encode_cursor, decode_cursor
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class _FundItem(NamedTuple):
+    amount: Decimal
+    # (scoped key, request hash) to claim inside the batch transaction
+    idempotency: Optional[tuple[str, str]]
 
 
 class WalletService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.repository = WalletRepository(db)
+        self.outbox = OutboxRepository(db)
+        self.idempotency = IdempotencyService(db)
+
+    def _enqueue_events(self, *events):
+        # Written to the outbox in the caller's transaction; the relay publishes after commit
+        self.outbox.add_events(list(events))
+
+    async def _has_balance(self, wallet, amount: Decimal, credit_slots: Optional[Dict[str, int]] = None) -> bool:
+        # Credits to a sharded wallet land in its slots; fold them in only when
+        # the wallet row alone cannot cover a debit.
+        if wallet.balance >= amount or not wallet.balance_shards:
+            return wallet.balance >= amount
+        if credit_slots:
+            # Receiver slots still to be credited are locked in the same
+            # (wallet_id, slot) ordered pass as the slots being folded
+            await self.repository.lock_slots([wallet], credit_slots)
+            return wallet.balance >= amount
+        # Nothing else is locked after this wallet's slots, so slots busy with
+        # in-flight credits can be skipped first and a debit rarely waits on a credit
+        await self.repository.consolidate_slots(wallet, skip_locked=True)
+        if wallet.balance < amount:
+            await self.repository.consolidate_slots(wallet)
+        return wallet.balance >= amount
+
+    def _invalidate_cache(self, *wallets):
+        # Called after commit with anything exposing id, user_id and version.
+        # For sharded wallets the row version is a lower bound of the logical one.
+        for wallet in wallets:
+            wallet_cache.invalidate(wallet_key(wallet.id), min_version=wallet.version)
+            wallet_cache.invalidate(user_key(wallet.user_id))
 
-   
-    async def _publish_event(self, event):
-        try:
-            await kafka_producer.publish_event(event)
-        except Exception as e:
-            logger.error(f"Kafka publish failed: {e}")
+    def _replay(self, stored: StoredResponse, response_model):
+        IDEMPOTENT_REPLAYS.inc()
+        if stored.status_code == 400:
+            raise InsufficientBalanceError(stored.body["detail"])
+        return response_model.model_validate(stored.body)
 
     def _map_event(self, name: str, **kwargs):
         mapping = {
@@ -46,22 +96,21 @@ class WalletService:
         }
         return mapping[name](**kwargs)
 
+    @observe_latency(OPERATION_LATENCY, "create_wallet")
     @db_transaction
     async def create_wallet(self, request: CreateWalletRequest) -> WalletResponse:
-        wallet = self.repository.create_wallet(
+        wallet = await self.repository.create_wallet(
             user_id=request.user_id,
-            initial_balance=Decimal("0")
+            initial_balance=Decimal("0"),
+            balance_shards=request.balance_shards,
         )
-        transaction = self.repository.create_transaction(
+        transaction = await self.repository.create_transaction(
             wallet_id=wallet.id,
             amount=Decimal("0"),
             transaction_type=TransactionType.FUND,
             status=TransactionStatus.COMPLETED,
         )
 
-        commit_and_refresh(self.db, wallet)
-        logger.info(f"Wallet created: {wallet.id} for user {wallet.user_id}")
-
         event = self._map_event(
             "wallet_created",
             wallet_id=wallet.id,
@@ -69,61 +118,143 @@ class WalletService:
             transaction_id=transaction.id,
             initial_balance=wallet.balance,
         )
-        await self._publish_event(event)
+        self._enqueue_events(event)
+
+        await commit_and_refresh(self.db, wallet)
+        self._invalidate_cache(wallet)
+        logger.info(f"Wallet created: {wallet.id} for user {wallet.user_id}")
         return WalletResponse.model_validate(wallet)
 
-    @db_transaction
-    async def fund_wallet(self, wallet_id: str, request: FundWalletRequest) -> WalletResponse:
-        def attempt_update():
-            wallet = self.repository.get_wallet_by_id(wallet_id)
-            if not wallet:
-                raise WalletNotFoundError(f"Wallet {wallet_id} not found")
-
-            new_balance = wallet.balance + request.amount
-            return self.repository.update_wallet_balance(
-                wallet_id=wallet_id,
-                new_balance=new_balance,
-                expected_version=wallet.version,
-            )
+    @observe_latency(OPERATION_LATENCY, "fund_wallet")
+    async def fund_wallet(self, wallet_id: str, request: FundWalletRequest,
+                          idempotency_key: Optional[str] = None) -> WalletResponse:
+        coalesce = settings.fund_coalescing
+        async with self.idempotency.guard(idempotency_key, f"fund:{wallet_id}", request, claim=not coalesce) as stored:
+            if stored:
+                return self._replay(stored, WalletResponse)
+            if not coalesce:
+                return await self._fund_wallet(wallet_id, request)
 
-        retry_optimistic_update(wallet_id, attempt_update, self.db)
+            response = await fund_coalescer.submit(wallet_id, _FundItem(request.amount, self.idempotency.guarded_key))
+            if response is None:
+                # Another transaction claimed the key first: replay its response,
+                # or run alone if it rolled back
+                stored = await self.idempotency.claim()
+                if stored:
+                    return self._replay(stored, WalletResponse)
+                return await self._fund_wallet(wallet_id, request)
 
-        transaction = self.repository.create_transaction(
-            wallet_id=wallet_id,
-            amount=request.amount,
-            transaction_type=TransactionType.FUND,
-            status=TransactionStatus.COMPLETED,
-        )
+            self.idempotency.remember(200, response.model_dump(mode="json"))
+            return response
 
-        self.db.commit()
-        wallet = self.repository.get_wallet_by_id(wallet_id)
-        logger.info(f"Wallet {wallet_id} funded: ${request.amount}, new balance: ${wallet.balance}")
+    @db_transaction
+    async def _fund_wallet(self, wallet_id: str, request: FundWalletRequest) -> WalletResponse:
+        funded = await self.repository.fund_wallet_atomic(wallet_id, [request.amount])
+        if not funded:
+            raise WalletNotFoundError(f"Wallet {wallet_id} not found")
+        wallet, (transaction_id,) = funded
 
         event = self._map_event(
             "wallet_funded",
             wallet_id=wallet.id,
             user_id=wallet.user_id,
-            transaction_id=transaction.id,
+            transaction_id=transaction_id,
             amount=request.amount,
             new_balance=wallet.balance,
         )
-        await self._publish_event(event)
-        return WalletResponse.model_validate(wallet)
+        self._enqueue_events(event)
+
+        response = WalletResponse.model_validate(wallet)
+        await self.idempotency.commit_response(200, response.model_dump(mode="json"))
+        self._invalidate_cache(wallet)
+        logger.info(f"Wallet {wallet_id} funded: ${request.amount}, new balance: ${wallet.balance}")
+        return response
+
+    @db_transaction
+    async def _fund_wallet_batch(self, wallet_id: str, items: List[_FundItem]) -> list:
+        """Apply coalesced funds to one wallet in one transaction.
+
+        Returns one outcome per item: the WalletResponse it would have got
+        running alone, a WalletNotFoundError, or None when another transaction
+        claimed its idempotency key first. Every applied item keeps its own
+        ledger row, event and idempotency record.
+        """
+        keys = [item.idempotency for item in items if item.idempotency]
+        claimed = await self.idempotency.repository.claim_many(keys) if keys else set()
+        applied = [
+            index for index, item in enumerate(items)
+            if not item.idempotency or item.idempotency[0] in claimed
+        ]
+        outcomes = [None] * len(items)
+        if not applied:
+            return outcomes
+
+        FUND_BATCH_SIZE.observe(len(applied))
+        funded = await self.repository.fund_wallet_atomic(wallet_id, [items[i].amount for i in applied])
+        if not funded:
+            error = WalletNotFoundError(f"Wallet {wallet_id} not found")
+            for index in applied:
+                outcomes[index] = error
+            return outcomes
+        wallet, transaction_ids = funded
+
+        # Replay the batch in order from the balance/version before it
+        balance = wallet.balance - sum(items[i].amount for i in applied)
+        version = wallet.version - len(applied)
+        events = []
+        for index, transaction_id in zip(applied, transaction_ids):
+            item = items[index]
+            balance += item.amount
+            version += 1
+            response = WalletResponse(id=wallet.id, user_id=wallet.user_id, balance=balance, version=version)
+            events.append(self._map_event(
+                "wallet_funded",
+                wallet_id=wallet.id,
+                user_id=wallet.user_id,
+                transaction_id=transaction_id,
+                amount=item.amount,
+                new_balance=balance,
+            ))
+            if item.idempotency:
+                await self.idempotency.repository.complete(item.idempotency[0], 200, response.model_dump(mode="json"))
+            outcomes[index] = response
+        self._enqueue_events(*events)
+
+        await self.db.commit()
+        self._invalidate_cache(wallet)
+        logger.info(f"Wallet {wallet_id} funded {len(applied)}x in one batch, new balance: ${wallet.balance}")
+        return outcomes
+
+    @observe_latency(OPERATION_LATENCY, "transfer_funds")
+    async def transfer_funds(self, from_wallet_id: str, request: TransferRequest,
+                             idempotency_key: Optional[str] = None) -> TransferResponse:
+        async with self.idempotency.guard(idempotency_key, f"transfer:{from_wallet_id}", request) as stored:
+            if stored:
+                return self._replay(stored, TransferResponse)
+            return await self._transfer_funds(from_wallet_id, request)
 
     @db_transaction
-    async def transfer_funds(self, from_wallet_id: str, request: TransferRequest) -> TransferResponse:
+    async def _transfer_funds(self, from_wallet_id: str, request: TransferRequest) -> TransferResponse:
         to_wallet_id = request.to_wallet_id
-        wallets = self.repository.lock_wallets_for_update([from_wallet_id, to_wallet_id])
+        # A sharded receiver is credited through a slot and never row-locked
+        wallets = await self.repository.lock_wallets_for_update(
+            [from_wallet_id, to_wallet_id],
+            credit_only_ids=[to_wallet_id] if to_wallet_id != from_wallet_id else [],
+        )
 
         from_wallet = next((w for w in wallets if w.id == from_wallet_id), None)
         to_wallet = next((w for w in wallets if w.id == to_wallet_id), None)
+        to_locked = to_wallet is not None
+        if from_wallet and not to_wallet:
+            to_wallet = next(iter(await self.repository.get_wallets_by_ids([to_wallet_id])), None)
 
         if not from_wallet:
             raise WalletNotFoundError(f"Source wallet {from_wallet_id} not found")
         if not to_wallet:
             raise WalletNotFoundError(f"Destination wallet {to_wallet_id} not found")
 
-        if from_wallet.balance < request.amount:
+        credit_slots = {} if to_locked else {to_wallet.id: self.repository.pick_credit_slot(to_wallet)}
+        if not await self._has_balance(from_wallet, request.amount, credit_slots):
             event = self._map_event(
                 "transfer_failed",
                 from_wallet_id=from_wallet_id,
@@ -132,24 +263,28 @@ class WalletService:
                 amount=request.amount,
                 reason="Insufficient balance",
             )
-            await self._publish_event(event)
-            raise InsufficientBalanceError(
-                f"Insufficient balance: has ${from_wallet.balance}, needs ${request.amount}"
-            )
+            self._enqueue_events(event)
+            detail = f"Insufficient balance: has ${from_wallet.balance}, needs ${request.amount}"
+            # A retry with the same key replays the failure instead of moving money later
+            await self.idempotency.commit_response(400, {"detail": detail})
+            raise InsufficientBalanceError(detail)
 
         from_wallet.balance -= request.amount
-        to_wallet.balance += request.amount
         from_wallet.version += 1
-        to_wallet.version += 1
+        if to_locked:
+            to_wallet.balance += request.amount
+            to_wallet.version += 1
+        else:
+            await self.repository.credit_wallet_slot(to_wallet, request.amount, credit_slots[to_wallet.id])
 
-        debit_tx = self.repository.create_transaction(
+        debit_tx = await self.repository.create_transaction(
             wallet_id=from_wallet_id,
             amount=request.amount,
             transaction_type=TransactionType.TRANSFER_OUT,
             status=TransactionStatus.COMPLETED,
             related_wallet_id=to_wallet_id,
         )
-        credit_tx = self.repository.create_transaction(
+        credit_tx = await self.repository.create_transaction(
             wallet_id=to_wallet_id,
             amount=request.amount,
             transaction_type=TransactionType.TRANSFER_IN,
@@ -157,9 +292,6 @@ class WalletService:
             related_wallet_id=from_wallet_id,
         )
 
-        self.db.commit()
-        logger.info(f"Transfer: ${request.amount} from {from_wallet_id} to {to_wallet_id}")
-
         event = self._map_event(
             "transfer_completed",
             from_wallet_id=from_wallet_id,
@@ -170,20 +302,216 @@ class WalletService:
             from_transaction_id=debit_tx.id,
             to_transaction_id=credit_tx.id,
         )
-        await self._publish_event(event)
+        self._enqueue_events(event)
 
-        return TransferResponse(
+        response = TransferResponse(
             from_wallet_id=from_wallet_id,
             to_wallet_id=to_wallet_id,
             amount=request.amount,
         )
+        await self.idempotency.commit_response(200, response.model_dump(mode="json"))
+        self._invalidate_cache(from_wallet, to_wallet)
+        logger.info(f"Transfer: ${request.amount} from {from_wallet_id} to {to_wallet_id}")
+        return response
 
-    def get_wallet(self, wallet_id: str) -> WalletResponse:
-        wallet = self.repository.get_wallet_by_id(wallet_id)
+    @observe_latency(OPERATION_LATENCY, "transfer_funds_batch")
+    @db_transaction
+    async def transfer_funds_batch(self, request: BatchTransferRequest) -> BatchTransferResponse:
+        # Lock every wallet the batch touches once, in the same sorted order as single transfers
+        # Receivers that never send in this batch are credit-only: sharded ones
+        # are credited through their slots without taking the wallet row lock
+        # (their ledger rows' FK KEY SHARE does not conflict with FOR NO KEY UPDATE)
+        from_ids = {item.from_wallet_id for item in request.transfers}
+        credit_only_ids = {item.to_wallet_id for item in request.transfers} - from_ids
+        wallets = {
+            w.id: w
+            for w in await self.repository.lock_wallets_for_update(
+                list(from_ids | credit_only_ids), credit_only_ids=credit_only_ids
+            )
+        }
+        locked_ids = set(wallets)
+        unlocked_ids = credit_only_ids - locked_ids
+        if unlocked_ids:
+            wallets.update({w.id: w for w in await self.repository.get_wallets_by_ids(unlocked_ids)})
+
+        # Sharded senders that may run short are folded, and the receiver slots
+        # locked, up front in one (wallet_id, slot) ordered pass
+        needed = {}
+        for item in request.transfers:
+            needed[item.from_wallet_id] = needed.get(item.from_wallet_id, Decimal("0")) + item.amount
+        short_senders = [
+            wallets[wallet_id] for wallet_id, amount in needed.items()
+            if wallet_id in wallets and wallets[wallet_id].balance_shards and wallets[wallet_id].balance < amount
+        ]
+        credit_slots = {wallet_id: self.repository.pick_credit_slot(wallets[wallet_id]) for wallet_id in unlocked_ids
+                        if wallet_id in wallets}
+        await self.repository.lock_slots(short_senders, credit_slots)
+
+        slot_credits = {}  # unlocked sharded receiver id -> total credited
+        results = []
+        outcomes = []  # (item, from_wallet, to_wallet, failed_event) in request order
+        ledger = []
+
+        for index, item in enumerate(request.transfers):
+            from_wallet = wallets.get(item.from_wallet_id)
+            to_wallet = wallets.get(item.to_wallet_id)
+
+            detail = None
+            failed_event = None
+            if not from_wallet:
+                detail = f"Source wallet {item.from_wallet_id} not found"
+            elif not to_wallet:
+                detail = f"Destination wallet {item.to_wallet_id} not found"
+            elif from_wallet.balance < item.amount:
+                detail = f"Insufficient balance: has ${from_wallet.balance}, needs ${item.amount}"
+                failed_event = self._map_event(
+                    "transfer_failed",
+                    from_wallet_id=item.from_wallet_id,
+                    from_user_id=from_wallet.user_id,
+                    to_wallet_id=item.to_wallet_id,
+                    amount=item.amount,
+                    reason="Insufficient balance",
+                )
+
+            results.append(BatchTransferItemResult(
+                index=index,
+                from_wallet_id=item.from_wallet_id,
+                to_wallet_id=item.to_wallet_id,
+                amount=item.amount,
+                status=TransactionStatusEnum.FAILED if detail else TransactionStatusEnum.COMPLETED,
+                detail=detail,
+            ))
+            if detail:
+                if failed_event:
+                    outcomes.append((item, from_wallet, to_wallet, failed_event))
+                continue
+
+            from_wallet.balance -= item.amount
+            from_wallet.version += 1
+            if to_wallet.id in locked_ids:
+                to_wallet.balance += item.amount
+                to_wallet.version += 1
+            else:
+                slot_credits[to_wallet.id] = slot_credits.get(to_wallet.id, Decimal("0")) + item.amount
+
+            ledger.append({
+                "wallet_id": item.from_wallet_id,
+                "amount": item.amount,
+                "transaction_type": TransactionType.TRANSFER_OUT,
+                "related_wallet_id": item.to_wallet_id,
+            })
+            ledger.append({
+                "wallet_id": item.to_wallet_id,
+                "amount": item.amount,
+                "transaction_type": TransactionType.TRANSFER_IN,
+                "related_wallet_id": item.from_wallet_id,
+            })
+            outcomes.append((item, from_wallet, to_wallet, None))
+
+        # One credit per receiver, through the slot locked above
+        for wallet_id in sorted(slot_credits):
+            await self.repository.credit_wallet_slot(wallets[wallet_id], slot_credits[wallet_id], credit_slots[wallet_id])
+
+        transactions = iter(await self.repository.create_transactions(ledger))
+
+        events = []
+        for item, from_wallet, to_wallet, failed_event in outcomes:
+            if failed_event:
+                events.append(failed_event)
+                continue
+            debit_tx, credit_tx = next(transactions), next(transactions)
+            events.append(self._map_event(
+                "transfer_completed",
+                from_wallet_id=item.from_wallet_id,
+                to_wallet_id=item.to_wallet_id,
+                from_user_id=from_wallet.user_id,
+                to_user_id=to_wallet.user_id,
+                amount=item.amount,
+                from_transaction_id=debit_tx.id,
+                to_transaction_id=credit_tx.id,
+            ))
+
+        self._enqueue_events(*events)
+        await self.db.commit()
+        self._invalidate_cache(*wallets.values())
+
+        succeeded = len(ledger) // 2
+        logger.info(f"Batch transfer: {succeeded} completed, {len(results) - succeeded} failed")
+
+        return BatchTransferResponse(
+            results=results,
+            succeeded=succeeded,
+            failed=len(results) - succeeded,
+        )
+
+    @observe_latency(OPERATION_LATENCY, "set_balance_shards")
+    @db_transaction
+    async def set_balance_shards(self, wallet_id: str, request: ShardWalletRequest) -> WalletResponse:
+        wallets = await self.repository.lock_wallets_for_update([wallet_id])
+        if not wallets:
+            raise WalletNotFoundError(f"Wallet {wallet_id} not found")
+
+        await self.repository.reshard_wallet(wallets[0], request.balance_shards)
+        await self.db.commit()
+        self._invalidate_cache(wallets[0])
+        logger.info(f"Wallet {wallet_id} resharded to {request.balance_shards} balance slots")
+        return await self.get_wallet(wallet_id)
+
+    @observe_latency(OPERATION_LATENCY, "get_wallet")
+    async def get_wallet(self, wallet_id: str) -> WalletResponse:
+        cached = wallet_cache.get(wallet_key(wallet_id))
+        if cached:
+            return cached
+
+        token = wallet_cache.begin()
+        wallet = await self.repository.get_wallet_summary(wallet_id)
         if not wallet:
             raise WalletNotFoundError(f"Wallet {wallet_id} not found")
-        return WalletResponse.model_validate(wallet)
+        response = WalletResponse.model_validate(wallet)
+        wallet_cache.fill(wallet_key(wallet_id), token, response, version=response.version)
+        return response
+
+    @observe_latency(OPERATION_LATENCY, "get_wallet_transactions")
+    async def get_wallet_transactions(self, wallet_id: str, limit: int, cursor: Optional[str] = None) -> TransactionPageResponse:
+        after = decode_cursor(cursor) if cursor else None
+        # One extra row tells whether another page follows
+        transactions = await self.repository.get_wallet_transactions(wallet_id, limit + 1, after)
+        if not transactions and not await self.repository.get_wallet_by_id(wallet_id):
+            raise WalletNotFoundError(f"Wallet {wallet_id} not found")
+
+        page = transactions[:limit]
+        next_cursor = None
+        if len(transactions) > limit:
+            next_cursor = encode_cursor(page[-1].created_at, page[-1].id)
+
+        return TransactionPageResponse(
+            wallet_id=wallet_id,
+            transactions=[TransactionResponse.model_validate(t) for t in page],
+            limit=limit,
+            next_cursor=next_cursor,
+        )
+
+    @observe_latency(OPERATION_LATENCY, "get_user_wallets")
+    async def get_user_wallets(self, user_id: str) -> List[WalletResponse]:
+        cached = wallet_cache.get(user_key(user_id))
+        if cached is not None:
+            return list(cached)
+
+        token = wallet_cache.begin()
+        wallets = await self.repository.get_wallet_summaries_by_user(user_id)
+        responses = [WalletResponse.model_validate(w) for w in wallets]
+        wallet_cache.fill(user_key(user_id), token, tuple(responses))
+        return responses
+
+
+async def _apply_fund_batch(wallet_id: str, items: List[_FundItem]) -> list:
+    # Batches outlive any one request, so they run on their own session
+    async with SessionLocal() as db:
+        return await WalletService(db)._fund_wallet_batch(wallet_id, items)
+
 
-    def get_user_wallets(self, user_id: str) -> List[WalletResponse]:
-        wallets = self.repository.get_wallets_by_user(user_id)
-        return [WalletResponse.model_validate(w) for w in wallets]
\ No newline at end of file
+fund_coalescer = RequestCoalescer(
+    _apply_fund_batch,
+    window_seconds=settings.fund_coalesce_window_ms / 1000,
+    max_batch=settings.fund_coalesce_max_batch,
+)
\ No newline at end of file
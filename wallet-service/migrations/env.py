@@ -1,5 +1,5 @@
 from app.database import Base
-from app.models import wallet, wallet_transaction
+from app.models import wallet, wallet_transaction, wallet_balance_slot, outbox_event, idempotency_key
 from app.config import get_settings
 
 import os
@@ -50,7 +50,7 @@ def include_object(object, name, type_, reflected, compare_to):
     """
     if type_ == "table":
         # Only manage tables defined in our models
-        return name in ["wallets", "wallet_transactions"]
+        return name in ["wallets", "wallet_transactions", "wallet_balance_slots", "outbox", "idempotency_keys"]
     return True
 
 
@@ -0,0 +1,43 @@
+"""add wallet balance slots
+
+Revision ID: 2f6c8e1a9d3b
+Revises: 9b1f2c7d4e6a
+Create Date: 2026-10-17 11:40:05.318842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f6c8e1a9d3b'
+down_revision: Union[str, Sequence[str], None] = '9b1f2c7d4e6a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('wallets', sa.Column('balance_shards', sa.Integer(), server_default='0', nullable=False))
+    op.create_table('wallet_balance_slots',
+    sa.Column('wallet_id', sa.String(length=36), nullable=False),
+    sa.Column('slot', sa.Integer(), nullable=False),
+    sa.Column('balance', sa.DECIMAL(precision=19, scale=4), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['wallet_id'], ['wallets.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('wallet_id', 'slot')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Fold slot balances back into their wallets before dropping them
+    op.execute(
+        "UPDATE wallets SET balance = wallets.balance + s.balance, version = wallets.version + s.version "
+        "FROM (SELECT wallet_id, sum(balance) AS balance, sum(version) AS version "
+        "FROM wallet_balance_slots GROUP BY wallet_id) s WHERE wallets.id = s.wallet_id"
+    )
+    op.drop_table('wallet_balance_slots')
+    op.drop_column('wallets', 'balance_shards')
@@ -0,0 +1,54 @@
+"""add wallet transactions keyset index
+
+Revision ID: c41d7f2a8b65
+Revises: 7e3a5b90c4d1
+Create Date: 2026-10-17 15:26:12.804519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d7f2a8b65'
+down_revision: Union[str, Sequence[str], None] = '7e3a5b90c4d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY keeps the ledger writable while the index builds; it cannot run in a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_wallet_transactions_wallet_created_id',
+            'wallet_transactions',
+            ['wallet_id', sa.text('created_at DESC'), 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        # The composite index leads with wallet_id, so the single-column one is redundant
+        op.drop_index(
+            op.f('ix_wallet_transactions_wallet_id'),
+            table_name='wallet_transactions',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f('ix_wallet_transactions_wallet_id'),
+            'wallet_transactions',
+            ['wallet_id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'idx_wallet_transactions_wallet_created_id',
+            table_name='wallet_transactions',
+            postgresql_concurrently=True,
+        )